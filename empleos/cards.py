@@ -0,0 +1,121 @@
+"""
+Tarjetas de empleo (proyección liviana de JobPosting).
+
+Los listados (resultados del chat, /api/jobpostings) solo muestran unas pocas
+columnas, así que en vez de instanciar JobPosting + Company + Location completos
+(incluida la `description`) se leen solo esas columnas con `.values_list()` y se
+guardan en filas compactas (`JobCard`, con `__slots__`).
+"""
+from typing import Iterable, List
+
+from .models import JobSearch
+from .search_view import view_field
+
+# Columnas que se leen de la BD, en el orden de JobCard.__slots__
+CARD_COLUMNS = (
+    "id",
+    "title",
+    "company__name",
+    "company__verified",
+    "company__rating",
+    "location__raw_text",
+    "source__name",
+    "area",
+    "subarea",
+    "work_modality",
+    "contract_type",
+    "workday",
+    "salary_text",
+    "min_experience",
+    "min_education",
+    "published_date",
+    "accessibility_mentioned",
+    "transport_mentioned",
+    "disability_friendly",
+    "url",
+)
+
+# Las mismas columnas en la vista de búsqueda (search_view.py), sin joins
+SEARCH_VIEW_CARD_COLUMNS = tuple(view_field(column) for column in CARD_COLUMNS)
+
+
+def card_columns(queryset) -> tuple:
+    """Columnas de JobCard según el modelo del queryset (JobPosting o JobSearch)."""
+    return SEARCH_VIEW_CARD_COLUMNS if queryset.model is JobSearch else CARD_COLUMNS
+
+
+class JobCard:
+    __slots__ = (
+        "id",
+        "title",
+        "company_name",
+        "company_verified",
+        "company_rating",
+        "location",
+        "source",
+        "area",
+        "subarea",
+        "work_modality",
+        "contract_type",
+        "workday",
+        "salary_text",
+        "min_experience",
+        "min_education",
+        "published_date",
+        "accessibility_mentioned",
+        "transport_mentioned",
+        "disability_friendly",
+        "url",
+    )
+
+    def __init__(self, *row):
+        for name, value in zip(self.__slots__, row):
+            setattr(self, name, value)
+
+    def as_dict(self) -> dict:
+        """Formato de los resultados de búsqueda (engine / chat)."""
+        rating = float(self.company_rating) if self.company_rating is not None else None
+        return {
+            'id': self.id,
+            'title': self.title,
+            'company': {'name': self.company_name, 'verified': self.company_verified, 'rating': rating},
+            'location': {'raw_text': self.location},
+            'area': self.area,
+            'subarea': self.subarea,
+            'work_modality': self.work_modality,
+            'contract_type': self.contract_type,
+            'workday': self.workday,
+            'salary_text': self.salary_text,
+            'min_experience': self.min_experience,
+            'min_education': self.min_education,
+            'published_date': self.published_date,
+            'accessibility_mentioned': self.accessibility_mentioned,
+            'transport_mentioned': self.transport_mentioned,
+            'disability_friendly': self.disability_friendly,
+            'url': self.url,
+        }
+
+    def as_list_item(self) -> dict:
+        """Formato corto del listado de /api/jobpostings."""
+        return {
+            "id": self.id,
+            "title": self.title or "",
+            "company": self.company_name,
+            "source": self.source,
+            "location": self.location,
+            "url": self.url,
+        }
+
+
+def fetch_cards(queryset) -> List[JobCard]:
+    """Tarjetas de un queryset (respeta su orden y slicing)."""
+    return [JobCard(*row) for row in queryset.values_list(*card_columns(queryset))]
+
+
+def fetch_cards_by_id(queryset, ids: Iterable[int]) -> List[JobCard]:
+    """Tarjetas de los `ids` dados, en el mismo orden que `ids`."""
+    ids = list(ids)
+    if not ids:
+        return []
+    by_id = {card.id: card for card in fetch_cards(queryset.filter(id__in=ids))}
+    return [by_id[job_id] for job_id in ids if job_id in by_id]
@@ -0,0 +1,151 @@
+"""
+Versión de datos del catálogo de empleos.
+
+Cada proceso (worker de gunicorn) mantiene estructuras derivadas del catálogo
+en memoria (índice de búsqueda, cachés). Para saber cuándo reconstruirlas se
+compara contra un contador global guardado en la BD, que los importadores
+incrementan con `bump_data_version()` al terminar de escribir empleos.
+Antes de incrementarlo se refresca la vista materializada de búsqueda
+(search_view.py) y se guarda la tabla de sinónimos (nlp.build_synonym_table) con
+la versión siguiente, para que los procesos que se reconstruyan ya lean las dos
+al día en vez de recalcularlas.
+
+Las escrituras dentro de un request (JobPostingListCreateAPI.post) no pagan el
+refresco: `schedule_catalog_refresh()` deja el `bump_data_version()` completo para
+después del commit, en un hilo del proceso que agrupa los pedidos seguidos. La
+versión no se toca antes: el índice en memoria (lee JobPosting) y la vista se
+ponen al día juntos, y las cachés se invalidan una sola vez. El comando
+`refresh_catalog` hace lo mismo desde cron, por si el proceso se recicla antes
+de correrlo.
+
+Dentro de un request la versión se lee una sola vez (`current_data_version`, con
+el ContextVar que abre CatalogVersionMiddleware): taxonomía, caché de resultados e
+índice la piden varias veces por mensaje y cada lectura era una consulta.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import ProgrammingError, OperationalError, connections, transaction
+from django.db.models import F
+
+from .models import CatalogVersion
+from .search_view import refresh_search_view
+
+_SINGLETON_ID = 1
+
+# Versión resuelta en el request actual: None fuera de un request, [] si aún no se leyó
+_request_version = ContextVar("catalog_version", default=None)
+
+
+def get_data_version() -> int:
+    """Devuelve la versión actual del catálogo (0 si aún no existe)."""
+    try:
+        version = CatalogVersion.objects.filter(pk=_SINGLETON_ID).values_list("version", flat=True).first()
+    except (ProgrammingError, OperationalError):
+        return 0
+    return version or 0
+
+
+def current_data_version() -> int:
+    """
+    Versión del catálogo para el request en curso: se lee de la BD la primera vez y
+    se reutiliza hasta que termine. Fuera de un request (comandos, hilo de refresco)
+    es `get_data_version()`.
+    """
+    slot = _request_version.get()
+    if slot is None:
+        return get_data_version()
+    if not slot:
+        slot.append(get_data_version())
+    return slot[0]
+
+
+@contextmanager
+def request_data_version():
+    """Abre el contexto de `current_data_version` (ver CatalogVersionMiddleware)."""
+    token = _request_version.set([])
+    try:
+        yield
+    finally:
+        _request_version.reset(token)
+
+
+def bump_data_version() -> int:
+    """
+    Incrementa la versión del catálogo. Llamar después de crear/actualizar empleos
+    para invalidar índices y cachés en todos los procesos.
+    """
+    # Import local: nlp importa catalog (vía taxonomy)
+    from .nlp import build_synonym_table
+    refresh_search_view()
+    # La tabla queda guardada antes de publicar la versión: un proceso que ya ve la
+    # versión nueva no carga la tabla anterior (si otro bump se adelanta, la versión
+    # no coincide y nlp._load_enhanced_synonyms la genera en el proceso)
+    build_synonym_table(get_data_version() + 1)
+    return touch_data_version()
+
+
+def touch_data_version() -> int:
+    """Solo incrementa la versión, sin refrescar la vista ni los sinónimos (ver bump_data_version)."""
+    updated = CatalogVersion.objects.filter(pk=_SINGLETON_ID).update(version=F("version") + 1)
+    if not updated:
+        CatalogVersion.objects.get_or_create(pk=_SINGLETON_ID, defaults={"version": 1})
+    version = get_data_version()
+    slot = _request_version.get()
+    if slot is not None:
+        # El resto del request ya ve la versión nueva
+        slot[:] = [version]
+    print(f"🔖 Versión del catálogo actualizada a {version}")
+    return version
+
+
+def catalog_refresh_delay() -> float:
+    return getattr(settings, "CATALOG_REFRESH_DELAY", 5.0)
+
+
+_refresh_pending = threading.Event()
+_refresh_thread = None
+_refresh_lock = threading.Lock()
+
+
+def schedule_catalog_refresh():
+    """
+    Programa `bump_data_version()` (vista + sinónimos + versión) fuera del request: se
+    pide al confirmar la transacción actual y un hilo del proceso lo corre después de
+    CATALOG_REFRESH_DELAY segundos, una vez para todos los pedidos de ese intervalo.
+    """
+    transaction.on_commit(_request_refresh)
+
+
+def _request_refresh():
+    global _refresh_thread
+    with _refresh_lock:
+        _refresh_pending.set()
+        if _refresh_thread is None or not _refresh_thread.is_alive():
+            _refresh_thread = threading.Thread(target=_refresh_worker, name="catalog-refresh", daemon=True)
+            _refresh_thread.start()
+
+
+def _refresh_worker():
+    global _refresh_thread
+    try:
+        while True:
+            time.sleep(catalog_refresh_delay())
+            _refresh_pending.clear()
+            try:
+                bump_data_version()
+            except Exception as e:
+                # Queda para el próximo pedido o para refresh_catalog
+                print(f"❌ Error refrescando el catálogo: {e}")
+            # Se revisa con el lock tomado: un pedido que llegue después ya no ve este
+            # hilo y arranca otro, y uno que llegó antes se atiende en otra vuelta
+            with _refresh_lock:
+                if not _refresh_pending.is_set():
+                    _refresh_thread = None
+                    return
+    finally:
+        # El hilo usa sus propias conexiones
+        connections.close_all()
@@ -1,46 +1,125 @@
+import re
+from datetime import date
 from typing import Tuple, List, Dict
-from .models import JobPosting
-from django.db.models import Q
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from .cards import JobCard, card_columns, fetch_cards, fetch_cards_by_id
+from .index import get_job_index
+from .tracing import current_trace, span, traced_span, tracing
+from .models import JobPosting, JobSearch, random_shuffle_key
+from .normalize import (
+    COMUNA_REGION, fold_text, is_junk_location, location_tokens, norm_text, region_for, salary_floor_clp, seniority_years_range,
+)
+from .result_cache import freeze, results_cache, search_signature
+from .scoring import ScorePlan
+from .search_view import adapt_q, search_view_enabled, view_field
+from django.db.models import Count, F, FloatField, Q, Window
+from django.db.models.functions import Cast
 
-def _seniority_to_experience_range(seniority: str):
+def _experience_years_q(field: str, years) -> Q:
+    """Rango de años (mínimo, máximo inclusive; máximo None = sin tope)."""
+    low, high = years
+    if high is None:
+        return Q(**{f"{field}__gte": low})
+    return Q(**{f"{field}__range": (low, high)})
+
+def _location_q(value: str):
     """
-    Convierte un seniority a rango de años de experiencia.
+    Condición sobre la ubicación normalizada: todas las palabras de `value` en
+    Location.tokens y, si `value` nombra una región (p.ej. "RM", "Biobío"), también
+    las ubicaciones de esa región. None si `value` no tiene palabras útiles.
     """
-    seniority_lower = seniority.lower().strip()
-    
-    if seniority_lower in ['junior', 'jr']:
-        return [0, 1, 2]  # 0-2 años
-    elif seniority_lower in ['semi', 'ssr', 'semi-senior', 'semisenior']:
-        return [2, 3, 4, 5]  # 2-5 años
-    elif seniority_lower in ['senior', 'sr']:
-        return [5, 6, 7, 8, 9, 10]  # 5+ años
-    else:
-        return []
+    q = Q()
+    tokens = location_tokens(value)
+    if tokens:
+        q |= Q(location__tokens__contains=tokens)
+    region = region_for(value)
+    if region and fold_text(value) not in COMUNA_REGION:
+        q |= Q(location__region=region)
+    return q or None
 
-def _apply(queryset, include:dict, exclude:dict, salary_min:int|None, currency:str|None):
-    qs = queryset
-    
-    print(f"\n🔧 _APPLY - Aplicando filtros")
-    print(f"   - Queryset inicial: {qs.count()} empleos")
-    
+# Configuración de texto completo de JobPosting.search_vector (ver migración 0010)
+ROLE_SEARCH_CONFIG = "spanish"
+
+def _role_search_text(values) -> str:
+    """
+    Cargos en sintaxis de websearch_to_tsquery: cada cargo como frase, unidos con "or".
+    ("Desarrollador Web", "Asistente") → '"Desarrollador Web" or "Asistente"'
+    """
+    phrases = []
+    for v in values:
+        words = re.sub(r'["\-]', ' ', str(v)).split()
+        if words:
+            phrases.append('"' + " ".join(words) + '"')
+    return " or ".join(phrases)
+
+def _role_query(values):
+    """SearchQuery con todos los cargos, o None si no queda texto."""
+    text = _role_search_text(values or [])
+    if not text:
+        return None
+    return SearchQuery(text, config=ROLE_SEARCH_CONFIG, search_type="websearch")
+
+def _role_q(values) -> Q:
+    """
+    Una sola condición `search_vector @@ websearch_to_tsquery(...)` para todos los cargos
+    (un probe al índice GIN en vez de un OR de `title__icontains`).
+    """
+    query = _role_query(values)
+    if query is None:
+        return Q()
+    print(f"      ⏺️  Condición: search_vector @@ websearch_to_tsquery('{ROLE_SEARCH_CONFIG}', '{_role_search_text(values)}')")
+    return Q(search_vector=query)
+
+def _facet_values(field: str) -> list:
+    """Valores distintos de una columna normalizada (`*_norm`): del índice en memoria, o de la BD por versión del catálogo."""
+    if _index_enabled():
+        return [value for value in get_job_index().columns[field].values if value is not None]
+    key = ("facet_values", field)
+    values = results_cache.get(key)
+    if values is None:
+        values = list(JobPosting.objects.filter(**{f"{field}__isnull": False}).order_by().values_list(field, flat=True).distinct())
+        results_cache.set(key, values)
+    return values
+
+def _norm_contains_q(field: str, value) -> Q:
+    """
+    `field` (columna normalizada) contiene `value` normalizado, resuelto como
+    `field IN (valores que lo contienen)`: igualdad servida por el b-tree en vez de LIKE '%...%'.
+    Un valor que normalizado queda vacío (solo símbolos) no coincide con nada.
+    """
+    needle = norm_text(value)
+    if not needle:
+        return Q(**{f"{field}__in": []})
+    return Q(**{f"{field}__in": sorted(v for v in _facet_values(field) if needle in v)})
+
+# Slots que solo tienen sentido en include
+EXCLUDE_UNSUPPORTED = ("salary",)
+
+def _build_conditions(include:dict, exclude:dict):
+    """
+    Traduce los slots include/exclude a condiciones `Q` sobre JobPosting.
+    Genera tuplas (kind, attr, q) con kind = "include" | "exclude"; las usan
+    tanto `_apply` (SQL) como el índice en memoria (ver index.py).
+    """
     # Mapeo de campos del modelo Job a JobPosting
     # IMPORTANTE: En el frontend:
     #   - "industria" → campo `area` en BD (ej: "Tecnología", "Servicios Generales")
     #   - "área funcional" → campo `subarea` en BD (ej: "Desarrollo de Software", "Contabilidad y Tesorería")
     field_mapping = {
-        'industry': 'area',        # Industry se mapea a area (ej: "Tecnología" → area="Tecnología")
-        'area': 'subarea',         # Area funcional se mapea a subarea (ej: "Desarrollo de Software" → subarea="Desarrollo de Software")
-        'role': 'title',           # Mapear role a title
-        'seniority': 'min_experience',  # Mapear seniority a min_experience
-        'modality': 'work_modality',
+        'industry': 'area_norm',   # Industry se mapea a area (ej: "Tecnología" → area_norm="tecnologia")
+        'area': 'subarea_norm',    # Area funcional se mapea a subarea (ej: "Desarrollo de Software" → subarea_norm="desarrollo de software")
+        'role': 'search_vector',   # Texto completo sobre título + subárea (ver _role_q)
+        'seniority': 'min_experience_years',  # Años mínimos parseados al guardar (ver normalize.py)
+        'modality': 'modality_norm',
         'location': 'location__raw_text',
-        'currency': 'salary_text',  # Para salario usaremos salary_text
+        'salary': 'salary_max_clp',  # Sueldo mínimo pedido en CLP (ver _with_salary)
         'accessibility': 'accessibility_mentioned',
         'transport': 'transport_mentioned',
     }
     
-    # salario - por ahora no aplicamos filtro de salario ya que JobPosting usa salary_text
-    # TODO: Implementar parsing de salary_text para extraer valores numéricos
+    # salario: `_with_salary` lo agrega a include como slot "salary" (CLP mensuales);
+    # se compara con los montos parseados de salary_text al guardar (normalize.parse_salary)
     
     # incluye (AND entre atributos, OR entre valores)
     # Pero primero, verificar si tenemos tanto industry como area para manejarlos de forma especial
@@ -56,105 +135,57 @@ def _apply(queryset, include:dict, exclude:dict, salary_min:int|None, currency:s
             
             for v in values:
                 if attr == 'role':
-                    # Para role, buscar en el título
-                    q |= Q(**{f"{mapped_field}__icontains": v})
-                    print(f"      ⏺️  Condición: {mapped_field}__icontains='{v}'")
+                    # Todos los cargos van en una sola consulta de texto completo (ver abajo)
+                    continue
                 elif attr == 'seniority':
-                    # Para seniority, convertir a rango numérico de experiencia
-                    experience_years = _seniority_to_experience_range(v)
-                    if experience_years:
-                        # Buscar empleos con esos años de experiencia
-                        # Buscar tanto números solos como con "años" (singular y plural)
-                        experience_q = Q()
-                        for years in experience_years:
-                            # Buscar el número solo
-                            experience_q |= Q(**{f"{mapped_field}__icontains": str(years)})
-                            # Buscar con "año" (singular)
-                            experience_q |= Q(**{f"{mapped_field}__icontains": f"{years} año"})
-                            # Buscar con "años" (plural)
-                            experience_q |= Q(**{f"{mapped_field}__icontains": f"{years} años"})
-                            # Para Junior (0-2), también buscar "junior", "jr", "entry", etc.
-                            if years <= 2 and v.lower() in ['junior', 'jr']:
-                                experience_q |= Q(**{f"{mapped_field}__icontains": "junior"})
-                                experience_q |= Q(**{f"{mapped_field}__icontains": "jr"})
-                                experience_q |= Q(**{f"{mapped_field}__icontains": "entry"})
-                                experience_q |= Q(**{f"{mapped_field}__icontains": "trainee"})
-                        q |= experience_q
-                        print(f"      ⏺️  Condición: {mapped_field} contiene [{', '.join(map(str, experience_years))}] años o '{v}'")
+                    # Para seniority, un solo predicado de rango sobre los años parseados
+                    years = seniority_years_range(v)
+                    if years:
+                        q |= _experience_years_q(mapped_field, years)
+                        print(f"      ⏺️  Condición: {mapped_field} entre {years[0]} y {years[1] if years[1] is not None else '∞'} años")
                     else:
-                        # Fallback: búsqueda por texto (junior, semi, senior)
-                        q |= Q(**{f"{mapped_field}__icontains": v})
-                        print(f"      ⏺️  Condición fallback: {mapped_field}__icontains='{v}'")
-                elif attr == 'industry':
-                    # Industry se busca en area - usar exact match primero, luego icontains como fallback
-                    exact_q = Q(**{f"area__iexact": v})
-                    contains_q = Q(**{f"area__icontains": v})
-                    # Intentar exacto primero, pero también incluir contains para casos edge
-                    combined_q = exact_q | contains_q
-                    q |= combined_q
-                    print(f"      ⏺️  Condición: area__iexact='{v}' O area__icontains='{v}'")
-                elif attr == 'area':
-                    # Para área funcional, buscar en subarea (NO en area, que es para industria)
-                    # Usar exact match primero, luego contains como fallback
-                    subarea_exact_q = Q(**{"subarea__iexact": v})
-                    subarea_contains_q = Q(**{"subarea__icontains": v})
-                    # Priorizar exact match, pero permitir contains como fallback
-                    combined_q = subarea_exact_q | (subarea_contains_q & ~subarea_exact_q)
-                    q |= combined_q
-                    print(f"      ⏺️  Condición: subarea__iexact='{v}' O (subarea__icontains='{v}' sin exact)")
+                        # Fallback: búsqueda por texto (junior, semi, senior), con índice trigram si hay pg_trgm (migración 0015)
+                        q |= Q(min_experience__icontains=v)
+                        print(f"      ⏺️  Condición fallback: min_experience__icontains='{v}'")
+                elif attr in ('industry', 'area'):
+                    # Industria en area, área funcional en subarea (NO en area): el valor exacto
+                    # o los que lo contienen ("Servicios" → "Servicios Generales"), como IN
+                    q |= _norm_contains_q(mapped_field, v)
+                    print(f"      ⏺️  Condición: {mapped_field} contiene '{norm_text(v)}'")
                 elif attr == 'modality':
-                    # Para modalidad, usar búsqueda insensible a mayúsculas
-                    q |= Q(**{f"{mapped_field}__iexact": v})
-                    print(f"      ⏺️  Condición: {mapped_field}__iexact='{v}'")
+                    # Para modalidad, igualdad sobre la columna normalizada (sin mayúsculas ni tildes)
+                    q |= Q(**{mapped_field: norm_text(v)})
+                    print(f"      ⏺️  Condición: {mapped_field}='{norm_text(v)}'")
                 elif attr == 'location':
-                    # Para ubicación, usar palabras clave individuales porque puede haber variaciones
-                    # (ej: "Santiago, RM" vs "Santiago, Región Metropolitana" vs "Santiago de Chile")
-                    # También excluir ubicaciones inválidas (mensajes de error)
-                    invalid_locations = ["necesitamos tu autorización", "autorización", "configuración", "privacidad", "navegador"]
-                    location_lower = str(v).lower()
-                    
-                    # Si la ubicación buscada contiene palabras inválidas, no filtrar por ubicación
-                    if any(invalid in location_lower for invalid in invalid_locations):
+                    # Ubicación normalizada al importar (ver normalize.parse_location):
+                    # contención de palabras sobre Location.tokens (GIN) o igualdad de región.
+                    # Las ubicaciones basura (mensajes del portal) quedan marcadas con is_junk.
+                    if is_junk_location(v):
                         print(f"      ⚠️  Ubicación parece inválida, omitiendo filtro: '{v}'")
                     else:
                         # Verificar si hay filtro de modalidad remota - si es remoto, la ubicación es menos importante
                         is_remote = 'modality' in include and any('remoto' in str(m).lower() for m in include.get('modality', []))
-                        
-                        # Extraer palabras clave relevantes (excluir palabras comunes y signos de puntuación)
-                        import re
-                        # Remover signos de puntuación y dividir
-                        location_clean = re.sub(r'[,\-\.;:]', ' ', location_lower)
-                        common_words = ["de", "la", "el", "y", "región", "region", "comuna", "provincia", "del", "las", "los"]
-                        keywords = [word.strip() for word in location_clean.split() 
-                                   if word.strip() not in common_words and len(word.strip()) > 2]
-                        
-                        if keywords:
-                            location_q = Q()
-                            # Primero intentar con todas las palabras (más específico)
-                            all_keywords_q = Q()
-                            for keyword in keywords:
-                                all_keywords_q &= Q(**{f"{mapped_field}__icontains": keyword})
-                            
-                            # Excluir ubicaciones inválidas
-                            invalid_q = Q()
-                            for invalid in invalid_locations:
-                                invalid_q |= Q(**{f"{mapped_field}__icontains": invalid})
-                            
-                            # Si es remoto, también incluir empleos con ubicación inválida (son remotos de todos modos)
-                            if is_remote:
-                                # Para remoto: buscar que tenga la ubicación O que tenga ubicación inválida
-                                location_q = all_keywords_q | invalid_q
-                                print(f"      ⏺️  Condición (REMOTO): {mapped_field} contiene todas las palabras clave {keywords} O ubicación inválida")
-                            else:
-                                # Para presencial/híbrido: solo buscar ubicación válida que contenga las palabras clave
-                                location_q = all_keywords_q & ~invalid_q
-                                print(f"      ⏺️  Condición (PRESENCIAL/HÍBRIDO): {mapped_field} contiene todas las palabras clave {keywords} Y no es inválida")
-                            
-                            q |= location_q
-                        else:
+                        location_q = _location_q(v)
+                        if location_q is None:
                             # Si no hay palabras clave, buscar la cadena completa
-                            q |= Q(**{f"{mapped_field}__icontains": v})
-                            print(f"      ⏺️  Condición: {mapped_field}__icontains='{v}'")
+                            q |= _norm_contains_q('location__raw_text_norm', v)
+                            print(f"      ⏺️  Condición: location__raw_text_norm contiene '{norm_text(v)}'")
+                        elif is_remote:
+                            # Para remoto: la ubicación pedida O una ubicación inválida (son remotos de todos modos)
+                            q |= location_q | Q(location__is_junk=True)
+                            print(f"      ⏺️  Condición (REMOTO): {location_q} O location__is_junk=True")
+                        else:
+                            # Las ubicaciones inválidas no tienen tokens ni región: nunca coinciden
+                            q |= location_q
+                            print(f"      ⏺️  Condición (PRESENCIAL/HÍBRIDO): {location_q}")
+                elif attr == 'salary':
+                    # El aviso llega al sueldo pedido: su máximo, o su mínimo si solo informa
+                    # "desde X" (COALESCE(max, min) >= v); o no informa sueldo ("a convenir")
+                    q |= Q(**{f"{mapped_field}__gte": v}) | (
+                        Q(**{f"{mapped_field}__isnull": True})
+                        & (Q(salary_min_clp__gte=v) | Q(salary_min_clp__isnull=True))
+                    )
+                    print(f"      ⏺️  Condición: COALESCE({mapped_field}, salary_min_clp) >= {v} O sin sueldo informado")
                 elif attr in ['accessibility', 'transport']:
                     # Para accesibilidad y transporte, usar búsqueda booleana
                     if v is True:
@@ -163,20 +194,19 @@ def _apply(queryset, include:dict, exclude:dict, salary_min:int|None, currency:s
                     else:
                         q |= Q(**{mapped_field: False})
                         print(f"      ⏺️  Condición: {mapped_field}=False")
-                else:
-                    q |= Q(**{f"{mapped_field}__iexact": v})
-                    print(f"      ⏺️  Condición: {mapped_field}__iexact='{v}'")
             
-            qs_before = qs.count()
-            qs = qs.filter(q)
-            qs_after = qs.count()
-            print(f"      📊 Después de filtrar: {qs_before} → {qs_after} empleos")
+            if attr == 'role':
+                q = _role_q(values)
+            yield "include", attr, q
         else:
             print(f"   ⚠️  Campo no mapeado: {attr}")
     
     # excluye
     for attr, values in exclude.items():
-        if attr in field_mapping:
+        if attr in EXCLUDE_UNSUPPORTED:
+            # El sueldo es un mínimo (salary_min), no algo que se pueda excluir
+            print(f"   ⚠️  No se puede excluir por {attr}, se ignora: {values}")
+        elif attr in field_mapping:
             mapped_field = field_mapping[attr]
             q = Q()
             print(f"\n   🚫 Aplicando EXCLUDE: {attr} = {values}")
@@ -184,67 +214,35 @@ def _apply(queryset, include:dict, exclude:dict, salary_min:int|None, currency:s
             
             for v in values:
                 if attr == 'role':
-                    q |= Q(**{f"{mapped_field}__icontains": v})
-                    print(f"      ⏺️  Condición: {mapped_field}__icontains='{v}'")
+                    continue
                 elif attr == 'seniority':
-                    # Para seniority, convertir a rango numérico de experiencia
-                    experience_years = _seniority_to_experience_range(v)
-                    if experience_years:
-                        # Excluir empleos con esos años de experiencia
-                        experience_q = Q()
-                        for years in experience_years:
-                            experience_q |= Q(**{f"{mapped_field}__icontains": str(years)})
-                        q |= experience_q
-                        print(f"      ⏺️  Condición: {mapped_field} en [{', '.join(map(str, experience_years))}] años")
+                    # Para seniority, un solo predicado de rango sobre los años parseados
+                    years = seniority_years_range(v)
+                    if years:
+                        q |= _experience_years_q(mapped_field, years)
+                        print(f"      ⏺️  Condición: {mapped_field} entre {years[0]} y {years[1] if years[1] is not None else '∞'} años")
                     else:
                         # Fallback: búsqueda por texto
-                        q |= Q(**{f"{mapped_field}__icontains": v})
-                        print(f"      ⏺️  Condición fallback: {mapped_field}__icontains='{v}'")
-                elif attr == 'industry':
-                    # Industry se busca en area - usar exact match primero, luego icontains como fallback
-                    exact_q = Q(**{f"area__iexact": v})
-                    contains_q = Q(**{f"area__icontains": v})
-                    # Intentar exacto primero, pero también incluir contains para casos edge
-                    combined_q = exact_q | contains_q
-                    q |= combined_q
-                    print(f"      ⏺️  Condición: area__iexact='{v}' O area__icontains='{v}'")
-                elif attr == 'area':
-                    # Para área funcional, buscar en subarea (NO en area, que es para industria)
-                    # Usar exact match primero, luego contains como fallback
-                    subarea_exact_q = Q(**{"subarea__iexact": v})
-                    subarea_contains_q = Q(**{"subarea__icontains": v})
-                    # Priorizar exact match, pero permitir contains como fallback
-                    combined_q = subarea_exact_q | (subarea_contains_q & ~subarea_exact_q)
-                    q |= combined_q
-                    print(f"      ⏺️  Condición: subarea__iexact='{v}' O (subarea__icontains='{v}' sin exact)")
+                        q |= Q(min_experience__icontains=v)
+                        print(f"      ⏺️  Condición fallback: min_experience__icontains='{v}'")
+                elif attr in ('industry', 'area'):
+                    q |= _norm_contains_q(mapped_field, v)
+                    print(f"      ⏺️  Condición: {mapped_field} contiene '{norm_text(v)}'")
                 elif attr == 'modality':
-                    q |= Q(**{f"{mapped_field}__iexact": v})
-                    print(f"      ⏺️  Condición: {mapped_field}__iexact='{v}'")
+                    q |= Q(**{mapped_field: norm_text(v)})
+                    print(f"      ⏺️  Condición: {mapped_field}='{norm_text(v)}'")
                 elif attr == 'location':
-                    # Para ubicación en EXCLUDE, usar palabras clave individuales
-                    invalid_locations = ["necesitamos tu autorización", "autorización", "configuración", "privacidad", "navegador"]
-                    location_lower = str(v).lower()
-                    if any(invalid in location_lower for invalid in invalid_locations):
+                    # Para ubicación en EXCLUDE, mismas reglas que en include
+                    if is_junk_location(v):
                         print(f"      ⚠️  Ubicación parece inválida, omitiendo filtro: '{v}'")
                     else:
-                        # Extraer palabras clave relevantes (excluir palabras comunes y signos de puntuación)
-                        import re
-                        # Remover signos de puntuación y dividir
-                        location_clean = re.sub(r'[,\-\.;:]', ' ', location_lower)
-                        common_words = ["de", "la", "el", "y", "región", "region", "comuna", "provincia", "del", "las", "los"]
-                        keywords = [word.strip() for word in location_clean.split() 
-                                   if word.strip() not in common_words and len(word.strip()) > 2]
-                        
-                        if keywords:
-                            # Excluir si contiene TODAS las palabras clave
-                            location_q = Q()
-                            for keyword in keywords:
-                                location_q &= Q(**{f"{mapped_field}__icontains": keyword})
-                            q |= location_q
-                            print(f"      ⏺️  Condición EXCLUDE: {mapped_field} contiene todas las palabras clave: {keywords}")
+                        location_q = _location_q(v)
+                        if location_q is None:
+                            q |= _norm_contains_q('location__raw_text_norm', v)
+                            print(f"      ⏺️  Condición EXCLUDE: location__raw_text_norm contiene '{norm_text(v)}'")
                         else:
-                            q |= Q(**{f"{mapped_field}__icontains": v})
-                            print(f"      ⏺️  Condición EXCLUDE: {mapped_field}__icontains='{v}'")
+                            q |= location_q
+                            print(f"      ⏺️  Condición EXCLUDE: {location_q}")
                 elif attr in ['accessibility', 'transport']:
                     # Para accesibilidad y transporte, usar búsqueda booleana
                     if v is True:
@@ -253,22 +251,280 @@ def _apply(queryset, include:dict, exclude:dict, salary_min:int|None, currency:s
                     else:
                         q |= Q(**{mapped_field: False})
                         print(f"      ⏺️  Condición: {mapped_field}=False")
-                else:
-                    q |= Q(**{f"{mapped_field}__iexact": v})
-                    print(f"      ⏺️  Condición: {mapped_field}__iexact='{v}'")
             
-            qs_before = qs.count()
-            qs = qs.exclude(q)
-            qs_after = qs.count()
-            print(f"      📊 Después de excluir: {qs_before} → {qs_after} empleos")
+            if attr == 'role':
+                q = _role_q(values)
+            yield "exclude", attr, q
         else:
             print(f"   ⚠️  Campo no mapeado: {attr}")
+
+def _with_salary(include:dict, salary_min:int|None, currency:str|None) -> dict:
+    """
+    Agrega el sueldo detectado por parse_prompt como slot "salary" (CLP mensuales),
+    para que se filtre, se relaje y se puntúe como los demás. Si el número no
+    parece un sueldo (p.ej. "2" de "2 años"), se ignora.
+    """
+    floor = salary_floor_clp(salary_min, currency)
+    if floor is None or "salary" in include:
+        return include
+    return {**include, "salary": [floor]}
+
+def _search_base():
+    """
+    Queryset base de las búsquedas: la vista materializada de búsqueda (ver search_view.py),
+    o JobPosting con sus joins si está desactivada (SEARCH_VIEW_ENABLED).
+    """
+    if search_view_enabled():
+        return JobSearch.objects.all()
+    return JobPosting.objects.select_related('company', 'location').all()
+
+def _apply(queryset, include:dict, exclude:dict, salary_min:int|None, currency:str|None):
+    qs = queryset
+    # Las cardinalidades por filtro cuestan un count() cada una: solo con traza activa
+    trace = current_trace()
+    
+    print(f"\n🔧 _APPLY - Aplicando filtros")
+    if trace:
+        print(f"   - Queryset inicial: {trace.count('initial', qs)} empleos")
+    
+    for kind, attr, q in _build_conditions(include, exclude):
+        q = adapt_q(q, qs)
+        qs = qs.filter(q) if kind == "include" else qs.exclude(q)
+        if trace:
+            qs_after = trace.count(f"{kind}.{attr}", qs)
+            verb = "filtrar" if kind == "include" else "excluir"
+            print(f"      📊 Después de {verb}: {qs_after} empleos")
     
-    final_count = qs.count()
-    print(f"\n   ✅ Resultado final de _APPLY: {final_count} empleos")
     return qs
 
-def decide_jobs(include:dict, exclude:dict, salary_min:int|None, currency:str|None, topn:int=3, offset:int=0, variety:bool=False):
+def _index_enabled() -> bool:
+    return getattr(settings, "JOB_INDEX_ENABLED", True)
+
+def _run_search(base, include:dict, exclude:dict, salary_min:int|None, currency:str|None, count:bool=True):
+    """
+    Aplica los filtros y devuelve (queryset, total, matches).
+    
+    Con el índice en memoria activo (JOB_INDEX_ENABLED), los filtros se evalúan
+    como bitmaps: `matches` trae los IDs que cumplen y `queryset` es la base sin
+    filtrar, de la que solo se hidrata la página pedida (ver `_get_varied_results`).
+    Sin índice se usa `_apply` (SQL) y `matches` es None; con count=False el total
+    queda en None y lo calcula `_get_varied_results` junto con la página.
+    """
+    with span("engine.search"):
+        if not _index_enabled():
+            qs = _apply(base, include, exclude, salary_min, currency)
+            total, matches = (qs.count() if count else None), None
+        else:
+            print(f"\n🔧 _APPLY (índice en memoria) - Aplicando filtros")
+            index = get_job_index()
+            matches = index.match((kind, q) for kind, _, q in _build_conditions(include, exclude))
+            qs, total = base, matches.count
+    
+    if total is not None:
+        print(f"\n   ✅ Resultado final de _APPLY: {total} empleos")
+    trace = current_trace()
+    if trace:
+        trace.record("search", engine="sql" if matches is None else "index", include=include, exclude=exclude, results=total)
+    return qs, total, matches
+
+def _filter_conditions(include:dict, exclude:dict):
+    """Condiciones (kind, q) de `_build_conditions`, sin los Q() vacíos."""
+    return [(kind, q) for kind, _, q in _build_conditions(include, exclude) if q]
+
+def _conditions_q(conditions) -> Q:
+    """Combina condiciones (kind, q) en un solo Q: includes AND NOT excludes."""
+    combined = Q()
+    for kind, q in conditions:
+        combined &= q if kind == "include" else ~q
+    return combined
+
+def _plan_relaxation(include:dict, exclude:dict, relax_order, critical_filters):
+    """
+    Arma la secuencia de pasos de relajación de `decide_jobs` sin consultar la BD.
+    Cada paso quita un filtro más (acumulativo) siguiendo `relax_order`; los filtros
+    críticos solo se quitan después de haber quitado todos los demás.
+    
+    Returns:
+        lista de dicts con removed, include, exclude, relaxed y conditions
+    """
+    inc_cur = {k:list(v) for k,v in include.items()}
+    exc_cur = {k:list(v) for k,v in exclude.items()}
+    relaxed_filters = []
+    candidates = []
+    
+    # Si tenemos industry o area, intentar mantenerlos siempre
+    has_industry_or_area = "industry" in inc_cur or "area" in inc_cur
+    non_critical_total = len([f for _, f in relax_order if f not in critical_filters])
+    
+    for kind, field in relax_order:
+        # Si es un filtro crítico (industry/area), primero relajar todos los demás
+        if field in critical_filters and has_industry_or_area:
+            non_critical_relaxed = [f for f in relaxed_filters if f not in critical_filters]
+            if len(non_critical_relaxed) < non_critical_total:
+                print(f"   ⏭️  Saltando filtro crítico '{field}' - intentando otros filtros primero")
+                continue
+        
+        if kind == "exclude" and field in exc_cur:
+            exc_cur.pop(field, None)
+        elif kind == "include" and field in inc_cur:
+            inc_cur.pop(field, None)
+        else:
+            continue
+        relaxed_filters.append(field)
+        
+        step_include = {k:list(v) for k,v in inc_cur.items()}
+        step_exclude = {k:list(v) for k,v in exc_cur.items()}
+        candidates.append({
+            "removed": (kind, field),
+            "include": step_include,
+            "exclude": step_exclude,
+            "relaxed": list(relaxed_filters),
+            "conditions": _filter_conditions(step_include, step_exclude),
+        })
+    return candidates
+
+def _count_conditions(base, condition_sets) -> List[int]:
+    """
+    Cuenta los resultados de varios conjuntos de condiciones en una sola pasada
+    (una consulta con COUNT(*) FILTER por conjunto, o popcounts del índice).
+    """
+    if not condition_sets:
+        return []
+    with span("engine.count_conditions"):
+        if _index_enabled():
+            index = get_job_index()
+            counts = [index.filter_bits(conditions).bit_count() for conditions in condition_sets]
+        else:
+            aggregates = {}
+            for i, conditions in enumerate(condition_sets):
+                q = adapt_q(_conditions_q(conditions), base)
+                aggregates[f"set_{i}"] = Count("id", filter=q) if q else Count("id")
+            totals = base.aggregate(**aggregates)
+            counts = [totals[f"set_{i}"] for i in range(len(condition_sets))]
+    
+    trace = current_trace()
+    if trace:
+        trace.record("count_conditions", results=counts)
+    return counts
+
+def _select_conditions(base, conditions):
+    """(queryset, matches) para un conjunto de condiciones, como los devuelve `_run_search`."""
+    if _index_enabled():
+        return base, get_job_index().match(conditions)
+    return base.filter(adapt_q(_conditions_q(conditions), base)), None
+
+# Slot → columna agrupable para conteos por faceta (nombres de JobPosting, como en el índice)
+FACET_FIELDS = {
+    'industry': 'area_norm',
+    'area': 'subarea_norm',
+    'modality': 'modality_norm',
+    'seniority': 'min_experience_years',
+    'location': 'location__raw_text_norm',
+    'accessibility': 'accessibility_mentioned',
+    'transport': 'transport_mentioned',
+}
+
+def facet_counts(include: dict, exclude: dict, slot: str, base=None) -> Dict:
+    """
+    Cuenta empleos por valor de la columna del slot (GROUP BY), manteniendo fijos
+    los demás filtros de include/exclude. El propio slot se ignora en include.
+    
+    Returns:
+        {valor_en_bd: cantidad} (solo valores con empleos)
+    """
+    if base is None:
+        base = _search_base()
+    field = FACET_FIELDS[slot]
+    fixed_include = {k: list(v) for k, v in include.items() if k != slot}
+    conditions = _filter_conditions(fixed_include, exclude)
+    
+    if _index_enabled():
+        # El índice guarda sus columnas con los nombres de JobPosting
+        index = get_job_index()
+        return index.facet(field, index.filter_bits(conditions))
+    
+    if base.model is JobSearch:
+        field = view_field(field)
+    rows = (
+        base.filter(adapt_q(_conditions_q(conditions), base))
+        .order_by()
+        .values_list(field)
+        .annotate(n=Count('id'))
+    )
+    return {value: n for value, n in rows}
+
+# Opciones con conteo de /api/facets; las etiquetas son las que ofrece el chat
+FACET_SLOTS = ("industry", "area", "modality", "seniority", "location", "accessibility", "transport")
+
+def facet_choices() -> Dict[str, list]:
+    """Etiquetas de cada faceta (las mismas listas que usa el chat, ver nlp.get_current_*)."""
+    from .nlp import get_current_areas, get_current_industries, get_current_locations, get_current_modalities, get_current_seniorities
+    return {
+        "industry": get_current_industries(),
+        "area": get_current_areas(),
+        "modality": get_current_modalities(),
+        "seniority": get_current_seniorities() or ["Junior", "Semi", "Senior"],
+        "location": get_current_locations(),
+        "accessibility": [True],
+        "transport": [True],
+    }
+
+def search_facets(include: dict, exclude: dict, salary_min: int = None, currency: str = None, choices: Dict[str, list] = None) -> Dict:
+    """
+    Conteo de empleos por cada opción de cada faceta, con los DEMÁS filtros activos
+    fijos (el filtro de la propia faceta se reemplaza por la opción). Usa la misma
+    semántica que `decide_jobs` (`_build_conditions`) y se resuelve en una sola
+    pasada con `_count_conditions`: una consulta con COUNT(*) FILTER por opción,
+    o popcounts del índice en memoria.
+    
+    Returns:
+        {"facets": {slot: {etiqueta: cantidad}}, "total_jobs": empleos con todos los filtros}
+    """
+    include = _with_salary(include, salary_min, currency)
+    cache_key = ("search_facets", search_signature(include, exclude, None, None), freeze(choices))
+    cached = results_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    if choices is None:
+        choices = facet_choices()
+    keys, condition_sets = [], []
+    for slot in FACET_SLOTS:
+        others = {k: list(v) for k, v in include.items() if k != slot}
+        for label in choices.get(slot, []):
+            keys.append((slot, label))
+            condition_sets.append(_filter_conditions({**others, slot: [label]}, exclude))
+    condition_sets.append(_filter_conditions(include, exclude))
+    
+    with span("engine.facets"):
+        counts = _count_conditions(_search_base(), condition_sets)
+    
+    facets = {slot: {} for slot in FACET_SLOTS}
+    for (slot, label), n in zip(keys, counts):
+        facets[slot][str(label).lower() if isinstance(label, bool) else label] = n
+    result = {"facets": facets, "total_jobs": counts[-1]}
+    results_cache.set(cache_key, result)
+    return result
+
+def _label_counts(value_counts: Dict, labels, exact: bool = False) -> Dict[str, int]:
+    """
+    Lleva los conteos por valor en BD a las etiquetas que se ofrecen al usuario,
+    con la misma semántica que `_build_conditions` sobre las columnas `*_norm`
+    (contiene, o igualdad si exact=True).
+    """
+    out = {}
+    for label in labels:
+        needle = norm_text(label)
+        total = 0
+        for value, n in value_counts.items():
+            if value is None:
+                continue
+            if (value == needle) if exact else (needle in value):
+                total += n
+        out[label] = total
+    return out
+
+def decide_jobs(include:dict, exclude:dict, salary_min:int|None, currency:str|None, topn:int=3, offset:int=0, variety:bool=False, trace:bool|None=None, cursor:dict|None=None, ranking:str|None=None):
     """
     Intenta con reglas completas → si no hay resultados, RELAJA solo filtros menos críticos.
     NO relaja industry o area si eso haría que los resultados sean irrelevantes.
@@ -279,15 +535,71 @@ def decide_jobs(include:dict, exclude:dict, salary_min:int|None, currency:str|No
         salary_min: Salario mínimo
         currency: Moneda
         topn: Número de resultados a devolver
-        offset: Desplazamiento para paginación
+        offset: Desplazamiento para paginación (se ignora si viene `cursor`)
         variety: Si True, intenta maximizar la variedad de resultados
+        cursor: Cursor keyset devuelto en metadata["next_cursor"] de la página anterior;
+                la página siguiente se lee con `id > cursor["id"]` en vez de OFFSET.
+                En modo variedad lleva además la semilla del orden barajado
+                (ver `variety_cursor`); sin cursor se usa una semilla aleatoria.
+                Con filtro de cargo (role) el orden es por relevancia (ts_rank, id)
+        trace: True/False fuerza la traza de la búsqueda; None usa el contexto
+               del request o SEARCH_TRACE_SAMPLE_RATE (ver tracing.py)
+        ranking: "relax" (estricto → relajación) o "score" (puntaje por filtros cumplidos
+                 + frescura, ver scoring.py); None usa settings.SEARCH_RANKING.
+                 El modo variedad siempre usa "relax"
     
     Returns:
         (results, steps, metadata) donde metadata contiene:
         - has_relevant_results: bool - Si los resultados son relevantes a los filtros originales
         - relaxed_filters: list - Lista de filtros que se relajaron
         - original_filters: dict - Filtros originales
+        - next_cursor: dict|None - Cursor para pedir la página siguiente
+        - total_count: int - Total de empleos del conjunto del que sale la página
+          (el estricto o el relajado); ver `pagination_info`
     """
+    scored = not variety and (ranking or getattr(settings, "SEARCH_RANKING", "relax")) == "score"
+    # El cursor tiene que corresponder al orden pedido (por id, por relevancia, por puntaje, o barajado con semilla)
+    expected_order = "score" if scored else _page_order(include, variety)
+    if cursor and cursor.get("order", "id") != expected_order:
+        cursor = None
+    # Variedad sin semilla es aleatoria a propósito: no se cachea
+    cacheable = not (variety and cursor is None)
+    if variety and cursor is None:
+        cursor = variety_cursor()
+    
+    if scored and cursor is None:
+        # La fecha de referencia de la frescura queda fija para todas las páginas
+        cursor = {"order": "score", "as_of": date.today().isoformat()}
+    
+    cache_key = ("decide_jobs", search_signature(include, exclude, salary_min, currency), topn, offset, variety, expected_order, freeze(cursor))
+    
+    with tracing(trace) as active_trace:
+        cached = results_cache.get(cache_key) if cacheable else None
+        if cached is not None:
+            # Se guardan solo los IDs (y extras por resultado): las tarjetas se vuelven a leer (una consulta)
+            ids, extras, steps, metadata = cached
+            results = [card.as_dict() for card in fetch_cards_by_id(_search_base(), ids)]
+            for result, extra in zip(results, extras):
+                result.update(extra)
+            print(f"♻️  DECIDE_JOBS - Resultado desde caché ({len(results)} empleos)")
+            if active_trace:
+                active_trace.record("cache", name="decide_jobs", hit=True)
+        else:
+            with span("engine.decide_jobs"):
+                if scored:
+                    results, steps, metadata = _decide_jobs_scored(include, exclude, salary_min, currency, topn, offset, cursor)
+                else:
+                    results, steps, metadata = _decide_jobs(include, exclude, salary_min, currency, topn, offset, variety, cursor)
+            metadata["next_cursor"] = page_cursor(results, cursor, expected_order, _role_query(include.get("role")))
+            if cacheable:
+                extras = [{k: r[k] for k in _SCORE_KEYS if k in r} for r in results]
+                results_cache.set(cache_key, ([r["id"] for r in results], extras, steps, metadata))
+        if active_trace and active_trace.public:
+            steps.append(("trace", active_trace.as_dict()))
+        return results, steps, metadata
+
+def _decide_jobs(include:dict, exclude:dict, salary_min:int|None, currency:str|None, topn:int, offset:int, variety:bool, cursor:dict|None):
+    """Cuerpo de `decide_jobs` (estricto → relajación)."""
     print("\n" + "="*80)
     print("🔍 DECIDE_JOBS - Iniciando búsqueda de empleos")
     print("="*80)
@@ -297,30 +609,35 @@ def decide_jobs(include:dict, exclude:dict, salary_min:int|None, currency:str|No
     print(f"   - salary_min: {salary_min}, currency: {currency}")
     print(f"   - topn: {topn}, offset: {offset}, variety: {variety}")
     
+    include = _with_salary(include, salary_min, currency)
+    
     # Guardar filtros originales para verificar relevancia
     original_include = {k: list(v) for k, v in include.items()}
     original_exclude = {k: list(v) for k, v in exclude.items()}
     
     steps = []
-    base = JobPosting.objects.select_related('company', 'location').all()
-    total_base = base.count()
-    print(f"📊 Base total de empleos: {total_base}")
+    base = _search_base()
+    trace = current_trace()
+    if trace:
+        print(f"📊 Base total de empleos: {trace.count('base', base)}")
 
-    # 1) intento estricto
-    qs = _apply(base, include, exclude, salary_min, currency)
-    strict_count = qs.count()
+    # 1) intento estricto: en SQL el total sale de la misma consulta de la página
+    # (COUNT(*) OVER ()), sin un count() aparte
+    qs, strict_count, matches = _run_search(base, include, exclude, salary_min, currency, count=False)
+    results, strict_count = _get_varied_results(qs, topn, offset, variety, matches=matches, cursor=cursor,
+                                                rank_query=_role_query(include.get("role")), total_count=strict_count)
     steps.append(("apply", {"include":include, "exclude":exclude, "results": strict_count}))
     print(f"\n✅ INTENTO ESTRICTO:")
     print(f"   - Resultados encontrados: {strict_count}")
     
-    if qs.exists():
-        results = _get_varied_results(qs, topn, offset, variety)
+    if strict_count > 0:
         print(f"   - Resultados finales devueltos: {len(results)}")
         print("="*80)
         metadata = {
             "has_relevant_results": True,
             "relaxed_filters": [],
-            "original_filters": {"include": original_include, "exclude": original_exclude}
+            "original_filters": {"include": original_include, "exclude": original_exclude},
+            "total_count": strict_count,
         }
         return results, steps, metadata
 
@@ -331,6 +648,7 @@ def decide_jobs(include:dict, exclude:dict, salary_min:int|None, currency:str|No
     # Orden de relajación: primero filtros menos críticos
     # Prioridad: transport, accessibility, location, seniority, modality, luego industry/area solo como último recurso
     relax_priority = {
+        "salary": 1,
         "transport": 1,
         "accessibility": 1,
         "location": 2,
@@ -353,47 +671,27 @@ def decide_jobs(include:dict, exclude:dict, salary_min:int|None, currency:str|No
     relax_order.sort(key=lambda x: x[2])
     relax_order = [(kind, field) for kind, field, _ in relax_order]
 
-    inc_cur = {k:list(v) for k,v in include.items()}
-    exc_cur = {k:list(v) for k,v in exclude.items()}
-    relaxed_filters = []
-
     print(f"\n⚠️  INTENTO ESTRICTO FALLÓ - Iniciando relajación de filtros")
     print(f"   - Orden de relajación (prioridad): {[(f, relax_priority.get(f, 9)) for _, f in relax_order]}")
 
-    # Intentar relajar solo filtros menos críticos primero
-    # Si tenemos industry o area, intentar mantenerlos siempre
-    has_industry_or_area = "industry" in inc_cur or "area" in inc_cur
+    # Todos los pasos de relajación se cuentan en una sola pasada
+    # (una consulta con COUNT(*) FILTER, o popcounts del índice en memoria)
+    candidates = _plan_relaxation(include, exclude, relax_order, critical_filters)
+    counts = _count_conditions(base, [c["conditions"] for c in candidates])
+    relaxed_filters = candidates[-1]["relaxed"] if candidates else []
     
-    for kind, field in relax_order:
-        # Si es un filtro crítico (industry/area) y aún no hemos encontrado nada,
-        # primero intentar sin relajar filtros críticos
-        if field in critical_filters and has_industry_or_area:
-            # Intentar relajar todos los demás filtros primero antes de tocar los críticos
-            non_critical_relaxed = [f for f in relaxed_filters if f not in critical_filters]
-            if len(non_critical_relaxed) < len([f for _, f in relax_order if f not in critical_filters]):
-                print(f"   ⏭️  Saltando filtro crítico '{field}' - intentando otros filtros primero")
-                continue
-        
-        if kind == "exclude" and field in exc_cur:
-            exc_cur.pop(field, None)
-            steps.append(("relax", {"removed": ("exclude", field)}))
-            relaxed_filters.append(field)
-            print(f"\n🔄 Relajando: removiendo exclude.{field}")
-        elif kind == "include" and field in inc_cur:
-            inc_cur.pop(field, None)
-            steps.append(("relax", {"removed": ("include", field)}))
-            relaxed_filters.append(field)
-            print(f"\n🔄 Relajando: removiendo include.{field}")
-        else:
-            continue
-
-        qs = _apply(base, inc_cur, exc_cur, salary_min, currency)
-        relaxed_count = qs.count()
+    for candidate, relaxed_count in zip(candidates, counts):
+        kind, field = candidate["removed"]
+        inc_cur, exc_cur = candidate["include"], candidate["exclude"]
+        steps.append(("relax", {"removed": (kind, field)}))
+        print(f"\n🔄 Relajando: removiendo {kind}.{field}")
         steps.append(("apply", {"include":inc_cur, "exclude":exc_cur, "results": relaxed_count}))
         print(f"   - Resultados encontrados: {relaxed_count}")
         
-        if qs.exists():
-            results = _get_varied_results(qs, topn, offset, variety)
+        if relaxed_count > 0:
+            qs, matches = _select_conditions(base, candidate["conditions"])
+            results, _ = _get_varied_results(qs, topn, offset, variety, matches=matches, cursor=cursor,
+                                             rank_query=_role_query(inc_cur.get("role")), total_count=relaxed_count)
             
             # Verificar si los resultados son relevantes (tienen industry/area si los pedimos originalmente)
             is_relevant = True
@@ -419,12 +717,13 @@ def decide_jobs(include:dict, exclude:dict, salary_min:int|None, currency:str|No
                 continue
             
             print(f"   - Resultados finales devueltos: {len(results)}")
-            print(f"   - Filtros relajados: {relaxed_filters}")
+            print(f"   - Filtros relajados: {candidate['relaxed']}")
             print("="*80)
             metadata = {
                 "has_relevant_results": True,
-                "relaxed_filters": relaxed_filters,
-                "original_filters": {"include": original_include, "exclude": original_exclude}
+                "relaxed_filters": candidate["relaxed"],
+                "original_filters": {"include": original_include, "exclude": original_exclude},
+                "total_count": relaxed_count,
             }
             return results, steps, metadata
 
@@ -437,189 +736,283 @@ def decide_jobs(include:dict, exclude:dict, salary_min:int|None, currency:str|No
     metadata = {
         "has_relevant_results": False,
         "relaxed_filters": relaxed_filters,
-        "original_filters": {"include": original_include, "exclude": original_exclude}
+        "original_filters": {"include": original_include, "exclude": original_exclude},
+        "total_count": 0,
     }
     return [], steps, metadata
 
-def _get_varied_results(queryset, topn: int, offset: int, variety: bool = False):
+# Claves que el modo por puntaje agrega a cada resultado
+_SCORE_KEYS = ("score", "matched_filters")
+
+def _decide_jobs_scored(include:dict, exclude:dict, salary_min:int|None, currency:str|None, topn:int, offset:int, cursor:dict|None):
+    """
+    Modo por puntaje de `decide_jobs`: una sola búsqueda ordenada por relevancia
+    (ver scoring.py) en vez de la relajación por rondas. Los empleos que cumplen
+    solo parte de los filtros vuelven igual, después de los que cumplen más.
+    """
+    print("\n" + "="*80)
+    print("🏅 DECIDE_JOBS (puntaje) - Iniciando búsqueda de empleos")
+    print("="*80)
+    print(f"   - include: {include}")
+    print(f"   - exclude: {exclude}")
+    print(f"   - topn: {topn}, offset: {offset}")
+    
+    include = _with_salary(include, salary_min, currency)
+    original_include = {k: list(v) for k, v in include.items()}
+    original_exclude = {k: list(v) for k, v in exclude.items()}
+    as_of = date.fromisoformat(cursor["as_of"]) if cursor and cursor.get("as_of") else date.today()
+    after = (cursor["score"], cursor["id"]) if cursor and "id" in cursor else None
+    plan = ScorePlan(_build_conditions(include, exclude))
+    base = _search_base()
+    
+    with span("engine.score"):
+        if _index_enabled():
+            total, ranked = plan.top_k_index(get_job_index(), as_of, topn, offset, after=after)
+            cards = fetch_cards_by_id(base, [job_id for job_id, _, _ in ranked])
+            page = [(card, score, matched) for card, (_, score, matched) in zip(cards, ranked)]
+        else:
+            total, rows = plan.page_sql(base, as_of, card_columns(base), topn, offset, after=after)
+            page = [(JobCard(*row), score, matched) for row, score, matched in rows]
+    
+    results = []
+    for card, score, matched in page:
+        result = card.as_dict()
+        result["score"] = score
+        result["matched_filters"] = matched
+        results.append(result)
+    
+    steps = [("score", {"include": include, "exclude": exclude, "weights": plan.weights,
+                        "as_of": as_of.isoformat(), "results": total})]
+    # Filtros que el mejor resultado de la página no cumple (equivalente a los "relajados")
+    relaxed_filters = [attr for attr in plan.weights if results and attr not in results[0]["matched_filters"]]
+    print(f"   - Candidatos: {total}, devueltos: {len(results)}")
+    if relaxed_filters:
+        print(f"   - Filtros no cumplidos por el mejor resultado: {relaxed_filters}")
+    print("="*80)
+    metadata = {
+        "has_relevant_results": bool(results),
+        "relaxed_filters": relaxed_filters,
+        "original_filters": {"include": original_include, "exclude": original_exclude},
+        "total_count": total,
+    }
+    return results, steps, metadata
+
+def variety_cursor(seed: int|None = None) -> dict:
+    """Cursor inicial del modo variedad; la semilla fija el orden barajado (reproducible)."""
+    return {"order": "shuffle", "seed": random_shuffle_key() if seed is None else seed}
+
+def _page_order(include: dict, variety: bool) -> str:
+    """Orden de las páginas: barajado (variedad), por relevancia (hay cargo) o por id."""
+    if variety:
+        return "shuffle"
+    return "rank" if _role_query(include.get("role")) is not None else "id"
+
+def page_cursor(results, cursor:dict|None = None, order:str|None = None, rank_query=None) -> dict|None:
+    """
+    Cursor keyset (último id visto) para continuar después de `results`.
+    En modo variedad conserva la semilla del cursor usado. Los órdenes barajado y por
+    relevancia guardan además la clave de orden de esa fila (`key` / `rank`): la página
+    siguiente no necesita volver a leerla (la fila puede ya no existir).
+    """
+    if not results:
+        return None
+    last_id = results[-1]["id"]
+    if cursor and cursor.get("order") == "shuffle":
+        key = _search_base().filter(id=last_id).values_list('shuffle_key', flat=True).first()
+        return {"order": "shuffle", "seed": cursor["seed"], "key": key, "id": last_id}
+    if order == "score":
+        return {"order": "score", "as_of": cursor["as_of"], "score": results[-1]["score"], "id": last_id}
+    if order == "rank" and rank_query is not None:
+        rank = _ranked(_search_base().filter(id=last_id), rank_query).values_list('rank', flat=True).first()
+        return {"order": "rank", "rank": rank, "id": last_id}
+    return {"order": order if order == "rank" else "id", "id": last_id}
+
+def _cursor_after(cursor: dict|None, key: str):
+    """
+    (clave de orden, id) del cursor para keyset, o None si no la trae (p.ej. un cursor
+    guardado antes de que existiera la clave): entonces se pagina por offset.
+    """
+    if cursor and cursor.get("id") is not None and cursor.get(key) is not None:
+        return cursor[key], cursor["id"]
+    return None
+
+@traced_span("engine.page")
+def _get_varied_results(queryset, topn: int, offset: int, variety: bool = False, matches=None, cursor:dict|None=None, rank_query=None, total_count:int|None=None):
     """
     Obtiene resultados con variedad si se solicita, o resultados normales con paginación.
+    Devuelve (resultados, total de filas de `queryset` / `matches`).
+    
+    Si `matches` viene del índice en memoria (ver `_run_search`), `queryset` es la base
+    sin filtrar y solo se hidratan con el ORM los IDs de la página.
+    Con `cursor` (ver `page_cursor`) la paginación es keyset: `id > cursor["id"]`, o en
+    modo variedad, después de (cursor["key"], cursor["id"]) en el orden (shuffle_key, id)
+    rotado por la semilla. Si al cursor le falta su clave de orden se usa `offset`.
+    Con `rank_query` (cargos, ver `_role_query`) y sin variedad, el orden es por
+    relevancia: ts_rank descendente y luego id.
+    
+    Si no viene `total_count`, en las páginas por offset de SQL el total se lee en
+    la misma consulta de la página (`COUNT(*) OVER ()`, ver `_counted_page`).
     """
-    total_count = queryset.count()
+    after_id = cursor.get("id") if cursor else None
+    if total_count is None and matches is not None:
+        total_count = matches.count
+    elif total_count is None and (variety or after_id is not None):
+        # Con keyset la ventana solo vería las filas después del cursor
+        total_count = queryset.count()
     print(f"\n🎯 _GET_VARIED_RESULTS:")
-    print(f"   - Total disponible: {total_count}")
+    if total_count is not None:
+        print(f"   - Total disponible: {total_count}")
     print(f"   - Solicitado: topn={topn}, offset={offset}, variety={variety}")
     
     if total_count == 0:
         print(f"   - ⚠️  No hay resultados disponibles")
-        return []
+        return [], 0
     
+    counted = None
     if variety:
-        # Para maximizar variedad, ordenamos por diferentes criterios y tomamos muestras
-        # Esto ayuda a evitar mostrar siempre los mismos empleos
-        import random
-        
-        # Obtener una muestra más grande para seleccionar variedad
-        sample_size = min(total_count, topn * 10)  # Obtener 10x más para seleccionar variedad
-        
-        # Diferentes ordenamientos para variedad
-        orderings = [
-            ['-published_date', 'title'],  # Por fecha y título
-            ['company__name', 'title'],    # Por empresa y título
-            ['title', '-published_date'],  # Por título y fecha
-            ['-id', 'title'],              # Por ID (aleatorio efectivo)
-            ['location__raw_text', 'title'], # Por ubicación y título
-        ]
-        
-        # Seleccionar ordenamiento aleatorio
-        ordering = random.choice(orderings)
+        # Orden "barajado" por la clave aleatoria de cada fila, rotado por la semilla
+        # de la conversación: reproducible, sin traer filas de más y paginable con cursor
+        seed = cursor["seed"] if cursor else random_shuffle_key()
         print(f"   - 🌈 Modo VARIEDAD activado:")
-        print(f"      Ordenamiento: {ordering}")
-        print(f"      Muestra: {sample_size} empleos")
-        
-        varied_qs = queryset.order_by(*ordering)[:sample_size]
-        
-        # Convertir objetos a diccionarios para mantener relaciones
-        varied_results = []
-        for job in varied_qs:
-            # Convertir rating de Decimal a float si existe
-            rating = float(job.company.rating) if job.company.rating is not None else None
-            job_dict = {
-                'id': job.id,
-                'title': job.title,
-                'company': {'name': job.company.name, 'verified': job.company.verified, 'rating': rating},
-                'location': {'raw_text': job.location.raw_text if job.location else None},
-                'area': job.area,
-                'subarea': job.subarea,
-                'work_modality': job.work_modality,
-                'contract_type': job.contract_type,
-                'workday': job.workday,
-                'salary_text': job.salary_text,
-                'min_experience': job.min_experience,
-                'min_education': job.min_education,
-                'published_date': job.published_date,
-                'accessibility_mentioned': job.accessibility_mentioned,
-                'transport_mentioned': job.transport_mentioned,
-                'disability_friendly': job.disability_friendly,
-                'url': job.url,
-            }
-            varied_results.append(job_dict)
-        
-        random.shuffle(varied_results)
-        
-        # Aplicar offset y limit
-        start_idx = offset
-        end_idx = start_idx + topn
-        print(f"      Offset aplicado: {start_idx} → {end_idx}")
-        
-        # Si no hay suficientes resultados con variedad, usar paginación normal
-        if start_idx >= len(varied_results):
-            # Fallback a paginación normal
-            print(f"      ⚠️  Offset demasiado alto, usando fallback normal")
-            ordered_qs = queryset.order_by('id')
-            fallback_results = []
-            for job in ordered_qs[offset:offset + topn]:
-                rating = float(job.company.rating) if job.company.rating is not None else None
-                job_dict = {
-                    'id': job.id,
-                    'title': job.title,
-                    'company': {'name': job.company.name, 'verified': job.company.verified, 'rating': rating},
-                    'location': {'raw_text': job.location.raw_text if job.location else None},
-                    'area': job.area,
-                    'subarea': job.subarea,
-                    'work_modality': job.work_modality,
-                    'contract_type': job.contract_type,
-                    'workday': job.workday,
-                    'salary_text': job.salary_text,
-                    'min_experience': job.min_experience,
-                    'min_education': job.min_education,
-                    'published_date': job.published_date,
-                    'accessibility_mentioned': job.accessibility_mentioned,
-                    'transport_mentioned': job.transport_mentioned,
-                    'disability_friendly': job.disability_friendly,
-                    'url': job.url,
-                }
-                fallback_results.append(job_dict)
-            if fallback_results:
-                print(f"      📦 Resultados fallback: {len(fallback_results)}")
-                return fallback_results
-            else:
-                # Si aún no hay resultados, relajar filtros
-                print(f"      ⚠️  Sin resultados, mostrando primeros {topn}")
-                fallback_list = []
-                for job in queryset.order_by('id')[:topn]:
-                    rating = float(job.company.rating) if job.company.rating is not None else None
-                    job_dict = {
-                        'id': job.id,
-                        'title': job.title,
-                        'company': {'name': job.company.name, 'verified': job.company.verified, 'rating': rating},
-                        'location': {'raw_text': job.location.raw_text if job.location else None},
-                        'area': job.area,
-                        'subarea': job.subarea,
-                        'work_modality': job.work_modality,
-                        'contract_type': job.contract_type,
-                        'workday': job.workday,
-                        'salary_text': job.salary_text,
-                        'min_experience': job.min_experience,
-                        'min_education': job.min_education,
-                        'published_date': job.published_date,
-                        'accessibility_mentioned': job.accessibility_mentioned,
-                        'transport_mentioned': job.transport_mentioned,
-                        'disability_friendly': job.disability_friendly,
-                        'url': job.url,
-                    }
-                    fallback_list.append(job_dict)
-                return fallback_list
-        
-        result = varied_results[start_idx:end_idx]
-        print(f"      ✅ Resultados finales con variedad: {len(result)}")
-        return result
+        print(f"      Ordenamiento: (shuffle_key, id) desde semilla {seed}")
+        after = _cursor_after(cursor, "key")
+        if after is not None:
+            print(f"      Cursor: después de (shuffle_key, id) {after}")
+        if matches is not None:
+            page_ids = matches.shuffled_page(seed, offset if after is None else 0, topn, after=after)
+            cards = fetch_cards_by_id(queryset, page_ids)
+        else:
+            cards = _shuffled_page(queryset, seed, offset, topn, after=after)
+    elif rank_query is not None:
+        print(f"   - 📄 Modo PAGINACIÓN POR RELEVANCIA:")
+        print(f"      Ordenamiento: ts_rank(search_vector) desc, id")
+        after = _cursor_after(cursor, "rank")
+        if after is not None:
+            print(f"      Cursor: después de (rank, id) {after}")
+        if matches is not None:
+            # El índice da el total; la página la ordena Postgres con los mismos filtros como
+            # WHERE (sin mandar la lista de IDs que cumplen, que con un cargo amplio no tiene tope)
+            filtered = queryset.filter(adapt_q(_conditions_q(matches.conditions), queryset))
+            cards = _ranked_page(filtered, rank_query, offset, topn, after=after)
+        elif after is not None:
+            cards = _ranked_page(queryset, rank_query, offset, topn, after=after)
+        else:
+            cards, counted = _counted_page(_ranked(queryset, rank_query), offset, topn)
     else:
         # Paginación normal con offset - usar ordenamiento consistente
         # Ordenar por ID para tener un orden predecible
         print(f"   - 📄 Modo PAGINACIÓN NORMAL:")
         print(f"      Ordenamiento: por ID")
-        ordered_qs = queryset.order_by('id')
-        result = []
-        for job in ordered_qs[offset:offset + topn]:
-            rating = float(job.company.rating) if job.company.rating is not None else None
-            job_dict = {
-                'id': job.id,
-                'title': job.title,
-                'company': {'name': job.company.name, 'verified': job.company.verified, 'rating': rating},
-                'location': {'raw_text': job.location.raw_text if job.location else None},
-                'area': job.area,
-                'subarea': job.subarea,
-                'work_modality': job.work_modality,
-                'contract_type': job.contract_type,
-                'workday': job.workday,
-                'salary_text': job.salary_text,
-                'min_experience': job.min_experience,
-                'min_education': job.min_education,
-                'published_date': job.published_date,
-                'accessibility_mentioned': job.accessibility_mentioned,
-                'transport_mentioned': job.transport_mentioned,
-                'disability_friendly': job.disability_friendly,
-                'url': job.url,
-            }
-            result.append(job_dict)
-        print(f"      ✅ Resultados: {len(result)} (índices {offset} a {offset+topn})")
-        return result
+        if after_id is not None:
+            print(f"      Cursor: después de id {after_id}")
+        if matches is not None:
+            if after_id is not None:
+                page_ids = matches.page_after(after_id, topn)
+            else:
+                page_ids = matches.page(offset, topn)
+            cards = fetch_cards_by_id(queryset, page_ids)
+        elif after_id is not None:
+            cards = fetch_cards(queryset.filter(id__gt=after_id).order_by('id')[:topn])
+        else:
+            cards, counted = _counted_page(queryset.order_by('id'), offset, topn)
+    
+    if total_count is None:
+        # Página vacía: si no hubo offset no hay filas; si lo hubo, el total se cuenta aparte
+        total_count = counted if counted is not None else (queryset.count() if offset else 0)
+        print(f"   - Total disponible: {total_count}")
+    
+    # Solo las columnas de la tarjeta (sin description ni instancias completas)
+    result = [card.as_dict() for card in cards]
+    print(f"      ✅ Resultados: {len(result)}")
+    return result, total_count
 
-def get_job_pagination_info(include: dict, exclude: dict, salary_min: int = None, currency: str = None):
+def _counted_page(queryset, offset: int, limit: int):
     """
-    Obtiene información de paginación para los filtros dados.
+    Tarjetas de `queryset[offset:offset + limit]` y el total de filas de `queryset`
+    en una sola consulta (`COUNT(*) OVER ()` se evalúa antes del LIMIT).
+    El total es None si la página sale vacía.
     """
-    base = JobPosting.objects.select_related('company', 'location').all()
-    qs = _apply(base, include, exclude, salary_min, currency)
+    rows = list(queryset.annotate(total_rows=Window(Count('id'))).values_list(*card_columns(queryset), 'total_rows')[offset:offset + limit])
+    if not rows:
+        return [], None
+    return [JobCard(*row[:-1]) for row in rows], rows[0][-1]
+
+def _ranked(queryset, rank_query):
+    """Queryset anotado con `rank` (ts_rank sobre search_vector) y ordenado por (rank desc, id)."""
+    # ts_rank es `real`: se pasa a double para que el rank leído en Python sea exacto
+    # y sirva para comparar por igualdad en el cursor
+    rank = Cast(SearchRank(F('search_vector'), rank_query), FloatField())
+    return queryset.annotate(rank=rank).order_by('-rank', 'id')
+
+def _ranked_page(queryset, rank_query, offset: int, limit: int, after=None) -> list:
+    """
+    Tarjetas de una página por relevancia. Con `after` = (rank, id) del cursor es keyset:
+    `rank < r OR (rank = r AND id > after_id)`; sin él, `offset`.
+    """
+    ranked = _ranked(queryset, rank_query)
+    if after is not None:
+        offset = 0
+        after_rank, after_id = after
+        ranked = ranked.filter(Q(rank__lt=after_rank) | Q(rank=after_rank, id__gt=after_id))
+    return fetch_cards(ranked[offset:offset + limit])
+
+def _shuffled_page(queryset, seed: int, offset: int, limit: int, after=None) -> list:
+    """
+    Tarjetas (ver cards.py) de una página en orden (shuffle_key, id) rotado por `seed`, con dos range scans sobre el
+    índice (shuffle_key, id): primero claves >= seed y después (vuelta) claves < seed.
+    Con `after` = (shuffle_key, id) del cursor es keyset; sin él, `offset`.
+    """
+    ordering = ('shuffle_key', 'id')
+    head = queryset.filter(shuffle_key__gte=seed)
+    tail = queryset.filter(shuffle_key__lt=seed)
+    if after is not None:
+        offset = 0
+        after_key, after_id = after
+        after_q = Q(shuffle_key__gt=after_key) | Q(shuffle_key=after_key, id__gt=after_id)
+        if after_key >= seed:
+            head = head.filter(after_q)
+        else:
+            head = None
+            tail = tail.filter(after_q)
     
-    total_count = qs.count()
+    cards = []
+    if head is not None:
+        cards = fetch_cards(head.order_by(*ordering)[offset:offset + limit])
+        if not cards and offset:
+            # El offset cae en la parte de "vuelta"
+            offset = max(0, offset - head.count())
+        else:
+            offset = 0
+    if len(cards) < limit:
+        cards += fetch_cards(tail.order_by(*ordering)[offset:offset + limit - len(cards)])
+    return cards
+
+def page_info(total_count: int, page_size: int = 3) -> dict:
+    """Información de paginación a partir del total (metadata["total_count"] de `decide_jobs`)."""
     return {
         "total_jobs": total_count,
-        "has_more": total_count > 3,  # Asumiendo que mostramos 3 por defecto
-        "estimated_pages": (total_count + 2) // 3  # Páginas de 3 empleos
+        "has_more": total_count > page_size,
+        "estimated_pages": (total_count + page_size - 1) // page_size,
     }
 
+def get_job_pagination_info(include: dict, exclude: dict, salary_min: int = None, currency: str = None):
+    """
+    Obtiene información de paginación para los filtros dados (búsqueda estricta).
+    Después de `decide_jobs` usar `page_info(metadata["total_count"])`,
+    que no repite la búsqueda.
+    """
+    cache_key = ("pagination_info", search_signature(include, exclude, salary_min, currency))
+    cached = results_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    base = _search_base()
+    _, total_count, _ = _run_search(base, _with_salary(include, salary_min, currency), exclude, salary_min, currency)
+    
+    info = page_info(total_count)
+    results_cache.set(cache_key, info)
+    return info
+
 def analyze_available_alternatives(original_include: dict, exclude: dict = None):
     """
     Analiza qué alternativas tienen empleos disponibles relajando filtros específicos.
@@ -633,7 +1026,7 @@ def analyze_available_alternatives(original_include: dict, exclude: dict = None)
     if exclude is None:
         exclude = {}
     
-    base = JobPosting.objects.select_related('company', 'location').all()
+    base = _search_base()
     alternatives = []
     suggestions = []
     
@@ -651,6 +1044,7 @@ def analyze_available_alternatives(original_include: dict, exclude: dict = None)
     critical_filters = ["industry", "area"]
     has_critical = any(f in original_include for f in critical_filters)
     
+    relaxations = []
     for filter_name in filter_priority:
         if filter_name not in original_include:
             continue
@@ -664,42 +1058,41 @@ def analyze_available_alternatives(original_include: dict, exclude: dict = None)
             if not critical_preserved:
                 continue  # No sugerir si perdemos todos los filtros críticos
         
-        qs = _apply(base, test_include, exclude, None, None)
-        count = qs.count()
-        
+        relaxations.append((filter_name, test_include, _filter_conditions(test_include, exclude)))
+    
+    # Todos los conteos en una sola pasada
+    relaxation_counts = _count_conditions(base, [conditions for _, _, conditions in relaxations])
+    
+    for (filter_name, test_include, conditions), count in zip(relaxations, relaxation_counts):
         if count > 0:
-            # Verificar que los resultados sean relevantes
-            results = _get_varied_results(qs, topn=3, offset=0, variety=False)
-            if results:
-                # Verificar relevancia (si había industry/area original, verificar que los resultados los tengan)
-                is_relevant = True
-                if original_include.get("industry"):
-                    matching = sum(1 for r in results if r.get("area") in original_include.get("industry", []))
-                    if matching == 0 and filter_name == "industry":
-                        is_relevant = False
-                
-                if original_include.get("area"):
-                    matching = sum(1 for r in results if r.get("subarea") in original_include.get("area", []))
-                    if matching == 0 and filter_name == "area":
-                        is_relevant = False
+            # Verificar relevancia (si se quita industry/area, que los primeros resultados
+            # sigan teniendo el valor original); solo en ese caso hace falta traer la página
+            is_relevant = True
+            if filter_name in critical_filters and original_include.get(filter_name):
+                qs, matches = _select_conditions(base, conditions)
+                results, _ = _get_varied_results(qs, topn=3, offset=0, variety=False, matches=matches, total_count=count)
+                result_field = "area" if filter_name == "industry" else "subarea"
+                matching = sum(1 for r in results if r.get(result_field) in original_include.get(filter_name, []))
+                if matching == 0:
+                    is_relevant = False
+            
+            if is_relevant:
+                filter_label = {
+                    "industry": "industria",
+                    "area": "área funcional",
+                    "modality": "modalidad",
+                    "seniority": "experiencia",
+                    "location": "ubicación",
+                    "transport": "transporte",
+                    "accessibility": "accesibilidad"
+                }.get(filter_name, filter_name)
                 
-                if is_relevant:
-                    filter_label = {
-                        "industry": "industria",
-                        "area": "área funcional",
-                        "modality": "modalidad",
-                        "seniority": "experiencia",
-                        "location": "ubicación",
-                        "transport": "transporte",
-                        "accessibility": "accesibilidad"
-                    }.get(filter_name, filter_name)
-                    
-                    alternatives.append({
-                        "filter_to_remove": filter_name,
-                        "filter_label": filter_label,
-                        "jobs_available": count,
-                        "keep_filters": test_include
-                    })
+                alternatives.append({
+                    "filter_to_remove": filter_name,
+                    "filter_label": filter_label,
+                    "jobs_available": count,
+                    "keep_filters": test_include
+                })
     
     # 2. Generar sugerencias basadas en alternativas encontradas
     if alternatives:
@@ -718,17 +1111,11 @@ def analyze_available_alternatives(original_include: dict, exclude: dict = None)
         if "industry" in original_include:
             # Probar otras industrias
             current_industry = original_include["industry"][0] if original_include["industry"] else None
-            other_include = {k: list(v) for k, v in original_include.items()}
-            industry_suggestions = []
-            
-            for other_ind in available_industries:
-                if other_ind == current_industry:
-                    continue
-                other_include["industry"] = [other_ind]
-                test_qs = _apply(base, other_include, exclude, None, None)
-                count = test_qs.count()
-                if count > 0:
-                    industry_suggestions.append((other_ind, count))
+            industry_counts = _label_counts(facet_counts(original_include, exclude, "industry", base=base), available_industries)
+            industry_suggestions = [
+                (other_ind, count) for other_ind, count in industry_counts.items()
+                if other_ind != current_industry and count > 0
+            ]
             
             # Ordenar por número de empleos (más primero) y tomar las top 2
             industry_suggestions.sort(key=lambda x: x[1], reverse=True)
@@ -739,17 +1126,11 @@ def analyze_available_alternatives(original_include: dict, exclude: dict = None)
         if "area" in original_include:
             # Probar otras áreas funcionales
             current_area = original_include["area"][0] if original_include["area"] else None
-            other_include = {k: list(v) for k, v in original_include.items()}
-            area_suggestions = []
-            
-            for other_area in available_areas[:10]:  # Limitar a las primeras 10 para no hacer demasiadas consultas
-                if other_area == current_area:
-                    continue
-                other_include["area"] = [other_area]
-                test_qs = _apply(base, other_include, exclude, None, None)
-                count = test_qs.count()
-                if count > 0:
-                    area_suggestions.append((other_area, count))
+            area_counts = _label_counts(facet_counts(original_include, exclude, "area", base=base), available_areas)
+            area_suggestions = [
+                (other_area, count) for other_area, count in area_counts.items()
+                if other_area != current_area and count > 0
+            ]
             
             # Ordenar por número de empleos (más primero) y tomar las top 2
             area_suggestions.sort(key=lambda x: x[1], reverse=True)
@@ -760,7 +1141,11 @@ def analyze_available_alternatives(original_include: dict, exclude: dict = None)
         if "modality" in original_include:
             # Probar otras modalidades
             current_modality = original_include["modality"][0] if original_include["modality"] else None
-            other_modalities = [mod for mod in available_modalities if mod != current_modality]
+            modality_counts = _label_counts(facet_counts(original_include, exclude, "modality", base=base), available_modalities, exact=True)
+            other_modalities = sorted(
+                (mod for mod in available_modalities if mod != current_modality and modality_counts[mod] > 0),
+                key=lambda mod: modality_counts[mod], reverse=True,
+            )
             if other_modalities:
                 suggestions.append(f"• **Cambia la modalidad** a: {', '.join(other_modalities)}")
         
@@ -775,17 +1160,11 @@ def analyze_available_alternatives(original_include: dict, exclude: dict = None)
         if "industry" in original_include:
             # Probar otras industrias para sugerir específicamente
             current_industry = original_include["industry"][0] if original_include["industry"] else None
-            other_include = {k: list(v) for k, v in original_include.items() if k != "industry"}
-            industry_suggestions = []
-            
-            for other_ind in available_industries:
-                if other_ind == current_industry:
-                    continue
-                other_include["industry"] = [other_ind]
-                test_qs = _apply(base, other_include, exclude, None, None)
-                count = test_qs.count()
-                if count > 0:
-                    industry_suggestions.append((other_ind, count))
+            industry_counts = _label_counts(facet_counts(original_include, exclude, "industry", base=base), available_industries)
+            industry_suggestions = [
+                (other_ind, count) for other_ind, count in industry_counts.items()
+                if other_ind != current_industry and count > 0
+            ]
             
             if industry_suggestions:
                 industry_suggestions.sort(key=lambda x: x[1], reverse=True)
@@ -797,17 +1176,11 @@ def analyze_available_alternatives(original_include: dict, exclude: dict = None)
         if "area" in original_include:
             # Probar otras áreas funcionales
             current_area = original_include["area"][0] if original_include["area"] else None
-            other_include = {k: list(v) for k, v in original_include.items() if k != "area"}
-            area_suggestions = []
-            
-            for other_area in available_areas[:10]:  # Limitar consultas
-                if other_area == current_area:
-                    continue
-                other_include["area"] = [other_area]
-                test_qs = _apply(base, other_include, exclude, None, None)
-                count = test_qs.count()
-                if count > 0:
-                    area_suggestions.append((other_area, count))
+            area_counts = _label_counts(facet_counts(original_include, exclude, "area", base=base), available_areas)
+            area_suggestions = [
+                (other_area, count) for other_area, count in area_counts.items()
+                if other_area != current_area and count > 0
+            ]
             
             if area_suggestions:
                 area_suggestions.sort(key=lambda x: x[1], reverse=True)
@@ -817,7 +1190,11 @@ def analyze_available_alternatives(original_include: dict, exclude: dict = None)
                 suggestions.append(f"💡 **Cambia el área funcional** a otra opción disponible")
         
         if "modality" in original_include:
-            other_modalities = [mod for mod in available_modalities if mod not in original_include.get("modality", [])]
+            modality_counts = _label_counts(facet_counts(original_include, exclude, "modality", base=base), available_modalities, exact=True)
+            other_modalities = sorted(
+                (mod for mod in available_modalities if mod not in original_include.get("modality", []) and modality_counts[mod] > 0),
+                key=lambda mod: modality_counts[mod], reverse=True,
+            )
             if other_modalities:
                 suggestions.append(f"💡 **Cambia la modalidad** a: {', '.join(other_modalities)}")
     
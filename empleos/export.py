@@ -0,0 +1,108 @@
+"""
+Exportación de resultados de búsqueda (NDJSON / CSV) sin cargarlos en memoria.
+
+Recibe los mismos filtros que `engine.decide_jobs` (include / exclude / salary_min /
+currency), arma el queryset con `engine._apply` y lo recorre con
+`.iterator(chunk_size=...)`: en PostgreSQL es un cursor con nombre del lado del
+servidor (DECLARE ... / FETCH de a `chunk_size` filas), así que la memoria no crece
+con la cantidad de empleos exportados. Las filas salen como tuplas (`values_list`),
+sin instanciar modelos, y se van escribiendo línea a línea.
+
+Lo usan `JobExportView` (StreamingHttpResponse) y el comando `export_jobs`.
+"""
+import csv
+import json
+from datetime import date
+from decimal import Decimal
+
+from django.conf import settings
+
+from .engine import _apply, _search_base, _with_salary
+from .models import JobSearch
+from .search_view import view_field
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Columnas exportadas (campos de JobPosting) y su nombre en el archivo
+EXPORT_COLUMNS = (
+    ("id", "id"),
+    ("title", "title"),
+    ("company__name", "company"),
+    ("source__name", "source"),
+    ("location__raw_text", "location"),
+    ("location__region", "region"),
+    ("area", "area"),
+    ("subarea", "subarea"),
+    ("work_modality", "work_modality"),
+    ("contract_type", "contract_type"),
+    ("workday", "workday"),
+    ("salary_text", "salary_text"),
+    ("salary_min_clp", "salary_min_clp"),
+    ("salary_max_clp", "salary_max_clp"),
+    ("min_experience", "min_experience"),
+    ("min_experience_years", "min_experience_years"),
+    ("seniority", "seniority"),
+    ("min_education", "min_education"),
+    ("published_date", "published_date"),
+    ("accessibility_mentioned", "accessibility_mentioned"),
+    ("transport_mentioned", "transport_mentioned"),
+    ("disability_friendly", "disability_friendly"),
+    ("url", "url"),
+)
+EXPORT_HEADER = [name for _, name in EXPORT_COLUMNS]
+
+
+def export_chunk_size() -> int:
+    return getattr(settings, "EXPORT_CHUNK_SIZE", 2000)
+
+
+def export_queryset(include: dict, exclude: dict, salary_min: int | None = None, currency: str | None = None):
+    """Filas (tuplas de EXPORT_COLUMNS) de todos los empleos que cumplen los filtros, ordenadas por id."""
+    include = _with_salary(include, salary_min, currency)
+    qs = _apply(_search_base(), include, exclude, salary_min, currency)
+    columns = [view_field(field) if qs.model is JobSearch else field for field, _ in EXPORT_COLUMNS]
+    return qs.order_by("id").values_list(*columns)
+
+
+def iter_rows(queryset, chunk_size: int | None = None):
+    """Recorre `queryset` con un cursor del servidor, de a `chunk_size` filas."""
+    return queryset.iterator(chunk_size=chunk_size or export_chunk_size())
+
+
+def _plain(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def ndjson_lines(rows):
+    """Un objeto JSON por línea."""
+    for row in rows:
+        record = {name: _plain(value) for name, value in zip(EXPORT_HEADER, row)}
+        yield json.dumps(record, ensure_ascii=False) + "\n"
+
+
+class _Echo:
+    """Pseudo-archivo para csv.writer: devuelve la línea en vez de guardarla."""
+
+    def write(self, value):
+        return value
+
+
+def csv_lines(rows):
+    """Encabezado y una línea CSV por fila."""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow([_plain(value) for value in row])
+
+
+def export_lines(fmt: str, rows):
+    if fmt == "csv":
+        return csv_lines(rows)
+    return ndjson_lines(rows)
@@ -0,0 +1,96 @@
+"""
+Índice invertido de opciones (roles, ubicaciones, áreas) para `nlp._fuzzy_match`.
+
+`_fuzzy_match(texto, opciones)` acepta una opción si
+
+    - la opción normalizada está dentro del texto, o el texto dentro de la opción, o
+    - el Jaccard entre sus palabras y las del texto llega al umbral.
+
+Con una lista, eso es normalizar y comparar cada opción (todos los títulos distintos
+de la BD en cada mensaje). `OptionIndex` lo precalcula una vez por versión de la
+taxonomía (ver nlp.get_role_index):
+
+    - normas y conjuntos de palabras de cada opción
+    - palabra → opciones que la contienen: el Jaccard solo se calcula para las
+      opciones que comparten al menos una palabra con el texto
+    - autómata Aho-Corasick (synonyms._Automaton) con las normas: "opción dentro del
+      texto" es una pasada por el texto
+    - las normas unidas en un solo string: "texto dentro de la opción" es un
+      `str.find` en C, sin trabajo por opción en Python
+
+El resultado es el mismo que el del recorrido completo (y en el mismo orden).
+"""
+from bisect import bisect_right
+from typing import Iterable, List, Set
+
+from .normalize import norm_text
+from .synonyms import _Automaton
+
+_SEPARATOR = "\n"   # norm_text colapsa los espacios: no aparece dentro de una norma
+
+
+class OptionIndex:
+    def __init__(self, options: Iterable[str]):
+        self.options = list(options)
+        self.norms = [norm_text(option) or "" for option in self.options]
+        self.tokens = [frozenset(norm.split()) for norm in self.norms]
+
+        self.by_token = {}
+        patterns = {}
+        self._empty = []    # "" está dentro de cualquier texto
+        for i, (norm, tokens) in enumerate(zip(self.norms, self.tokens)):
+            for token in tokens:
+                self.by_token.setdefault(token, []).append(i)
+            if norm:
+                patterns.setdefault(norm, []).append(i)
+            else:
+                self._empty.append(i)
+        self._automaton = _Automaton(patterns)
+
+        self._haystack = _SEPARATOR.join(self.norms)
+        self._starts = []
+        offset = 0
+        for norm in self.norms:
+            self._starts.append(offset)
+            offset += len(norm) + len(_SEPARATOR)
+
+    def __len__(self):
+        return len(self.options)
+
+    def contained_in(self, text: str) -> Set[int]:
+        """Posiciones de las opciones cuya norma está dentro de `text` (ya normalizado)."""
+        found = set(self._empty)
+        for _, _, ids in self._automaton.find(text):
+            found.update(ids)
+        return found
+
+    def containing(self, text: str) -> Set[int]:
+        """Posiciones de las opciones cuya norma contiene `text` (ya normalizado)."""
+        if not text:
+            return set(range(len(self.options)))
+        found = set()
+        pos = self._haystack.find(text)
+        while pos != -1:
+            i = bisect_right(self._starts, pos) - 1
+            found.add(i)
+            # Siguiente opción: las demás apariciones en esta no cambian el resultado
+            pos = self._haystack.find(text, self._starts[i] + len(self.norms[i]) + len(_SEPARATOR))
+        return found
+
+    def similar(self, text: str, threshold: float) -> Set[int]:
+        """Posiciones de las opciones con Jaccard de palabras >= threshold (solo las que comparten alguna)."""
+        words = set(text.split())
+        shared = {}
+        for word in words:
+            for i in self.by_token.get(word, ()):
+                shared[i] = shared.get(i, 0) + 1
+        return {
+            i for i, common in shared.items()
+            if common / (len(words) + len(self.tokens[i]) - common) >= threshold
+        }
+
+    def match(self, text: str, threshold: float) -> List[str]:
+        """Lo mismo que `nlp._fuzzy_match(text, opciones, threshold)` sobre la lista original."""
+        text = norm_text(text) or ""
+        found = self.contained_in(text) | self.containing(text) | self.similar(text, threshold)
+        return [self.options[i] for i in sorted(found)]
@@ -0,0 +1,405 @@
+"""
+Índice de empleos en memoria (uno por proceso).
+
+En vez de traducir cada búsqueda a una cadena de `icontains`/`iexact` que
+Postgres resuelve con scans secuenciales, se cargan una vez las columnas que
+usa `engine._apply` y se guardan codificadas por diccionario:
+
+    - cada columna guarda sus valores distintos y, por cada valor, las
+      posiciones (filas) donde aparece
+    - las columnas de baja cardinalidad (área, subárea, modalidad, experiencia,
+      ubicación, accesibilidad, transporte) tienen además un bitmap por valor
+
+Un bitmap es un `int` de Python donde el bit i corresponde a la fila i
+(los empleos se ordenan por id, así que el orden de los bits es el orden por id).
+
+Los filtros se evalúan sobre los mismos objetos `Q` que arma `engine`:
+cada condición hoja (`campo__lookup=valor`) se evalúa contra los valores
+DISTINTOS de la columna, y los bitmaps de los valores que cumplen se combinan
+con OR. Después AND/OR/NOT entre condiciones son operaciones de bits.
+Solo la página final de IDs se hidrata con el ORM.
+
+El índice se reconstruye cuando cambia la versión del catálogo
+(ver `catalog.bump_data_version`).
+"""
+import threading
+from bisect import bisect_left, bisect_right
+
+from django.db.models import Q
+
+from .catalog import current_data_version
+from .models import JobPosting
+
+# Columnas que se cargan en memoria (nombres de lookup del ORM)
+INDEXED_FIELDS = (
+    "area",
+    "subarea",
+    "work_modality",
+    "min_experience",
+    "min_experience_years",
+    "location__raw_text",
+    "location__tokens",
+    "location__region",
+    "location__is_junk",
+    "title",
+    "accessibility_mentioned",
+    "transport_mentioned",
+    "published_date",
+    "salary_min_clp",
+    "salary_max_clp",
+    "area_norm",
+    "subarea_norm",
+    "modality_norm",
+    "location__raw_text_norm",
+)
+
+# Sobre esta cantidad de valores distintos no se precalculan bitmaps por valor
+# (p.ej. títulos): se arman al vuelo desde las posiciones.
+MAX_BITMAP_VALUES = 2048
+
+# Máximo de condiciones hoja cacheadas (los filtros se repiten mucho entre usuarios)
+LEAF_CACHE_SIZE = 4096
+
+_LOOKUPS = {"exact", "iexact", "contains", "icontains", "in", "gt", "gte", "lt", "lte", "range", "isnull"}
+
+
+def _upper(value):
+    return str(value).upper()
+
+
+def _match_value(lookup, cell, target):
+    """Evalúa un lookup del ORM sobre un valor de la columna (semántica de Postgres)."""
+    if lookup == "exact" and target is None:
+        lookup, target = "isnull", True
+    if lookup == "isnull":
+        return (cell is None) == bool(target)
+    if cell is None:
+        return False
+    if lookup == "exact":
+        return cell == target
+    if lookup == "iexact":
+        return _upper(cell) == _upper(target)
+    if lookup == "contains":
+        if isinstance(cell, tuple):
+            # ArrayField: contiene todos los elementos (operador @> de Postgres)
+            return set(target) <= set(cell)
+        return str(target) in str(cell)
+    if lookup == "icontains":
+        return _upper(target) in _upper(cell)
+    if lookup == "in":
+        return cell in target
+    if lookup == "gt":
+        return cell > target
+    if lookup == "gte":
+        return cell >= target
+    if lookup == "lt":
+        return cell < target
+    if lookup == "lte":
+        return cell <= target
+    if lookup == "range":
+        return target[0] <= cell <= target[1]
+    raise ValueError(f"Lookup no soportado: {lookup}")
+
+
+def _split_lookup(expr: str):
+    parts = expr.split("__")
+    if len(parts) > 1 and parts[-1] in _LOOKUPS:
+        return "__".join(parts[:-1]), parts[-1]
+    return expr, "exact"
+
+
+class _Column:
+    """Columna codificada por diccionario."""
+    __slots__ = ("values", "positions", "bitmaps")
+
+    def __init__(self, values, positions, bitmaps):
+        self.values = values          # valores distintos (código = posición en la lista)
+        self.positions = positions    # por código: lista de filas con ese valor
+        self.bitmaps = bitmaps        # por código: bitmap, o None si no se precalculó
+
+
+class JobIndex:
+    def __init__(self, version: int, ids: list, columns: dict, shuffle_keys: list = None, source=None):
+        self.version = version
+        self.ids = ids
+        self.size = len(ids)
+        self.nbytes = (self.size + 7) // 8
+        self.all_bits = (1 << self.size) - 1
+        self.columns = columns
+        # Orden "barajado" (shuffle_key, id) para el modo variedad: pares ordenados + su fila
+        self.shuffle_keys = shuffle_keys if shuffle_keys is not None else [0] * self.size
+        order = sorted(range(self.size), key=lambda pos: (self.shuffle_keys[pos], ids[pos]))
+        self.shuffle_positions = order
+        self.shuffle_pairs = [(self.shuffle_keys[pos], ids[pos]) for pos in order]
+        self.source = source if source is not None else JobPosting.objects.all()
+        self._positions_by_id = None
+        self._row_values = {}
+        self._leaf_cache = {}
+        self._lock = threading.Lock()
+
+    # ---------- construcción ----------
+
+    @classmethod
+    def build(cls, version: int, queryset=None):
+        queryset = queryset if queryset is not None else JobPosting.objects.all()
+        rows = list(queryset.order_by("id").values_list("id", "shuffle_key", *INDEXED_FIELDS))
+        index = cls.from_rows(version, rows, source=queryset)
+        print(f"🗂️  Índice de empleos construido: {len(index.ids)} empleos, versión {version}")
+        return index
+
+    @classmethod
+    def from_rows(cls, version: int, rows: list, source=None):
+        """Índice a partir de filas `(id, shuffle_key, *INDEXED_FIELDS)` ordenadas por id."""
+        ids = [row[0] for row in rows]
+        shuffle_keys = [row[1] for row in rows]
+        nbytes = (len(ids) + 7) // 8
+
+        columns = {}
+        for col, field in enumerate(INDEXED_FIELDS, start=2):
+            codes = {}
+            values = []
+            positions = []
+            for pos, row in enumerate(rows):
+                value = row[col]
+                if isinstance(value, list):
+                    # ArrayField: las listas no son hashables
+                    value = tuple(value)
+                code = codes.get(value)
+                if code is None:
+                    code = codes[value] = len(values)
+                    values.append(value)
+                    positions.append([])
+                positions[code].append(pos)
+            if len(values) <= MAX_BITMAP_VALUES:
+                bitmaps = [_positions_to_bits(p, nbytes) for p in positions]
+            else:
+                bitmaps = [None] * len(values)
+            columns[field] = _Column(values, positions, bitmaps)
+        return cls(version, ids, columns, shuffle_keys=shuffle_keys, source=source)
+
+    # ---------- evaluación ----------
+
+    def filter_bits(self, conditions) -> int:
+        """
+        Evalúa una lista de condiciones `(kind, Q)` como las que arma
+        `engine._build_conditions`: AND entre includes, ANDNOT de excludes.
+        """
+        bits = self.all_bits
+        for kind, q in conditions:
+            if not q:
+                # Q() vacío: el ORM lo ignora tanto en filter como en exclude
+                continue
+            q_bits = self.evaluate(q)
+            if kind == "exclude":
+                bits &= ~q_bits
+            else:
+                bits &= q_bits
+            if not bits:
+                break
+        return bits & self.all_bits
+
+    def match(self, conditions) -> "IndexMatch":
+        conditions = list(conditions)
+        return IndexMatch(self, self.filter_bits(conditions), conditions)
+
+    def evaluate(self, q: Q) -> int:
+        is_and = q.connector == Q.AND
+        bits = self.all_bits if is_and else 0
+        for child in q.children:
+            if isinstance(child, Q):
+                child_bits = self.evaluate(child)
+            else:
+                child_bits = self._leaf(*child)
+            bits = (bits & child_bits) if is_and else (bits | child_bits)
+        if q.negated:
+            bits = self.all_bits & ~bits
+        return bits
+
+    def _leaf(self, expr: str, target) -> int:
+        key = (expr, _freeze(target))
+        cached = self._leaf_cache.get(key)
+        if cached is not None:
+            return cached
+
+        field, lookup = _split_lookup(expr)
+        column = self.columns.get(field)
+        if column is None:
+            bits = self._leaf_from_db(expr, target)
+        else:
+            matched = [code for code, value in enumerate(column.values) if _match_value(lookup, value, target)]
+            bits = self._codes_to_bits(column, matched)
+
+        with self._lock:
+            if len(self._leaf_cache) >= LEAF_CACHE_SIZE:
+                self._leaf_cache.clear()
+            self._leaf_cache[key] = bits
+        return bits
+
+    def _codes_to_bits(self, column: _Column, codes: list) -> int:
+        if len(codes) == 1 and column.bitmaps[codes[0]] is not None:
+            return column.bitmaps[codes[0]]
+        if all(column.bitmaps[c] is not None for c in codes):
+            bits = 0
+            for c in codes:
+                bits |= column.bitmaps[c]
+            return bits
+        buf = bytearray(self.nbytes)
+        for c in codes:
+            for pos in column.positions[c]:
+                buf[pos >> 3] |= 1 << (pos & 7)
+        return int.from_bytes(buf, "little")
+
+    def row_values(self, field: str) -> list:
+        """Valor de la columna por fila (posición), p.ej. para puntajes en scoring.py."""
+        values = self._row_values.get(field)
+        if values is None:
+            column = self.columns[field]
+            values = [None] * self.size
+            for code, positions in enumerate(column.positions):
+                for pos in positions:
+                    values[pos] = column.values[code]
+            self._row_values[field] = values
+        return values
+
+    def position_of(self, job_id):
+        if self._positions_by_id is None:
+            self._positions_by_id = {job_id: pos for pos, job_id in enumerate(self.ids)}
+        return self._positions_by_id.get(job_id)
+
+    def _leaf_from_db(self, expr: str, target) -> int:
+        """Condición sobre una columna no indexada: se resuelve con una sola consulta de IDs."""
+        buf = bytearray(self.nbytes)
+        for job_id in self.source.filter(**{expr: target}).values_list("id", flat=True):
+            pos = self.position_of(job_id)
+            if pos is not None:
+                buf[pos >> 3] |= 1 << (pos & 7)
+        return int.from_bytes(buf, "little")
+
+    # ---------- resultados ----------
+
+    def count(self, bits: int) -> int:
+        return bits.bit_count()
+
+    def facet(self, field: str, bits: int) -> dict:
+        """{valor: cantidad} de una columna indexada, dentro de las filas marcadas en `bits`."""
+        column = self.columns[field]
+        counts = {}
+        for code, value in enumerate(column.values):
+            value_bits = column.bitmaps[code]
+            if value_bits is None:
+                value_bits = self._codes_to_bits(column, [code])
+            n = (value_bits & bits).bit_count()
+            if n:
+                counts[value] = n
+        return counts
+
+    def select_ids(self, bits: int, offset: int = 0, limit: int | None = None, after_id=None) -> list:
+        """
+        IDs (ordenados por id) de las filas marcadas en `bits`, con offset/limit.
+        Con `after_id` (keyset) arranca directamente después de ese id.
+        """
+        out = []
+        skipped = 0
+        start = bisect_right(self.ids, after_id) if after_id is not None else 0
+        bits >>= start
+        data = bits.to_bytes(max(self.nbytes - (start >> 3), 1), "little")
+        for byte_pos, byte in enumerate(data):
+            if not byte:
+                continue
+            base = start + (byte_pos << 3)
+            while byte:
+                low = byte & -byte
+                if skipped < offset:
+                    skipped += 1
+                else:
+                    out.append(self.ids[base + low.bit_length() - 1])
+                    if limit is not None and len(out) >= limit:
+                        return out
+                byte ^= low
+        return out
+
+
+    def select_shuffled(self, bits: int, seed: int, offset: int = 0, limit: int = 3, after=None) -> list:
+        """
+        IDs de las filas marcadas en `bits` en orden (shuffle_key, id) rotado por `seed`:
+        primero las claves >= seed y después (vuelta) las < seed. Con `after`
+        = (shuffle_key, id) continúa después de esa posición (la fila puede ya no estar).
+        """
+        data = bits.to_bytes(self.nbytes, "little")
+        seed_start = bisect_left(self.shuffle_pairs, (seed,))
+        walk = (range(seed_start, self.size), range(0, seed_start))
+        if after is not None:
+            begin = bisect_right(self.shuffle_pairs, tuple(after))
+            if after[0] >= seed:
+                walk = (range(begin, self.size), range(0, seed_start))
+            else:
+                walk = (range(begin, seed_start),)
+
+        out = []
+        skipped = 0
+        for part in walk:
+            for i in part:
+                pos = self.shuffle_positions[i]
+                if not data[pos >> 3] & (1 << (pos & 7)):
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                out.append(self.ids[pos])
+                if len(out) >= limit:
+                    return out
+        return out
+
+
+class IndexMatch:
+    """
+    Resultado de evaluar filtros en el índice: bitmap + acceso paginado a los IDs.
+    Guarda las condiciones `(kind, Q)` evaluadas, para las páginas que ordena Postgres.
+    """
+    __slots__ = ("index", "bits", "count", "conditions")
+
+    def __init__(self, index: JobIndex, bits: int, conditions=()):
+        self.index = index
+        self.bits = bits
+        self.count = bits.bit_count()
+        self.conditions = list(conditions)
+
+    def page(self, offset: int, limit: int) -> list:
+        return self.index.select_ids(self.bits, offset=offset, limit=limit)
+
+    def page_after(self, after_id, limit: int) -> list:
+        return self.index.select_ids(self.bits, limit=limit, after_id=after_id)
+
+    def shuffled_page(self, seed: int, offset: int, limit: int, after=None) -> list:
+        return self.index.select_shuffled(self.bits, seed, offset=offset, limit=limit, after=after)
+
+
+def _positions_to_bits(positions, nbytes: int) -> int:
+    buf = bytearray(nbytes)
+    for pos in positions:
+        buf[pos >> 3] |= 1 << (pos & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple, set)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+_INDEX = None
+_INDEX_LOCK = threading.Lock()
+
+
+def get_job_index() -> JobIndex:
+    """Devuelve el índice del proceso, reconstruyéndolo si cambió la versión del catálogo."""
+    global _INDEX
+    version = current_data_version()
+    index = _INDEX
+    if index is None or index.version != version:
+        with _INDEX_LOCK:
+            if _INDEX is None or _INDEX.version != version:
+                _INDEX = JobIndex.build(version)
+            index = _INDEX
+    return index
+
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand
+from empleos.catalog import bump_data_version
+from empleos.models import JobPosting, Location
+
+# Modelo → (columnas de origen, columnas que recalcula su refresh_derived_fields)
+# Los sueldos (salary_min_clp / salary_max_clp / salary_period) se recalculan solo con
+# backfill_salaries; salary_text se lee igual porque refresh_derived_fields lo usa
+DERIVED_FIELDS = [
+    (Location, ["raw_text"], ["comuna", "region", "tokens", "is_junk", "raw_text_norm"]),
+    (JobPosting, ["min_experience", "salary_text", "area", "subarea", "work_modality"],
+     ["min_experience_years", "seniority", "area_norm", "subarea_norm", "modality_norm"]),
+]
+
+
+class Command(BaseCommand):
+    help = "Recalcula los campos derivados (ubicación normalizada, años de experiencia, seniority) en filas existentes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Filas por lote de bulk_update")
+
+    def handle(self, *args, **opts):
+        changed = 0
+        for model, sources, fields in DERIVED_FIELDS:
+            changed += self.backfill(model, sources, fields, opts["batch_size"])
+        if changed:
+            bump_data_version()
+
+    def backfill(self, model, sources, fields, batch_size):
+        self.stdout.write(self.style.WARNING(f"Recalculando campos derivados de {model.__name__} ..."))
+
+        batch, changed, total = [], 0, 0
+        queryset = model.objects.only("id", *sources, *fields).order_by("id")
+        for obj in queryset.iterator(chunk_size=batch_size):
+            total += 1
+            before = [getattr(obj, field) for field in fields]
+            obj.refresh_derived_fields()
+            if [getattr(obj, field) for field in fields] == before:
+                continue
+            batch.append(obj)
+            if len(batch) >= batch_size:
+                model.objects.bulk_update(batch, fields)
+                changed += len(batch)
+                batch = []
+        if batch:
+            model.objects.bulk_update(batch, fields)
+            changed += len(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"OK {changed} de {total} {model.__name__} actualizados"))
+        return changed
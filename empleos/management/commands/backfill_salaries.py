@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+from django.core.management.base import BaseCommand
+from empleos.catalog import bump_data_version
+from empleos.models import JobPosting
+from empleos.normalize import (
+    AMOUNT_RE, MAX_MONTHLY_CLP, MIN_MONTHLY_CLP, PERIOD_PATTERNS, SALARY_PERIODS, usd_to_clp,
+)
+
+FIELDS = ["salary_min_clp", "salary_max_clp", "salary_period"]
+
+
+def parse_salaries(texts: pd.Series) -> pd.DataFrame:
+    """
+    Versión vectorizada de normalize.parse_salary sobre una serie de salary_text
+    (mismas reglas y constantes; tests.ParseSalariesTests compara fila a fila).
+    Devuelve un DataFrame con FIELDS y el mismo índice que `texts`.
+    """
+    folded = (
+        texts.fillna("").str.lower()
+        .str.normalize("NFKD").str.encode("ascii", "ignore").str.decode("ascii")
+        .str.replace("'", "", regex=False).str.split().str.join(" ")
+    )
+    out = pd.DataFrame(index=texts.index, columns=FIELDS, dtype=object)
+    has_text = folded != ""
+
+    currency_usd = folded.str.contains(r"\b(?:usd|us\$|dolares?)\b", regex=True)
+    period = pd.Series("month", index=texts.index)
+    for name, pattern in reversed(PERIOD_PATTERNS):
+        # En orden inverso para que gane el primer patrón, como en salary_period()
+        period = period.mask(folded.str.contains(pattern.pattern, regex=True), name)
+
+    # Un renglón por monto encontrado: (id, n° de monto) → número y multiplicador
+    found = folded[has_text].str.extractall(AMOUNT_RE.pattern)
+    if not found.empty:
+        number, multiplier = found[0], found[1].fillna("")
+        value = number.str.replace(".", "", regex=False).str.replace(",", ".", regex=False).astype(float)
+        value = value * np.select(
+            [multiplier.isin(["mil", "k"]), multiplier.str.startswith("millon") | (multiplier == "mm")],
+            [1_000, 1_000_000], default=1,
+        )
+        rows = found.index.get_level_values(0)
+        value = value * period.loc[rows].map(SALARY_PERIODS).to_numpy()
+        value = value * np.where(currency_usd.loc[rows].to_numpy(), usd_to_clp(), 1)
+        value = value.round()
+        value = value[(value >= MIN_MONTHLY_CLP) & (value <= MAX_MONTHLY_CLP)]
+
+        # Solo los dos primeros montos plausibles (rango "mín - máx")
+        first_two = value.groupby(level=0).head(2).groupby(level=0)
+        low, high = first_two.min().astype("int64"), first_two.max().astype("int64")
+        since = folded.loc[low.index].str.startswith("desde")
+        until = folded.loc[low.index].str.startswith("hasta")
+        first = value.groupby(level=0).first().astype("int64")
+
+        out.loc[low.index, "salary_min_clp"] = low.where(~since, first).where(~until, None)
+        out.loc[low.index, "salary_max_clp"] = high.where(~until, first).where(~since, None)
+        out.loc[low.index, "salary_period"] = period.loc[low.index]
+    return out.astype(object).where(out.notna(), None)
+
+
+class Command(BaseCommand):
+    help = "Recalcula salary_min_clp / salary_max_clp / salary_period desde salary_text (vectorizado con pandas)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000, help="Filas por lote de bulk_update")
+
+    def handle(self, *args, **opts):
+        self.stdout.write(self.style.WARNING("Recalculando sueldos desde salary_text ..."))
+        rows = JobPosting.objects.exclude(salary_text__isnull=True).exclude(salary_text="")
+        current = pd.DataFrame.from_records(
+            rows.values_list("id", "salary_text", *FIELDS), columns=["id", "salary_text", *FIELDS],
+        ).set_index("id")
+        if current.empty:
+            self.stdout.write(self.style.SUCCESS("OK 0 empleos actualizados"))
+            return
+
+        parsed = parse_salaries(current["salary_text"])
+        before = current[FIELDS].astype(object).where(current[FIELDS].notna(), None)
+        same = (parsed == before) | (parsed.isna() & before.isna())
+        changed = parsed[~same.all(axis=1)]
+
+        jobs = [
+            JobPosting(id=job_id, **{field: row[field] for field in FIELDS})
+            for job_id, row in changed.iterrows()
+        ]
+        JobPosting.objects.bulk_update(jobs, FIELDS, batch_size=opts["batch_size"])
+        if jobs:
+            bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"OK {len(jobs)} de {len(current)} empleos actualizados"))
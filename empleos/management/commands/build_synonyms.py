@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+from empleos.catalog import get_data_version
+from empleos.nlp import build_synonym_table
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera la tabla de sinónimos (estáticos + dinámicos de la BD) y la guarda en SynonymTable; "
+        "los procesos la recargan cuando cambia la versión del catálogo"
+    )
+
+    def handle(self, *args, **opts):
+        version = get_data_version()
+        self.stdout.write(self.style.WARNING(f"Generando sinónimos con el catálogo v{version} ..."))
+        synonyms = build_synonym_table(version)
+        total = sum(len(values) for values in synonyms.values())
+        self.stdout.write(self.style.SUCCESS(f"OK {len(synonyms)} categorías, {total} sinónimos"))
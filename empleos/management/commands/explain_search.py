@@ -0,0 +1,201 @@
+import contextlib
+import io
+import json
+import random
+from itertools import combinations
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, Window
+
+from empleos.cards import card_columns
+from empleos.engine import FACET_SLOTS, _apply, _ranked, _role_query, _search_base, _with_salary, facet_choices
+from empleos.models import Conversation, JobPosting
+from empleos.result_cache import search_signature
+
+DEFAULT_BASELINE = Path(settings.BASE_DIR) / "empleos" / "benchmarks" / "query_plans.json"
+
+# Nodos del plan que leen filas de una tabla
+SCAN_NODES = {"Seq Scan", "Index Scan", "Index Only Scan", "Bitmap Heap Scan"}
+INDEX_NODES = {"Index Scan", "Index Only Scan", "Bitmap Index Scan"}
+
+
+def case_name(include: dict, exclude: dict, salary_min=None, currency=None) -> str:
+    """Nombre estable de una combinación (clave en el baseline)."""
+    return json.dumps(search_signature(include, exclude, salary_min, currency), ensure_ascii=False, default=str)
+
+
+def taxonomy_cases(rng: random.Random, pairs: int) -> list:
+    """Cada opción de cada faceta sola, más `pairs` combinaciones de dos facetas al azar (semilla fija)."""
+    choices = facet_choices()
+    titles = list(JobPosting.objects.exclude(title="").values_list("title", flat=True).distinct().order_by("title"))
+    choices["role"] = [title.split()[0] for title in rng.sample(titles, min(5, len(titles)))]
+
+    cases = [({}, {})]
+    for slot, labels in choices.items():
+        for label in labels:
+            cases.append(({slot: [label]}, {}))
+    slots = [slot for slot in (*FACET_SLOTS, "role") if choices.get(slot)]
+    slot_pairs = list(combinations(slots, 2))
+    for _ in range(pairs):
+        a, b = rng.choice(slot_pairs)
+        cases.append(({a: [rng.choice(choices[a])], b: [rng.choice(choices[b])]}, {}))
+    # Exclusiones típicas del chat ("no quiero presencial", "sin cargos de ...")
+    if choices.get("modality"):
+        cases.append(({}, {"modality": [choices["modality"][0]]}))
+    if choices["role"]:
+        cases.append(({}, {"role": [choices["role"][0]]}))
+    return [(inc, exc, None, None) for inc, exc in cases]
+
+
+def conversation_cases(limit: int) -> list:
+    """Filtros reales de las últimas conversaciones (mismo armado que el chat)."""
+    from empleos.views import _build_filters_from_state
+
+    cases = []
+    for state in Conversation.objects.order_by("-id").values_list("state", flat=True)[:limit]:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cases.append(_build_filters_from_state(state or {}))
+    return cases
+
+
+def page_queryset(include: dict, exclude: dict, salary_min, currency, page_size: int):
+    """Primera página tal como la pide engine._decide_jobs sin índice en memoria (ver _counted_page)."""
+    include = _with_salary(include, salary_min, currency)
+    with contextlib.redirect_stdout(io.StringIO()):
+        qs = _apply(_search_base(), include, exclude, salary_min, currency)
+        rank_query = _role_query(include.get("role"))
+    qs = _ranked(qs, rank_query) if rank_query is not None else qs.order_by("id")
+    return qs.annotate(total_rows=Window(Count("id"))).values_list(*card_columns(qs), "total_rows")[:page_size]
+
+
+def summarize_plan(explain: dict) -> dict:
+    """Tiempos, filas leídas, buffers e índices usados de un EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON)."""
+    indexes, seq_scans = set(), set()
+    rows_scanned = 0
+
+    def walk(node):
+        nonlocal rows_scanned
+        node_type = node.get("Node Type")
+        if node_type in INDEX_NODES and node.get("Index Name"):
+            indexes.add(node["Index Name"])
+        if node_type == "Seq Scan":
+            seq_scans.add(node.get("Relation Name"))
+        if node_type in SCAN_NODES:
+            loops = node.get("Actual Loops", 1)
+            rows_scanned += (node.get("Actual Rows", 0) + node.get("Rows Removed by Filter", 0)) * loops
+        for child in node.get("Plans", []):
+            walk(child)
+
+    plan = explain["Plan"]
+    walk(plan)
+    return {
+        "planning_ms": round(explain.get("Planning Time", 0.0), 3),
+        "execution_ms": round(explain.get("Execution Time", 0.0), 3),
+        "rows_scanned": rows_scanned,
+        "shared_buffers": plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0),
+        "indexes": sorted(indexes),
+        "seq_scans": sorted(seq_scans),
+    }
+
+
+def regressions(current: dict, baseline: dict, tolerance: float, min_ms: float) -> list:
+    """Motivos por los que `current` es peor que `baseline` (lista vacía = sin regresión)."""
+    found = []
+    lost = set(baseline["indexes"]) - set(current["indexes"])
+    if lost:
+        found.append(f"dejó de usar {', '.join(sorted(lost))}")
+    new_seq = set(current["seq_scans"]) - set(baseline["seq_scans"])
+    if new_seq:
+        found.append(f"seq scan nuevo sobre {', '.join(sorted(new_seq))}")
+    if current["execution_ms"] > max(baseline["execution_ms"] * tolerance, baseline["execution_ms"] + min_ms):
+        found.append(f"ejecución {baseline['execution_ms']} → {current['execution_ms']} ms")
+    if current["rows_scanned"] > baseline["rows_scanned"] * tolerance and current["rows_scanned"] - baseline["rows_scanned"] > 1000:
+        found.append(f"filas leídas {baseline['rows_scanned']} → {current['rows_scanned']}")
+    return found
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN (ANALYZE, BUFFERS) de la consulta que arma engine._apply para combinaciones de filtros "
+        "(taxonomía + conversaciones guardadas) y comparación contra un baseline"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--baseline", default=str(DEFAULT_BASELINE), help="JSON con el baseline de planes")
+        parser.add_argument("--update-baseline", action="store_true", help="Guarda los resultados como nuevo baseline")
+        parser.add_argument("--report", help="Escribe el reporte completo (JSON) en este archivo")
+        parser.add_argument("--conversations", type=int, default=100, help="Conversaciones recientes a incluir")
+        parser.add_argument("--pairs", type=int, default=40, help="Combinaciones de dos facetas al azar")
+        parser.add_argument("--seed", type=int, default=0, help="Semilla de las combinaciones al azar")
+        parser.add_argument("--page-size", type=int, default=3)
+        parser.add_argument("--tolerance", type=float, default=2.0, help="Factor de tiempo / filas que cuenta como regresión")
+        parser.add_argument("--min-ms", type=float, default=5.0, help="Diferencia mínima de tiempo (ms) para marcar regresión")
+        parser.add_argument("--strict", action="store_true", help="Falla (exit != 0) si hay regresiones")
+
+    def handle(self, *args, **opts):
+        if getattr(settings, "JOB_INDEX_ENABLED", True):
+            self.stdout.write(self.style.NOTICE(
+                "ℹ️  JOB_INDEX_ENABLED está activo: el chat filtra en memoria, estos planes son los del camino SQL"
+            ))
+
+        cases = {}
+        for include, exclude, salary_min, currency in (
+            taxonomy_cases(random.Random(opts["seed"]), opts["pairs"]) + conversation_cases(opts["conversations"])
+        ):
+            cases.setdefault(case_name(include, exclude, salary_min, currency), (include, exclude, salary_min, currency))
+        self.stdout.write(self.style.WARNING(f"Analizando {len(cases)} combinaciones de filtros ..."))
+
+        report = {}
+        for name, (include, exclude, salary_min, currency) in cases.items():
+            qs = page_queryset(include, exclude, salary_min, currency, opts["page_size"])
+            explain = json.loads(qs.explain(format="json", analyze=True, buffers=True))[0]
+            report[name] = {
+                "include": include,
+                "exclude": exclude,
+                "salary_min": salary_min,
+                "currency": currency,
+                "sql": str(qs.query),
+                **summarize_plan(explain),
+            }
+
+        slowest = sorted(report.items(), key=lambda item: item[1]["execution_ms"], reverse=True)
+        for name, row in slowest[:10]:
+            self.stdout.write(
+                f"⏱️  {row['execution_ms']:>8.2f} ms  plan {row['planning_ms']:>6.2f} ms  "
+                f"filas {row['rows_scanned']:>7}  índices {row['indexes'] or '-'}  {name}"
+            )
+        # Tabla que leen las búsquedas: empleos_jobposting, o la vista con SEARCH_VIEW_ENABLED
+        relation = _search_base().model._meta.db_table
+        seq = [name for name, row in report.items() if relation in row["seq_scans"]]
+        self.stdout.write(f"📊 {len(seq)} de {len(report)} combinaciones hacen seq scan sobre {relation}")
+
+        if opts["report"]:
+            Path(opts["report"]).write_text(json.dumps(report, ensure_ascii=False, indent=2, default=str))
+            self.stdout.write(f"📝 Reporte en {opts['report']}")
+
+        baseline_path = Path(opts["baseline"])
+        if opts["update_baseline"]:
+            baseline_path.parent.mkdir(parents=True, exist_ok=True)
+            baseline = {name: {k: v for k, v in row.items() if k != "sql"} for name, row in report.items()}
+            baseline_path.write_text(json.dumps(baseline, ensure_ascii=False, indent=2, default=str))
+            self.stdout.write(self.style.SUCCESS(f"OK baseline actualizado ({len(baseline)} combinaciones) en {baseline_path}"))
+            return
+        if not baseline_path.exists():
+            self.stdout.write(self.style.NOTICE(f"Sin baseline en {baseline_path}: correr con --update-baseline para crearlo"))
+            return
+
+        baseline = json.loads(baseline_path.read_text())
+        regressed = {}
+        for name, row in report.items():
+            if name in baseline:
+                found = regressions(row, baseline[name], opts["tolerance"], opts["min_ms"])
+                if found:
+                    regressed[name] = found
+        for name, found in regressed.items():
+            self.stdout.write(self.style.ERROR(f"❌ {name}: {'; '.join(found)}"))
+        compared = sum(1 for name in report if name in baseline)
+        if regressed and opts["strict"]:
+            raise CommandError(f"{len(regressed)} de {compared} combinaciones con regresión de plan")
+        self.stdout.write(self.style.SUCCESS(f"OK {compared - len(regressed)} de {compared} combinaciones sin regresión"))
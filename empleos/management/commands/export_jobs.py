@@ -0,0 +1,59 @@
+import contextlib
+import io
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from empleos.engine import EXCLUDE_UNSUPPORTED
+from empleos.export import EXPORT_FORMATS, export_lines, export_queryset, iter_rows
+
+
+def _filters(raw: str, option: str) -> dict:
+    try:
+        value = json.loads(raw)
+    except json.JSONDecodeError as e:
+        raise CommandError(f"{option} no es JSON válido: {e}")
+    if not isinstance(value, dict):
+        raise CommandError(f"{option} debe ser un objeto {{slot: [valores]}}")
+    return {k: v if isinstance(v, list) else [v] for k, v in value.items()}
+
+
+class Command(BaseCommand):
+    help = (
+        "Exporta en streaming (NDJSON o CSV) los empleos que cumplen filtros con la estructura de decide_jobs, "
+        "leyendo con un cursor del servidor"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--include", default="{}", help='Filtros JSON, p.ej. \'{"industry": ["Tecnología"]}\'')
+        parser.add_argument("--exclude", default="{}", help="Exclusiones JSON, misma forma que --include")
+        parser.add_argument("--salary-min", type=int, help="Sueldo mínimo (como salary_min de decide_jobs)")
+        parser.add_argument("--currency", help="Moneda de --salary-min (CLP o USD)")
+        parser.add_argument("--format", choices=sorted(EXPORT_FORMATS), default="ndjson")
+        parser.add_argument("--output", help="Archivo de salida (por defecto stdout)")
+        parser.add_argument("--chunk-size", type=int, help="Filas por FETCH del cursor (por defecto EXPORT_CHUNK_SIZE)")
+
+    def handle(self, *args, **opts):
+        include = _filters(opts["include"], "--include")
+        exclude = _filters(opts["exclude"], "--exclude")
+        unsupported = [k for k in exclude if k in EXCLUDE_UNSUPPORTED]
+        if unsupported:
+            raise CommandError(f"--exclude no acepta {', '.join(unsupported)} (usar --salary-min)")
+        # _apply imprime el detalle de cada filtro: que no se mezcle con la exportación
+        with contextlib.redirect_stdout(io.StringIO()):
+            queryset = export_queryset(include, exclude, opts["salary_min"], opts["currency"])
+        rows = iter_rows(queryset, opts["chunk_size"])
+
+        if not opts["output"]:
+            for line in export_lines(opts["format"], rows):
+                self.stdout.write(line, ending="")
+            return
+        exported = 0
+        with open(opts["output"], "w", encoding="utf-8", newline="") as out:
+            for line in export_lines(opts["format"], rows):
+                out.write(line)
+                exported += 1
+        # El encabezado del CSV no cuenta como empleo
+        if opts["format"] == "csv":
+            exported -= 1
+        self.stderr.write(self.style.SUCCESS(f"OK {exported} empleos exportados en {opts['output']}"))
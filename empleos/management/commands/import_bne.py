@@ -6,6 +6,7 @@ import requests
 from datetime import datetime
 from django.core.management.base import BaseCommand
 from django.utils import timezone
+from empleos.catalog import bump_data_version
 from empleos.models import Source, Company, Location, JobPosting
 from empleos.nlp import parse_prompt, _norm
 
@@ -693,6 +694,9 @@ class Command(BaseCommand):
                     import traceback
                     traceback.print_exc()
             
+            if created_count or updated_count:
+                bump_data_version()
+            
             # 5. Resumen
             print("\n" + "=" * 80)
             print("✅ IMPORTACIÓN COMPLETADA")
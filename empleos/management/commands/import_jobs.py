@@ -1,5 +1,6 @@
 import json
 from django.core.management.base import BaseCommand
+from empleos.catalog import bump_data_version
 from empleos.models import Source, Company, Location, JobPosting, Tag, JobTag, Benefit, JobBenefit
 
 def _get_or_create(model, **kwargs):
@@ -24,6 +25,7 @@ class Command(BaseCommand):
             self.import_file(opts["computrabajo"], source_name="Computrabajo")
         if opts.get("laborum"):
             self.import_file(opts["laborum"], source_name="Laborum")
+        bump_data_version()
 
     def import_file(self, path, source_name):
         self.stdout.write(self.style.WARNING(f"Importando {source_name} desde {path} ..."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from empleos.catalog import bump_data_version
+
+
+class Command(BaseCommand):
+    help = (
+        "Refresca la vista de búsqueda y la tabla de sinónimos e incrementa la versión del catálogo "
+        "(lo que las altas por la API dejan para después del request; pensado para cron)"
+    )
+
+    def handle(self, *args, **opts):
+        version = bump_data_version()
+        self.stdout.write(self.style.SUCCESS(f"OK catálogo v{version}"))
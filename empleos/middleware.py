@@ -0,0 +1,15 @@
+from .catalog import request_data_version
+
+
+class CatalogVersionMiddleware:
+    """
+    Resuelve la versión del catálogo una vez por request (ver catalog.current_data_version)
+    en vez de una consulta por cada get_taxonomy() / caché / índice.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with request_data_version():
+            return self.get_response(request)
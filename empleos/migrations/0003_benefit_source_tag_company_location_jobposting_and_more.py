@@ -0,0 +1,140 @@
+# Generated by Django 5.0.14 on 2025-10-18 18:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0002_conversation'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Benefit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Company',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(db_index=True, max_length=255)),
+                ('verified', models.BooleanField(default=False, help_text='Solo algunos portales lo exponen (Laborum)')),
+                ('rating', models.DecimalField(blank=True, decimal_places=1, max_digits=3, null=True)),
+            ],
+            options={
+                'unique_together': {('name',)},
+            },
+        ),
+        migrations.CreateModel(
+            name='JobBenefit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('benefit', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='benefit_jobs', to='empleos.benefit')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source_job_id', models.CharField(blank=True, help_text='ID del portal si existe (p.ej. Laborum id_oferta).', max_length=64, null=True)),
+                ('url', models.URLField(max_length=1000, unique=True)),
+                ('hash', models.CharField(blank=True, db_index=True, max_length=64, null=True)),
+                ('title', models.CharField(max_length=500)),
+                ('published_date', models.DateField(blank=True, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('work_modality', models.CharField(blank=True, help_text='remoto/híbrido/presencial', max_length=30, null=True)),
+                ('contract_type', models.CharField(blank=True, max_length=60, null=True)),
+                ('workday', models.CharField(blank=True, help_text='full-time/part-time', max_length=30, null=True)),
+                ('salary_text', models.CharField(blank=True, max_length=200, null=True)),
+                ('accessibility_mentioned', models.BooleanField(default=False)),
+                ('transport_mentioned', models.BooleanField(default=False)),
+                ('disability_friendly', models.BooleanField(default=False)),
+                ('multiple_vacancies', models.BooleanField(default=False)),
+                ('area', models.CharField(blank=True, max_length=120, null=True)),
+                ('subarea', models.CharField(blank=True, max_length=120, null=True)),
+                ('min_experience', models.CharField(blank=True, max_length=120, null=True)),
+                ('min_education', models.CharField(blank=True, max_length=120, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='jobs', to='empleos.company')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='JobTag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('accessibility', 'Accessibility'), ('transport', 'Transport'), ('other', 'Other')], default='other', max_length=20)),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_tags', to='empleos.jobposting')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Location',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('raw_text', models.CharField(db_index=True, max_length=255)),
+            ],
+            options={
+                'unique_together': {('raw_text',)},
+            },
+        ),
+        migrations.CreateModel(
+            name='Source',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('base_url', models.URLField(blank=True, null=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=120, unique=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='jobbenefit',
+            name='job',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='job_benefits', to='empleos.jobposting'),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='location',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='empleos.location'),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='source',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='jobs', to='empleos.source'),
+        ),
+        migrations.AddField(
+            model_name='jobtag',
+            name='tag',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='tagged_jobs', to='empleos.tag'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobbenefit',
+            unique_together={('job', 'benefit')},
+        ),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['published_date'], name='empleos_job_publish_4175ff_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['title'], name='empleos_job_title_70c301_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['hash'], name='empleos_job_hash_4f10d6_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='jobtag',
+            unique_together={('job', 'tag', 'kind')},
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.0.14 on 2025-10-18 18:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0003_benefit_source_tag_company_location_jobposting_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='jobposting',
+            name='salary_text',
+            field=models.CharField(blank=True, max_length=200, null=True),
+        ),
+        migrations.AlterField(
+            model_name='jobposting',
+            name='title',
+            field=models.CharField(max_length=500),
+        ),
+    ]
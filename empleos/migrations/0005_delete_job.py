@@ -0,0 +1,16 @@
+# Generated by Django 5.0.14 on 2025-11-02 14:05
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0004_alter_jobposting_salary_text_alter_jobposting_title_and_more'),
+    ]
+
+    operations = [
+        migrations.DeleteModel(
+            name='Job',
+        ),
+    ]
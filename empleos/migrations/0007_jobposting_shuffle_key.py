@@ -0,0 +1,43 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:15
+
+import random
+
+import empleos.models
+from django.db import migrations, models
+
+# Copia de models.SHUFFLE_KEY_SPACE al momento de esta migración
+SHUFFLE_KEY_SPACE = 2**31 - 1
+
+
+def randomize_shuffle_keys(apps, schema_editor):
+    # AddField usa un solo valor por defecto para las filas existentes
+    JobPosting = apps.get_model('empleos', 'JobPosting')
+    batch = []
+    for job in JobPosting.objects.only('id').iterator(chunk_size=2000):
+        job.shuffle_key = random.randrange(SHUFFLE_KEY_SPACE)
+        batch.append(job)
+        if len(batch) >= 2000:
+            JobPosting.objects.bulk_update(batch, ['shuffle_key'])
+            batch = []
+    if batch:
+        JobPosting.objects.bulk_update(batch, ['shuffle_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0006_catalogversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposting',
+            name='shuffle_key',
+            field=models.IntegerField(default=empleos.models.random_shuffle_key, editable=False),
+        ),
+        migrations.RunPython(randomize_shuffle_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=models.Index(fields=['shuffle_key', 'id'], name='empleos_job_shuffle_55b793_idx'),
+        ),
+    ]
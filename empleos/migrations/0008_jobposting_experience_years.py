@@ -0,0 +1,26 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:34
+
+from django.db import migrations, models
+
+# Solo esquema: las filas existentes se completan con `manage.py backfill_job_fields`
+# (aplica las reglas vigentes de normalize, no las de esta migración)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0007_jobposting_shuffle_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposting',
+            name='min_experience_years',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='seniority',
+            field=models.CharField(blank=True, choices=[('junior', 'Junior'), ('semi', 'Semi Senior'), ('senior', 'Senior')], db_index=True, max_length=10, null=True),
+        ),
+    ]
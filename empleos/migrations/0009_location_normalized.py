@@ -0,0 +1,41 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:36
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+# Solo esquema: las filas existentes se completan con `manage.py backfill_job_fields`
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0008_jobposting_experience_years'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='comuna',
+            field=models.CharField(blank=True, db_index=True, max_length=120, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='is_junk',
+            field=models.BooleanField(db_index=True, default=False),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='region',
+            field=models.CharField(blank=True, db_index=True, max_length=60, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='tokens',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=60), blank=True, default=list, size=None),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tokens'], name='empleos_loc_tokens_787657_gin'),
+        ),
+    ]
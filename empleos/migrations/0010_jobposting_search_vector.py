@@ -0,0 +1,49 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:38
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Título (A) + subárea (B), configuración "spanish" (ver JobPosting.search_vector y engine._role_query)
+CREATE_TRIGGER = """
+CREATE OR REPLACE FUNCTION empleos_jobposting_search_vector() RETURNS trigger AS $$
+BEGIN
+    -- "Operarios/as" se leería como ruta de archivo: la barra se separa antes
+    NEW.search_vector :=
+        setweight(to_tsvector('spanish', translate(coalesce(NEW.title, ''), '/', ' ')), 'A') ||
+        setweight(to_tsvector('spanish', translate(coalesce(NEW.subarea, ''), '/', ' ')), 'B');
+    RETURN NEW;
+END
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER empleos_jobposting_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, subarea ON empleos_jobposting
+    FOR EACH ROW EXECUTE FUNCTION empleos_jobposting_search_vector();
+
+UPDATE empleos_jobposting SET title = title;
+"""
+
+DROP_TRIGGER = """
+DROP TRIGGER IF EXISTS empleos_jobposting_search_vector_update ON empleos_jobposting;
+DROP FUNCTION IF EXISTS empleos_jobposting_search_vector();
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0009_location_normalized'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposting',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGER, DROP_TRIGGER),
+        migrations.AddIndex(
+            model_name='jobposting',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='empleos_job_search__0391d4_gin'),
+        ),
+    ]
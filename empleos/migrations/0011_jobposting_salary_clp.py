@@ -0,0 +1,30 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:47
+
+from django.db import migrations, models
+
+# Solo esquema: las filas existentes se completan con `manage.py backfill_salaries`
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0010_jobposting_search_vector'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposting',
+            name='salary_max_clp',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='salary_min_clp',
+            field=models.PositiveIntegerField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='salary_period',
+            field=models.CharField(blank=True, choices=[('hour', 'Por hora'), ('day', 'Diario'), ('week', 'Semanal'), ('month', 'Mensual'), ('year', 'Anual')], max_length=10, null=True),
+        ),
+    ]
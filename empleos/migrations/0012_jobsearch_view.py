@@ -0,0 +1,106 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:55
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.search
+from django.db import migrations, models
+
+# lower() + sin tildes; mismo resultado que normalize.strip_accents(...).lower() en Python
+ACCENTED = "ÁÀÂÄÉÈÊËÍÌÎÏÓÒÔÖÚÙÛÜÑÇáàâäéèêëíìîïóòôöúùûüñç"
+PLAIN = "AAAAEEEEIIIIOOOOUUUUNCaaaaeeeeiiiioooouuuunc"
+
+
+def _norm(column):
+    return f"lower(translate({column}, '{ACCENTED}', '{PLAIN}'))"
+
+
+CREATE_VIEW = f"""
+CREATE MATERIALIZED VIEW empleos_jobsearch AS
+SELECT
+    j.id, j.title, j.url, j.published_date, j.work_modality, j.contract_type, j.workday,
+    j.salary_text, j.salary_min_clp, j.salary_max_clp,
+    j.accessibility_mentioned, j.transport_mentioned, j.disability_friendly,
+    j.area, j.subarea, j.min_experience, j.min_education, j.min_experience_years, j.seniority,
+    j.shuffle_key, j.search_vector,
+    c.name AS company_name, c.verified AS company_verified, c.rating AS company_rating,
+    s.name AS source_name,
+    l.raw_text AS location_raw_text, l.tokens AS location_tokens,
+    l.region AS location_region, l.is_junk AS location_is_junk,
+    {_norm("j.area")} AS area_norm,
+    {_norm("j.subarea")} AS subarea_norm,
+    {_norm("j.work_modality")} AS modality_norm,
+    {_norm("j.title")} AS title_norm,
+    {_norm("l.raw_text")} AS location_norm
+FROM empleos_jobposting j
+JOIN empleos_company c ON c.id = j.company_id
+JOIN empleos_source s ON s.id = j.source_id
+LEFT JOIN empleos_location l ON l.id = j.location_id;
+
+-- REFRESH ... CONCURRENTLY necesita un índice único
+CREATE UNIQUE INDEX empleos_jobsearch_id ON empleos_jobsearch (id);
+CREATE INDEX empleos_jobsearch_area_norm ON empleos_jobsearch (area_norm);
+CREATE INDEX empleos_jobsearch_subarea_norm ON empleos_jobsearch (subarea_norm);
+CREATE INDEX empleos_jobsearch_modality_norm ON empleos_jobsearch (modality_norm);
+CREATE INDEX empleos_jobsearch_location_norm ON empleos_jobsearch (location_norm);
+CREATE INDEX empleos_jobsearch_region ON empleos_jobsearch (location_region);
+CREATE INDEX empleos_jobsearch_years ON empleos_jobsearch (min_experience_years);
+CREATE INDEX empleos_jobsearch_salary ON empleos_jobsearch (salary_max_clp);
+CREATE INDEX empleos_jobsearch_published ON empleos_jobsearch (published_date);
+CREATE INDEX empleos_jobsearch_shuffle ON empleos_jobsearch (shuffle_key, id);
+CREATE INDEX empleos_jobsearch_tokens ON empleos_jobsearch USING gin (location_tokens);
+CREATE INDEX empleos_jobsearch_vector ON empleos_jobsearch USING gin (search_vector);
+"""
+
+DROP_VIEW = "DROP MATERIALIZED VIEW IF EXISTS empleos_jobsearch"
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0011_jobposting_salary_clp'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSearch',
+            fields=[
+                ('id', models.IntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=500)),
+                ('url', models.URLField(max_length=1000)),
+                ('published_date', models.DateField(blank=True, null=True)),
+                ('work_modality', models.CharField(blank=True, max_length=30, null=True)),
+                ('contract_type', models.CharField(blank=True, max_length=60, null=True)),
+                ('workday', models.CharField(blank=True, max_length=30, null=True)),
+                ('salary_text', models.CharField(blank=True, max_length=200, null=True)),
+                ('salary_min_clp', models.PositiveIntegerField(blank=True, null=True)),
+                ('salary_max_clp', models.PositiveIntegerField(blank=True, null=True)),
+                ('accessibility_mentioned', models.BooleanField()),
+                ('transport_mentioned', models.BooleanField()),
+                ('disability_friendly', models.BooleanField()),
+                ('area', models.CharField(blank=True, max_length=120, null=True)),
+                ('subarea', models.CharField(blank=True, max_length=120, null=True)),
+                ('min_experience', models.CharField(blank=True, max_length=120, null=True)),
+                ('min_education', models.CharField(blank=True, max_length=120, null=True)),
+                ('min_experience_years', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('seniority', models.CharField(blank=True, choices=[('junior', 'Junior'), ('semi', 'Semi Senior'), ('senior', 'Senior')], max_length=10, null=True)),
+                ('shuffle_key', models.IntegerField()),
+                ('search_vector', django.contrib.postgres.search.SearchVectorField(null=True)),
+                ('company_name', models.CharField(max_length=255)),
+                ('company_verified', models.BooleanField()),
+                ('company_rating', models.DecimalField(blank=True, decimal_places=1, max_digits=3, null=True)),
+                ('source_name', models.CharField(max_length=100)),
+                ('location_raw_text', models.CharField(blank=True, max_length=255, null=True)),
+                ('location_tokens', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=60), blank=True, null=True, size=None)),
+                ('location_region', models.CharField(blank=True, max_length=60, null=True)),
+                ('location_is_junk', models.BooleanField(blank=True, null=True)),
+                ('area_norm', models.CharField(blank=True, max_length=120, null=True)),
+                ('subarea_norm', models.CharField(blank=True, max_length=120, null=True)),
+                ('modality_norm', models.CharField(blank=True, max_length=30, null=True)),
+                ('title_norm', models.CharField(blank=True, max_length=500, null=True)),
+                ('location_norm', models.CharField(blank=True, max_length=255, null=True)),
+            ],
+            options={
+                'db_table': 'empleos_jobsearch',
+                'managed': False,
+            },
+        ),
+        migrations.RunSQL(CREATE_VIEW, DROP_VIEW),
+    ]
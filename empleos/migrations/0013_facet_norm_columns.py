@@ -0,0 +1,53 @@
+# Generated by Django 5.0.14 on 2026-10-17 19:58
+
+from importlib import import_module
+
+from django.db import migrations, models
+
+jobsearch_view = import_module('empleos.migrations.0012_jobsearch_view')
+
+
+# La vista de búsqueda toma las facetas normalizadas de las columnas nuevas
+# (antes las calculaba con translate/lower al refrescar). Solo esquema: las filas
+# existentes se completan con `manage.py backfill_job_fields`, que además refresca la vista
+CREATE_VIEW = (
+    jobsearch_view.CREATE_VIEW
+    .replace(f'{jobsearch_view._norm("j.area")} AS area_norm', 'j.area_norm')
+    .replace(f'{jobsearch_view._norm("j.subarea")} AS subarea_norm', 'j.subarea_norm')
+    .replace(f'{jobsearch_view._norm("j.work_modality")} AS modality_norm', 'j.modality_norm')
+    .replace(f'{jobsearch_view._norm("l.raw_text")} AS location_norm', 'l.raw_text_norm AS location_norm')
+)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0012_jobsearch_view'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobposting',
+            name='area_norm',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=120, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='modality_norm',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=30, null=True),
+        ),
+        migrations.AddField(
+            model_name='jobposting',
+            name='subarea_norm',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=120, null=True),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='raw_text_norm',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=255, null=True),
+        ),
+        migrations.RunSQL(
+            [jobsearch_view.DROP_VIEW, CREATE_VIEW],
+            [jobsearch_view.DROP_VIEW, jobsearch_view.CREATE_VIEW],
+        ),
+    ]
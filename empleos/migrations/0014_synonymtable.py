@@ -0,0 +1,22 @@
+# Generated by Django 5.0.14 on 2026-10-17 20:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0013_facet_norm_columns'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SynonymTable',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=0)),
+                ('synonyms', models.JSONField(default=list)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.db import migrations
+
+# Columnas que el engine todavía filtra por subcadena: el fallback de seniority
+# (`min_experience__icontains`, ver engine._build_conditions), sobre JobPosting y la vista.
+# Las facetas usan las columnas *_norm (b-tree) y el cargo usa search_vector (GIN, migración 0010).
+# icontains genera UPPER("col"::text) LIKE UPPER(%s): el índice usa esa misma expresión.
+TRIGRAM_INDEXES = [
+    ('empleos_job_min_experience_trgm', 'empleos_jobposting', 'min_experience'),
+    ('empleos_jobsearch_min_experience_trgm', 'empleos_jobsearch', 'min_experience'),
+]
+
+
+def _trigram_available(schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SELECT count(*) FROM pg_available_extensions WHERE name = 'pg_trgm'")
+        return cursor.fetchone()[0] == 1
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if not _trigram_available(schema_editor):
+        # Sin la extensión el icontains sigue funcionando, con seq scan
+        print("\n⚠️  pg_trgm no disponible: se omiten los índices trigram")
+        return
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin (upper(("{column}")::text) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    for name, _, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0014_synonymtable'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
@@ -0,0 +1,69 @@
+import re
+
+from django.db import migrations
+from django.db.models import F, Q
+
+# Copia de normalize.norm_text al momento de esta migración (ñ → n, ü → u): la
+# migración no debe cambiar si más adelante cambia normalize
+_NORM_DROP_RE = re.compile(r"[^a-z0-9\s\/\-\+\$\.]")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def norm_text(text):
+    if text is None:
+        return None
+    text = str(text).lower()
+    text = text.replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u")
+    text = text.replace("ü", "u").replace("ñ", "n")
+    text = _NORM_DROP_RE.sub(" ", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def _has_folded_letters(*fields):
+    q = Q()
+    for field in fields:
+        for letter in ("ñ", "ü"):
+            q |= Q(**{f"{field}__icontains": letter})
+    return q
+
+
+def refold_norm_columns(apps, schema_editor):
+    # Antes ñ y ü quedaban como espacio ("Diseño" → "dise o"): solo cambian las filas que las tienen
+    JobPosting = apps.get_model('empleos', 'JobPosting')
+    Location = apps.get_model('empleos', 'Location')
+    CatalogVersion = apps.get_model('empleos', 'CatalogVersion')
+
+    fields = ['area_norm', 'subarea_norm', 'modality_norm']
+    batch = []
+    jobs = JobPosting.objects.filter(_has_folded_letters('area', 'subarea', 'work_modality'))
+    for job in jobs.only('id', 'area', 'subarea', 'work_modality', *fields).iterator(chunk_size=2000):
+        job.area_norm = norm_text(job.area)
+        job.subarea_norm = norm_text(job.subarea)
+        job.modality_norm = norm_text(job.work_modality)
+        batch.append(job)
+    JobPosting.objects.bulk_update(batch, fields, batch_size=2000)
+    changed = len(batch)
+
+    batch = []
+    locations = Location.objects.filter(_has_folded_letters('raw_text'))
+    for loc in locations.only('id', 'raw_text', 'raw_text_norm').iterator(chunk_size=2000):
+        loc.raw_text_norm = norm_text(loc.raw_text)
+        batch.append(loc)
+    Location.objects.bulk_update(batch, ['raw_text_norm'], batch_size=2000)
+    changed += len(batch)
+
+    if changed:
+        # La vista copia las columnas *_norm; la versión nueva invalida índices y cachés
+        schema_editor.execute("REFRESH MATERIALIZED VIEW empleos_jobsearch")
+        CatalogVersion.objects.filter(pk=1).update(version=F('version') + 1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('empleos', '0015_trigram_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(refold_norm_columns, migrations.RunPython.noop),
+    ]
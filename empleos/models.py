@@ -1,5 +1,20 @@
+import random
+
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
+from .normalize import norm_text, parse_experience_years, parse_location, parse_salary, seniority_for_years
+
+
+# Rango de la clave aleatoria por fila que usa el modo variedad (ver engine._get_varied_results)
+SHUFFLE_KEY_SPACE = 2**31 - 1
+
+
+def random_shuffle_key():
+    return random.randrange(SHUFFLE_KEY_SPACE)
+
 
 class Conversation(models.Model):
 
@@ -38,17 +53,53 @@ class Company(models.Model):
 class Location(models.Model):
     """
     Ubicación textual (puede ser comuna + región).
-    Si más adelante necesitas normalizar a regiones/comunas, puedes
-    añadir campos o una jerarquía.
+    Al guardar se derivan comuna/región normalizadas, las palabras de búsqueda
+    (`tokens`) y si el texto es basura del portal (ver normalize.parse_location).
     """
     raw_text = models.CharField(max_length=255, db_index=True)
+    comuna = models.CharField(max_length=120, blank=True, null=True, db_index=True)
+    region = models.CharField(max_length=60, blank=True, null=True, db_index=True)
+    tokens = ArrayField(models.CharField(max_length=60), default=list, blank=True)
+    is_junk = models.BooleanField(default=False, db_index=True)
+    # raw_text con las reglas de nlp._norm, para comparar sin tildes (ver normalize.norm_text)
+    raw_text_norm = models.CharField(max_length=255, blank=True, null=True, db_index=True, editable=False)
 
     class Meta:
         unique_together = [("raw_text",)]
+        indexes = [GinIndex(fields=["tokens"])]
 
     def __str__(self):
         return self.raw_text
 
+    def refresh_derived_fields(self):
+        parsed = parse_location(self.raw_text)
+        self.comuna = parsed["comuna"]
+        self.region = parsed["region"]
+        self.tokens = parsed["tokens"]
+        self.is_junk = parsed["is_junk"]
+        self.raw_text_norm = norm_text(self.raw_text)
+
+    def save(self, *args, **kwargs):
+        self.refresh_derived_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "raw_text" in update_fields:
+            kwargs["update_fields"] = set(update_fields) | {"comuna", "region", "tokens", "is_junk", "raw_text_norm"}
+        super().save(*args, **kwargs)
+
+
+class Seniority(models.TextChoices):
+    JUNIOR = "junior", "Junior"
+    SEMI = "semi", "Semi Senior"
+    SENIOR = "senior", "Senior"
+
+
+class SalaryPeriod(models.TextChoices):
+    HOUR = "hour", "Por hora"
+    DAY = "day", "Diario"
+    WEEK = "week", "Semanal"
+    MONTH = "month", "Mensual"
+    YEAR = "year", "Anual"
+
 
 class JobPosting(models.Model):
     """
@@ -71,6 +122,10 @@ class JobPosting(models.Model):
     contract_type = models.CharField(max_length=60, blank=True, null=True)
     workday = models.CharField(max_length=30, blank=True, null=True, help_text="full-time/part-time")
     salary_text = models.CharField(max_length=200, blank=True, null=True)
+    # Derivados de salary_text al guardar: CLP mensuales equivalentes (ver normalize.parse_salary)
+    salary_min_clp = models.PositiveIntegerField(blank=True, null=True, db_index=True)
+    salary_max_clp = models.PositiveIntegerField(blank=True, null=True, db_index=True)
+    salary_period = models.CharField(max_length=10, choices=SalaryPeriod.choices, blank=True, null=True)
 
     # Inclusión / transporte
     accessibility_mentioned = models.BooleanField(default=False)
@@ -87,6 +142,24 @@ class JobPosting(models.Model):
     min_experience = models.CharField(max_length=120, blank=True, null=True)
     min_education = models.CharField(max_length=120, blank=True, null=True)
 
+    # Facetas con las reglas de nlp._norm (normalize.norm_text): el engine las compara
+    # con igualdad / IN / contains sin repetir lower() ni tildes en cada búsqueda
+    area_norm = models.CharField(max_length=120, blank=True, null=True, db_index=True, editable=False)
+    subarea_norm = models.CharField(max_length=120, blank=True, null=True, db_index=True, editable=False)
+    modality_norm = models.CharField(max_length=30, blank=True, null=True, db_index=True, editable=False)
+
+    # Derivados de min_experience al guardar (ver normalize.py)
+    min_experience_years = models.PositiveSmallIntegerField(blank=True, null=True, db_index=True)
+    seniority = models.CharField(max_length=10, choices=Seniority.choices, blank=True, null=True, db_index=True)
+
+    # Clave aleatoria fija por fila: orden "barajado" para el modo variedad
+    shuffle_key = models.IntegerField(default=random_shuffle_key, editable=False)
+
+    # Texto completo en español (título peso A, subárea peso B) para buscar por cargo.
+    # Lo mantiene un trigger de Postgres en cada INSERT/UPDATE (migración 0010),
+    # así que también cubre bulk_create/update.
+    search_vector = SearchVectorField(null=True, editable=False)
+
     # Timestamps locales
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -96,11 +169,92 @@ class JobPosting(models.Model):
             models.Index(fields=["published_date"]),
             models.Index(fields=["title"]),
             models.Index(fields=["hash"]),
+            models.Index(fields=["shuffle_key", "id"]),
+            GinIndex(fields=["search_vector"]),
         ]
 
     def __str__(self):
         return f"{self.title} @ {self.company.name}"
 
+    def refresh_derived_fields(self):
+        """Recalcula las columnas estructuradas a partir de los textos del portal."""
+        self.min_experience_years = parse_experience_years(self.min_experience)
+        self.seniority = seniority_for_years(self.min_experience_years)
+        self.area_norm = norm_text(self.area)
+        self.subarea_norm = norm_text(self.subarea)
+        self.modality_norm = norm_text(self.work_modality)
+        if self.salary_text:
+            # Sin texto se respetan los montos que vengan explícitos (p.ej. desde la API)
+            self.salary_min_clp, self.salary_max_clp, self.salary_period = parse_salary(self.salary_text)
+
+    def save(self, *args, **kwargs):
+        self.refresh_derived_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None:
+            update_fields = set(update_fields)
+            if "min_experience" in update_fields:
+                update_fields |= {"min_experience_years", "seniority"}
+            if "salary_text" in update_fields:
+                update_fields |= {"salary_min_clp", "salary_max_clp", "salary_period"}
+            for source, derived in (("area", "area_norm"), ("subarea", "subarea_norm"), ("work_modality", "modality_norm")):
+                if source in update_fields:
+                    update_fields.add(derived)
+            kwargs["update_fields"] = update_fields
+        super().save(*args, **kwargs)
+
+
+class JobSearch(models.Model):
+    """
+    Fila angosta por empleo para buscar: vista materializada `empleos_jobsearch`
+    (migración 0012) con JobPosting + empresa / ubicación / fuente ya unidas y las
+    facetas en minúsculas y sin tildes (`*_norm`). Solo lectura; se refresca
+    (CONCURRENTLY) al terminar cada importación, ver search_view.py.
+    """
+    id = models.IntegerField(primary_key=True)
+    title = models.CharField(max_length=500)
+    url = models.URLField(max_length=1000)
+    published_date = models.DateField(blank=True, null=True)
+    work_modality = models.CharField(max_length=30, blank=True, null=True)
+    contract_type = models.CharField(max_length=60, blank=True, null=True)
+    workday = models.CharField(max_length=30, blank=True, null=True)
+    salary_text = models.CharField(max_length=200, blank=True, null=True)
+    salary_min_clp = models.PositiveIntegerField(blank=True, null=True)
+    salary_max_clp = models.PositiveIntegerField(blank=True, null=True)
+    accessibility_mentioned = models.BooleanField()
+    transport_mentioned = models.BooleanField()
+    disability_friendly = models.BooleanField()
+    area = models.CharField(max_length=120, blank=True, null=True)
+    subarea = models.CharField(max_length=120, blank=True, null=True)
+    min_experience = models.CharField(max_length=120, blank=True, null=True)
+    min_education = models.CharField(max_length=120, blank=True, null=True)
+    min_experience_years = models.PositiveSmallIntegerField(blank=True, null=True)
+    seniority = models.CharField(max_length=10, choices=Seniority.choices, blank=True, null=True)
+    shuffle_key = models.IntegerField()
+    search_vector = SearchVectorField(null=True)
+
+    company_name = models.CharField(max_length=255)
+    company_verified = models.BooleanField()
+    company_rating = models.DecimalField(max_digits=3, decimal_places=1, blank=True, null=True)
+    source_name = models.CharField(max_length=100)
+    location_raw_text = models.CharField(max_length=255, blank=True, null=True)
+    location_tokens = ArrayField(models.CharField(max_length=60), blank=True, null=True)
+    location_region = models.CharField(max_length=60, blank=True, null=True)
+    location_is_junk = models.BooleanField(blank=True, null=True)
+
+    # Facetas normalizadas: lower(sin tildes) de la columna del mismo nombre
+    area_norm = models.CharField(max_length=120, blank=True, null=True)
+    subarea_norm = models.CharField(max_length=120, blank=True, null=True)
+    modality_norm = models.CharField(max_length=30, blank=True, null=True)
+    title_norm = models.CharField(max_length=500, blank=True, null=True)
+    location_norm = models.CharField(max_length=255, blank=True, null=True)
+
+    class Meta:
+        managed = False
+        db_table = "empleos_jobsearch"
+
+    def __str__(self):
+        return f"{self.title} @ {self.company_name}"
+
 
 class Tag(models.Model):
     """
@@ -148,4 +302,29 @@ class JobBenefit(models.Model):
     benefit = models.ForeignKey(Benefit, on_delete=models.CASCADE, related_name="benefit_jobs")
 
     class Meta:
-        unique_together = [("job", "benefit")]
\ No newline at end of file
+        unique_together = [("job", "benefit")]
+
+class CatalogVersion(models.Model):
+    """
+    Contador global de versión del catálogo de empleos (fila única).
+    Los importadores lo incrementan al terminar para que los índices y cachés
+    de cada proceso sepan que deben reconstruirse.
+    """
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"v{self.version}"
+
+class SynonymTable(models.Model):
+    """
+    Tabla de sinónimos (estáticos + dinámicos) ya combinada, fila única.
+    La genera `build_synonyms` (y `catalog.bump_data_version` al terminar una
+    importación); los procesos la cargan en vez de recalcularla (ver nlp.get_enhanced_synonyms).
+    """
+    version = models.PositiveBigIntegerField(default=0)   # versión del catálogo con que se generó
+    synonyms = models.JSONField(default=list)             # [[canónico, [sinónimos]], ...] (conserva el orden)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"sinónimos v{self.version}"
@@ -1,7 +1,16 @@
 import re
-from typing import Dict, List, Tuple
+import time
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple, Tuple
+from django.db import ProgrammingError, OperationalError
 from django.db.models import Q
-from .models import JobPosting
+from .catalog import get_data_version
+from .models import JobPosting, SynonymTable
+from .normalize import norm_text
+from .fuzzy import OptionIndex
+from .synonyms import SynonymMatcher
+from .taxonomy import get_taxonomy
+from .tracing import span, traced_span
 
 SYNONYMS = {
     # Modalidades
@@ -170,18 +179,19 @@ def get_roles_from_db():
         print(f"Error obteniendo roles: {e}")
         return []
 
-# Funciones para obtener taxonomías dinámicamente (se llaman en tiempo real)
+# Funciones para obtener taxonomías dinámicamente: leen el snapshot de la versión
+# actual del catálogo (taxonomy.py), que consulta la BD una vez por versión
 def get_current_industries():
     """Obtiene las industrias actuales de la BD"""
-    return get_industries_from_db()
+    return list(get_taxonomy().value("industries", get_industries_from_db))
 
 def get_current_modalities():
     """Obtiene las modalidades actuales de la BD"""
-    return get_modalities_from_db()
+    return list(get_taxonomy().value("modalities", get_modalities_from_db))
 
 def get_current_seniorities():
     """Obtiene los seniorities actuales de la BD"""
-    return get_seniorities_from_db()
+    return list(get_taxonomy().value("seniorities", get_seniorities_from_db))
 
 def get_current_areas():
     """Obtiene las áreas funcionales (subáreas) actuales de la BD
@@ -189,15 +199,23 @@ def get_current_areas():
     IMPORTANTE: En el frontend, "área funcional" corresponde al campo 'subarea' en la BD,
     no al campo 'area' (que es para industrias).
     """
-    return get_subareas_from_db()
+    return list(get_taxonomy().value("subareas", get_subareas_from_db))
 
 def get_current_locations():
     """Obtiene las ubicaciones actuales de la BD"""
-    return get_locations_from_db()
+    return list(get_taxonomy().value("locations", get_locations_from_db))
 
 def get_current_roles():
     """Obtiene los roles actuales de la BD"""
-    return get_roles_from_db()
+    return list(get_taxonomy().value("roles", get_roles_from_db))
+
+def get_role_index(taxonomy=None) -> OptionIndex:
+    """Índice invertido de los roles actuales para _fuzzy_match (una vez por versión, ver fuzzy.py)"""
+    return (taxonomy or get_taxonomy()).value("role_index", lambda: OptionIndex(get_current_roles()))
+
+def get_location_index(taxonomy=None) -> OptionIndex:
+    """Índice invertido de las ubicaciones actuales para _fuzzy_match (una vez por versión, ver fuzzy.py)"""
+    return (taxonomy or get_taxonomy()).value("location_index", lambda: OptionIndex(get_current_locations()))
 
 def generate_dynamic_synonyms():
     """
@@ -281,7 +299,7 @@ def generate_dynamic_synonyms():
                             dynamic_synonyms.setdefault('tecnología', []).append(word)
         
         # 2. AGREGAR SUBAREAS COMO SINÓNIMOS DE ÁREAS
-        subareas = JobPosting.objects.exclude(subarea__isnull=True).exclude(subarea='').values_list('subarea', flat=True).distinct()
+        subareas = areas
         subarea_to_area_map = {
             'datos': ['sistemas', 'desarrollo', 'software', 'programación', 'programacion'],
             'diseño': ['diseño gráfico', 'diseño web', 'gráfico', 'web'],
@@ -395,8 +413,49 @@ def generate_dynamic_synonyms():
 
 def get_enhanced_synonyms():
     """
-    Combina los sinónimos estáticos con los dinámicos de la BD.
+    Combina los sinónimos estáticos con los dinámicos de la BD: la tabla que guardó
+    build_synonyms (SynonymTable), cargada una vez por versión del catálogo (ver taxonomy.py).
+    """
+    taxonomy = get_taxonomy()
+    return taxonomy.value("enhanced_synonyms", lambda: _load_enhanced_synonyms(taxonomy.version))
+
+_SYNONYM_TABLE_ID = 1
+
+def build_synonym_table(version: int = None) -> dict:
+    """
+    Genera los sinónimos combinados y los guarda en SynonymTable con la versión del
+    catálogo (comando build_synonyms y catalog.bump_data_version).
+    """
+    if version is None:
+        version = get_data_version()
+    synonyms = _build_enhanced_synonyms()
+    SynonymTable.objects.update_or_create(
+        pk=_SYNONYM_TABLE_ID,
+        defaults={"version": version, "synonyms": [[canon, values] for canon, values in synonyms.items()]},
+    )
+    print(f"📚 Tabla de sinónimos v{version} guardada ({len(synonyms)} categorías)")
+    return synonyms
+
+def _load_enhanced_synonyms(catalog_version: int):
+    """
+    Tabla guardada por build_synonym_table para `catalog_version`. Si todavía no existe
+    o es de otra versión, se generan en el proceso (como antes): lo que se devuelve
+    queda en el snapshot de esa versión hasta la próxima importación.
     """
+    try:
+        stored = SynonymTable.objects.filter(pk=_SYNONYM_TABLE_ID).values_list("version", "synonyms").first()
+    except (ProgrammingError, OperationalError):
+        stored = None
+    if stored is None:
+        print("⚠️  Sin tabla de sinónimos guardada (correr build_synonyms): se generan en este proceso")
+        return _build_enhanced_synonyms()
+    version, pairs = stored
+    if version != catalog_version:
+        print(f"⚠️  Tabla de sinónimos v{version} con catálogo v{catalog_version}: se generan en este proceso")
+        return _build_enhanced_synonyms()
+    return {canon: values for canon, values in pairs}
+
+def _build_enhanced_synonyms():
     static_synonyms = SYNONYMS.copy()
     dynamic_synonyms = generate_dynamic_synonyms()
     
@@ -422,15 +481,58 @@ def _inv_synonyms() -> Dict[str,str]:
     return inv
 
 def get_current_inv_synonyms():
-    """Obtiene sinónimos inversos actuales basados en datos de BD"""
-    return _inv_synonyms()
+    """Obtiene sinónimos inversos actuales basados en datos de BD (compartido: no modificar)"""
+    return get_taxonomy().value("inv_synonyms", _inv_synonyms)
+
+# Canónicos de sinónimos de cada slot → valor que se guarda en include / exclude
+MODALITY_CANONS = {"remoto": "Remoto", "híbrido": "Híbrido", "presencial": "Presencial"}
+SENIORITY_CANONS = {"junior": "Junior", "semi": "Semi", "senior": "Senior"}
+INDUSTRY_CANONS = {
+    "tecnología": "Tecnología", "educación": "Educación",
+    "salud": "Salud", "finanzas": "Finanzas",
+    "retail": "Retail", "manufactura": "Manufactura", "servicios": "Servicios",
+}
+# Áreas: canónico → nombres reales de las áreas en la BD ("desarrollo" se busca en la BD)
+AREA_CANONS = {
+    "datos": ["Desarrollo / datos"],  # Solo si dice específicamente "datos"
+    "desarrollo": [],
+    "infraestructura": ["Tecnología"],
+    "calidad": ["Servicios Generales"],
+    "soporte": ["Servicios Generales"],
+    "diseño": ["Diseño"],
+    "gastronomía": ["Gastronomía"],
+    "cultura": ["Cultura"],
+    "salud": ["Salud"],
+    "construcción": ["Construcción"],
+    "transporte": ["Transporte"],
+    "turismo": ["Turismo"],
+    "finanzas": ["Finanzas"],
+    "rrhh": ["Recursos Humanos"],
+    "tecnología": ["Tecnología"],
+}
+ROLE_CANONS = {
+    "data analyst": "Data Analyst", "data engineer": "Data Engineer",
+    "backend developer": "Backend Developer", "full stack dev": "Full Stack Dev",
+    "qa analyst": "QA Analyst", "devops engineer": "DevOps Engineer", "ux/ui designer": "UX/UI Designer",
+}
+SYNONYM_SLOTS = {
+    "modality": MODALITY_CANONS,
+    "seniority": SENIORITY_CANONS,
+    "industry": INDUSTRY_CANONS,
+    "area": AREA_CANONS,
+    "role": ROLE_CANONS,
+}
+
+def _synonym_slots(canon: str) -> Tuple[str, ...]:
+    return tuple(slot for slot, canons in SYNONYM_SLOTS.items() if canon in canons)
+
+def get_synonym_matcher(taxonomy=None) -> SynonymMatcher:
+    """Sinónimos inversos compilados en un autómata (una vez por versión de la taxonomía, ver synonyms.py)"""
+    return (taxonomy or get_taxonomy()).value("synonym_matcher", lambda: SynonymMatcher(get_current_inv_synonyms(), _synonym_slots))
 
 def _norm(s: str) -> str:
-    s = s.lower()
-    s = s.replace("á","a").replace("é","e").replace("í","i").replace("ó","o").replace("ú","u")
-    s = re.sub(r"[^a-z0-9\s\/\-\+\$\.]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    # Mismas reglas que las columnas *_norm de la BD (normalize.norm_text)
+    return norm_text(s)
 
 def _is_whole_word(text: str, word: str) -> bool:
     """
@@ -442,15 +544,20 @@ def _is_whole_word(text: str, word: str) -> bool:
     # Normalizar ambos para comparar correctamente
     text_norm = _norm(text)
     word_norm = _norm(word)
+    if word_norm not in text_norm:
+        return False
     # Usar \b para límites de palabra, pero permitir que la palabra esté sola o entre espacios/palabra
     pattern = r"\b" + re.escape(word_norm) + r"\b"
     return bool(re.search(pattern, text_norm))
 
-def _fuzzy_match(text: str, options: List[str], threshold: float = 0.6) -> List[str]:
+def _fuzzy_match(text: str, options: List[str] | OptionIndex, threshold: float = 0.6) -> List[str]:
     """
     Encuentra coincidencias aproximadas entre el texto y las opciones.
     Retorna las opciones que tienen una similitud mayor al threshold.
+    Con un OptionIndex (roles, ubicaciones) solo se comparan las opciones candidatas.
     """
+    if isinstance(options, OptionIndex):
+        return options.match(text, threshold)
     matches = []
     text_norm = _norm(text)
     
@@ -484,423 +591,365 @@ def _negations(text: str) -> List[str]:
             neg.append(term)
     return neg
 
-def parse_prompt(prompt: str, roles_from_db: List[str] = None) -> Tuple[dict, dict, int|None, str]:
-    print("\n" + "="*80)
-    print("🔤 PARSE_PROMPT - Analizando prompt")
-    print("="*80)
-    print(f"📥 Prompt: '{prompt}'")
-    
-    raw = _norm(prompt)
-    print(f"📝 Normalizado: '{raw}'")
-    
-    # Obtener datos actuales de la BD
-    current_industries = get_current_industries()
-    current_modalities = get_current_modalities()
-    current_seniorities = get_current_seniorities()
-    current_areas = get_current_areas()
-    current_locations = get_current_locations()
-    current_inv_synonyms = get_current_inv_synonyms()
-    
-    print(f"📊 Datos disponibles en BD:")
-    print(f"   - Industrias: {len(current_industries)}")
-    print(f"   - Modalidades: {len(current_modalities)}")
-    print(f"   - Seniorities: {len(current_seniorities)}")
-    print(f"   - Áreas: {len(current_areas)}")
-    print(f"   - Ubicaciones: {len(current_locations)}")
-    print(f"   - Sinónimos: {len(current_inv_synonyms)}")
-    
-    # Si no se proporcionan roles, obtenerlos de la BD
-    if roles_from_db is None:
-        roles_from_db = get_current_roles()
-    print(f"   - Roles disponibles: {len(roles_from_db)}")
-    
-    # Moneda + salario
+# ---------- parse_prompt: pipeline de extracción ----------
+#
+#   1. contexto: el prompt se normaliza una vez; el snapshot de la taxonomía
+#      (una sola consulta de versión), los sinónimos presentes (SynonymMatcher) y los
+#      índices de roles / ubicaciones se leen una vez y los comparten todas las etapas
+#   2. candidatos: cada slot emite aciertos tipados (ParseHit: slot, valor, span,
+#      confianza, origen) sobre el contexto
+#   3. negaciones: aciertos de exclude para los términos negados ("no ...", "sin ...")
+#   4. resolución: conflictos entre aciertos (BD exacta vs fuzzy, "datos" vs "desarrollo")
+#      y armado de include / exclude sin duplicados, en el orden en que se emitieron
+#
+# Cada etapa se mide con tracing.span("nlp.parse_prompt.<etapa>") y se imprime su tiempo.
+
+# Confianza según el origen del acierto
+HIT_CONFIDENCE = {"exact": 1.0, "pattern": 0.9, "synonym": 0.8, "keyword": 0.7, "fuzzy": 0.6}
+
+class ParseHit(NamedTuple):
+    slot: str
+    value: object
+    span: Tuple[int, int] | None
+    confidence: float
+    source: str
+    exclude: bool = False
+
+def _hit(slot: str, value, source: str, span=None, exclude: bool = False) -> ParseHit:
+    return ParseHit(slot, value, span, HIT_CONFIDENCE[source], source, exclude)
+
+class ParseContext:
+    """Estado compartido de una extracción: prompt normalizado, taxonomía y sinónimos presentes."""
+
+    def __init__(self, prompt: str, roles_from_db: List[str] = None):
+        self.prompt = prompt
+        self.raw = _norm(prompt)
+        self.raw_has_datos = 'datos' in self.raw or 'data' in self.raw
+
+        taxonomy = get_taxonomy()
+        self.industries = taxonomy.value("industries", get_industries_from_db)
+        self.modalities = taxonomy.value("modalities", get_modalities_from_db)
+        self.seniorities = taxonomy.value("seniorities", get_seniorities_from_db)
+        self.areas = taxonomy.value("subareas", get_subareas_from_db)
+        self.inv_synonyms = taxonomy.value("inv_synonyms", _inv_synonyms)
+        self.matcher = get_synonym_matcher(taxonomy)
+        self.synonym_hits = self.matcher.hits(self.raw)
+        # Si no se proporcionan roles, usar el índice de los roles de la BD
+        self.role_index = get_role_index(taxonomy) if roles_from_db is None else OptionIndex(roles_from_db)
+        self.location_index = get_location_index(taxonomy)
+
+@contextmanager
+def _stage(timings: dict, name: str):
+    started = time.perf_counter()
+    with span(f"nlp.parse_prompt.{name}"):
+        yield
+    timings[name] = round((time.perf_counter() - started) * 1000, 2)
+
+def _salary(raw: str):
+    """(salary_min, currency) del prompt normalizado."""
     currency = "USD" if ("usd" in raw or "$" in raw) else ("CLP" if ("clp" in raw or "pesos" in raw) else None)
     salary_min = None
     nums = re.findall(r"\d[\d\.]*", raw)
     if nums:
         try: salary_min = int(nums[0].replace(".",""))
         except: salary_min = None
-    
-    print(f"💰 Salario detectado: min={salary_min}, currency={currency}")
+    return salary_min, currency
 
-    include, exclude = {}, {}
+# Patrones específicos de modalidad: "trabajo X", "modalidad X", "tipo X"
+MODALITY_PATTERNS = [
+    (r"(trabajo|modalidad|tipo\s+de\s+trabajo)\s+(remoto|desde\s+casa|teletrabajo|home\s+office)", "remoto"),
+    (r"(trabajo|modalidad|tipo\s+de\s+trabajo)\s+(h[ií]brido|hibrido|mixto|combinado)", "híbrido"),
+    (r"(trabajo|modalidad|tipo\s+de\s+trabajo)\s+(presencial|en\s+oficina|f[ií]sico)", "presencial"),
+]
 
-    # Modalidad - usando fuzzy matching con datos de BD
-    modality_matches = _fuzzy_match(raw, current_modalities, threshold=0.6)
-    if modality_matches:
-        print(f"✅ Modalidad (fuzzy): {modality_matches}")
-        include.setdefault("modality", []).extend(modality_matches)
-    
-    # Detectar patrones específicos de modalidad: "trabajo X", "modalidad X", "tipo X"
-    modality_patterns = [
-        (r"(trabajo|modalidad|tipo\s+de\s+trabajo)\s+(remoto|desde\s+casa|teletrabajo|home\s+office)", "remoto"),
-        (r"(trabajo|modalidad|tipo\s+de\s+trabajo)\s+(h[ií]brido|hibrido|mixto|combinado)", "híbrido"),
-        (r"(trabajo|modalidad|tipo\s+de\s+trabajo)\s+(presencial|en\s+oficina|f[ií]sico)", "presencial"),
-    ]
-    
-    for pattern, canon in modality_patterns:
-        if re.search(pattern, raw):
-            modality_canon = {"remoto":"Remoto","híbrido":"Híbrido","presencial":"Presencial"}[canon]
-            if modality_canon not in include.get("modality", []):
-                print(f"✅ Modalidad (patrón '{pattern}'→'{modality_canon}')")
-                include.setdefault("modality", []).append(modality_canon)
-                break
-    
-    for syn, canon in current_inv_synonyms.items():
-        if _is_whole_word(raw, syn) and canon in ["remoto","híbrido","presencial"]:
-            modality_canon = {"remoto":"Remoto","híbrido":"Híbrido","presencial":"Presencial"}[canon]
-            if modality_canon not in include.get("modality", []):
-                print(f"✅ Modalidad (sinónimo '{syn}'→'{canon}'→'{modality_canon}')")
-                include.setdefault("modality", []).append(modality_canon)
-
-    # Seniority - usando fuzzy matching con datos de BD
-    seniority_matches = _fuzzy_match(raw, current_seniorities, threshold=0.6)
-    if seniority_matches:
-        print(f"✅ Seniority (fuzzy): {seniority_matches}")
-        include.setdefault("seniority", []).extend(seniority_matches)
-    
-    # Detectar patrones específicos de seniority: "nivel X", "experiencia X", "perfil X"
-    seniority_patterns = [
-        (r"(nivel|experiencia|perfil|seniority)\s+(junior|jr|entry|trainee|principiante)", "junior"),
-        (r"(nivel|experiencia|perfil|seniority)\s+(semi|ssr|semi-senior|semisenior|intermedio)", "semi"),
-        (r"(nivel|experiencia|perfil|seniority)\s+(senior|sr|experto|avanzado)", "senior"),
-    ]
-    
-    for pattern, canon in seniority_patterns:
-        if re.search(pattern, raw):
-            seniority_canon = canon.capitalize()
-            if seniority_canon not in include.get("seniority", []):
-                print(f"✅ Seniority (patrón '{pattern}'→'{seniority_canon}')")
-                include.setdefault("seniority", []).append(seniority_canon)
-                break
-    
-    for syn, canon in current_inv_synonyms.items():
-        if _is_whole_word(raw, syn) and canon in ["junior","semi","senior"]:
-            seniority_canon = canon.capitalize()
-            if seniority_canon not in include.get("seniority", []):
-                print(f"✅ Seniority (sinónimo '{syn}'→'{canon}'→'{seniority_canon}')")
-                include.setdefault("seniority", []).append(seniority_canon)
-
-    # Industria - usando fuzzy matching con datos de BD
-    industry_matches = _fuzzy_match(raw, current_industries, threshold=0.5)
-    if industry_matches:
-        print(f"✅ Industria (fuzzy): {industry_matches}")
-        include.setdefault("industry", []).extend(industry_matches)
-    
-    # También buscar por sinónimos de industrias
-    for syn, canon in current_inv_synonyms.items():
-        if _is_whole_word(raw, syn) and canon in ["tecnología", "educación", "salud", "finanzas", "retail", "manufactura", "servicios"]:
-            industry_mapping = {
-                "tecnología": "Tecnología", "educación": "Educación", 
-                "salud": "Salud", "finanzas": "Finanzas",
-                "retail": "Retail", "manufactura": "Manufactura", "servicios": "Servicios"
-            }
-            if canon in industry_mapping:
-                industry_canon = industry_mapping[canon]
-                print(f"✅ Industria (sinónimo '{syn}'→'{canon}'→'{industry_canon}')")
-                include.setdefault("industry", []).append(industry_canon)
-    
-    # Detectar patrones específicos de industria: "industria X", "sector X", "trabajo de la industria X"
-    industry_patterns = [
-        (r"industria\s+(tecnol[oó]gica|tech|inform[aá]tica|digital)", "tecnología"),
-        (r"industria\s+(educativa|educacional|de\s+educaci[oó]n)", "educación"),
-        (r"industria\s+(de\s+)?salud|sector\s+salud|industria\s+m[eé]dica", "salud"),
-        (r"industria\s+(financiera|bancaria|de\s+finanzas|del\s+sector\s+financiero)", "finanzas"),
-        (r"industria\s+(financiero|bancario|finanzas)", "finanzas"),  # Variante sin género
-        (r"trabajo\s+de\s+(la\s+)?industria\s+(financiera|bancaria|finanzas)", "finanzas"),
-        (r"sector\s+(financiero|bancario|finanzas)", "finanzas"),
-        (r"industria\s+(comercial|retail|de\s+ventas)", "retail"),
-        (r"industria\s+(manufacturera|industrial|de\s+producci[oó]n)", "manufactura"),
-        (r"industria\s+de\s+servicios|sector\s+servicios", "servicios"),
-    ]
-    
-    for pattern, canon in industry_patterns:
-        if re.search(pattern, raw):
-            industry_mapping = {
-                "tecnología": "Tecnología", "educación": "Educación", 
-                "salud": "Salud", "finanzas": "Finanzas",
-                "retail": "Retail", "manufactura": "Manufactura", "servicios": "Servicios"
-            }
-            if canon in industry_mapping:
-                industry_canon = industry_mapping[canon]
-                if industry_canon not in include.get("industry", []):
-                    print(f"✅ Industria (patrón '{pattern}'→'{industry_canon}')")
-                    include.setdefault("industry", []).append(industry_canon)
-                break  # Solo tomar el primer match
-
-    # Área - PRIMERO buscar coincidencia exacta o muy cercana en BD antes de usar mapeo estático
-    area_matches = _fuzzy_match(raw, current_areas, threshold=0.6)
-    exact_area_matches = []
-    partial_area_matches = []
-    
-    # Buscar coincidencias exactas primero (sin mapeo)
-    raw_lower = raw.lower()
-    raw_has_datos = 'datos' in raw_lower or 'data' in raw_lower
-    
-    for area in current_areas:
-        area_lower = _norm(area).lower()
+# Patrones específicos de seniority: "nivel X", "experiencia X", "perfil X"
+SENIORITY_PATTERNS = [
+    (r"(nivel|experiencia|perfil|seniority)\s+(junior|jr|entry|trainee|principiante)", "junior"),
+    (r"(nivel|experiencia|perfil|seniority)\s+(semi|ssr|semi-senior|semisenior|intermedio)", "semi"),
+    (r"(nivel|experiencia|perfil|seniority)\s+(senior|sr|experto|avanzado)", "senior"),
+]
+
+# Patrones específicos de industria: "industria X", "sector X", "trabajo de la industria X"
+INDUSTRY_PATTERNS = [
+    (r"industria\s+(tecnol[oó]gica|tech|inform[aá]tica|digital)", "tecnología"),
+    (r"industria\s+(educativa|educacional|de\s+educaci[oó]n)", "educación"),
+    (r"industria\s+(de\s+)?salud|sector\s+salud|industria\s+m[eé]dica", "salud"),
+    (r"industria\s+(financiera|bancaria|de\s+finanzas|del\s+sector\s+financiero)", "finanzas"),
+    (r"industria\s+(financiero|bancario|finanzas)", "finanzas"),  # Variante sin género
+    (r"trabajo\s+de\s+(la\s+)?industria\s+(financiera|bancaria|finanzas)", "finanzas"),
+    (r"sector\s+(financiero|bancario|finanzas)", "finanzas"),
+    (r"industria\s+(comercial|retail|de\s+ventas)", "retail"),
+    (r"industria\s+(manufacturera|industrial|de\s+producci[oó]n)", "manufactura"),
+    (r"industria\s+de\s+servicios|sector\s+servicios", "servicios"),
+]
+
+# Patrones específicos de área: "área X", "trabajo en X", "funcional X"
+AREA_PATTERNS = [
+    (r"área\s+(funcional\s+)?(datos|data|anal[ií]tica)", "datos"),  # Solo datos, no desarrollo
+    (r"área\s+(funcional\s+)?desarrollo", "desarrollo"),  # Solo desarrollo
+    (r"trabajo\s+en\s+(datos|data|anal[ií]tica)", "datos"),
+    (r"trabajo\s+en\s+desarrollo", "desarrollo"),
+    (r"área\s+(funcional\s+)?(dise[ñn]o|ux|ui)", "diseño"),
+    (r"trabajo\s+en\s+(dise[ñn]o|ux|ui)", "diseño"),
+    (r"área\s+(funcional\s+)?(calidad|qa|testing|pruebas)", "calidad"),
+    (r"área\s+(funcional\s+)?(finanzas|financiero|contabilidad)", "finanzas"),
+    (r"área\s+(funcional\s+)?(recursos\s+humanos|rrhh|hr)", "rrhh"),
+]
+
+# Áreas de cada patrón; "desarrollo" se busca en la BD
+AREA_PATTERN_AREAS = {
+    "datos": ["Desarrollo / datos"],  # Solo si dice específicamente "datos"
+    "desarrollo": [],
+    "diseño": ["Diseño"],
+    "calidad": ["Servicios Generales"],
+    "finanzas": ["Finanzas"],
+    "rrhh": ["Recursos Humanos"],
+}
+
+ACCESSIBILITY_KEYWORDS = ["accesibilidad", "silla de ruedas", "discapacidad", "incluyente", "inclusivo", "rampa", "ascensor", "baño accesible", "transport accesible"]
+TRANSPORT_KEYWORDS = ["transporte", "bus", "metro", "movi", "terminal", "transantiago", "red"]
+
+# Canónicos que se excluyen cuando aparecen en un término negado
+NEGATED_ROLE_CANONS = ["full stack dev", "backend developer", "data analyst", "qa analyst", "devops engineer", "ux/ui designer"]
+NEGATED_AREA_CANONS = ["datos", "desarrollo", "infraestructura", "calidad", "soporte", "diseño", "docencia"]
+
+def _has_datos(area: str) -> bool:
+    area = _norm(area)
+    return 'datos' in area or 'data' in area
+
+def _dev_areas(ctx: ParseContext) -> List[str]:
+    return [a for a in ctx.areas if 'desarrollo' in _norm(a)]
+
+def _modality_hits(ctx: ParseContext) -> List[ParseHit]:
+    # Fuzzy con los datos de BD, patrón (el primero que agregue algo) y sinónimos
+    hits = [_hit("modality", m, "fuzzy") for m in _fuzzy_match(ctx.raw, ctx.modalities, threshold=0.6)]
+    for pattern, canon in MODALITY_PATTERNS:
+        match = re.search(pattern, ctx.raw)
+        if match and MODALITY_CANONS[canon] not in [h.value for h in hits]:
+            hits.append(_hit("modality", MODALITY_CANONS[canon], "pattern", match.span()))
+            break
+    for syn in ctx.synonym_hits:
+        if "modality" in syn.slots:
+            hits.append(_hit("modality", MODALITY_CANONS[syn.canon], "synonym", syn.span))
+    return hits
+
+def _seniority_hits(ctx: ParseContext) -> List[ParseHit]:
+    hits = [_hit("seniority", s, "fuzzy") for s in _fuzzy_match(ctx.raw, ctx.seniorities, threshold=0.6)]
+    for pattern, canon in SENIORITY_PATTERNS:
+        match = re.search(pattern, ctx.raw)
+        if match and SENIORITY_CANONS[canon] not in [h.value for h in hits]:
+            hits.append(_hit("seniority", SENIORITY_CANONS[canon], "pattern", match.span()))
+            break
+    for syn in ctx.synonym_hits:
+        if "seniority" in syn.slots:
+            hits.append(_hit("seniority", SENIORITY_CANONS[syn.canon], "synonym", syn.span))
+    return hits
+
+def _industry_hits(ctx: ParseContext) -> List[ParseHit]:
+    hits = [_hit("industry", i, "fuzzy") for i in _fuzzy_match(ctx.raw, ctx.industries, threshold=0.5)]
+    for syn in ctx.synonym_hits:
+        if "industry" in syn.slots:
+            hits.append(_hit("industry", INDUSTRY_CANONS[syn.canon], "synonym", syn.span))
+    for pattern, canon in INDUSTRY_PATTERNS:
+        match = re.search(pattern, ctx.raw)
+        if match:
+            hits.append(_hit("industry", INDUSTRY_CANONS[canon], "pattern", match.span()))
+            break  # Solo tomar el primer match
+    return hits
+
+def _area_hits(ctx: ParseContext) -> List[ParseHit]:
+    """
+    Áreas funcionales (subáreas). Las coincidencias exactas y fuzzy con la BD salen
+    todas; cuáles quedan lo decide `_resolve_area`.
+    """
+    raw, raw_has_datos = ctx.raw, ctx.raw_has_datos
+    hits = []
+    for area in ctx.areas:
+        area_lower = _norm(area)
         area_has_datos = 'datos' in area_lower or 'data' in area_lower
-        
         # Coincidencia exacta (ignorar mayúsculas)
-        if raw_lower == area_lower:
-            exact_area_matches.append(area)
+        if raw == area_lower:
+            hits.append(_hit("area", area, "exact"))
         # Si el área contiene "datos" pero el usuario no lo mencionó, NO considerarlo exacto
         elif area_has_datos and not raw_has_datos:
-            # No incluir áreas con "datos" si el usuario solo dijo "desarrollo"
             continue
         # Si el usuario mencionó "datos", incluir áreas que lo contengan
         elif raw_has_datos and area_has_datos:
-            if _is_whole_word(area_lower, raw_lower.replace('datos', '').replace('data', '').strip()):
-                exact_area_matches.append(area)
+            if _is_whole_word(area_lower, raw.replace('datos', '').replace('data', '').strip()):
+                hits.append(_hit("area", area, "exact"))
         # Para otras coincidencias de palabra completa
-        elif _is_whole_word(area_lower, raw_lower) and not area_has_datos:
-            exact_area_matches.append(area)
-    
-    # Si encontramos coincidencias exactas, usarlas
-    if exact_area_matches:
-        # Filtrar para evitar duplicados y preferir áreas sin "datos" si el usuario no lo mencionó
-        filtered_matches = []
-        if not raw_has_datos:
-            # Priorizar áreas sin "datos"
-            solo_desarrollo = [a for a in exact_area_matches if 'datos' not in _norm(a).lower()]
-            if solo_desarrollo:
-                filtered_matches = solo_desarrollo
-            else:
-                filtered_matches = exact_area_matches
+        elif _is_whole_word(area_lower, raw):
+            hits.append(_hit("area", area, "exact"))
+    hits += [_hit("area", a, "fuzzy") for a in _fuzzy_match(raw, ctx.areas, threshold=0.6)]
+
+    matched_patterns = []
+    for pattern, canon in AREA_PATTERNS:
+        match = re.search(pattern, raw)
+        if match:
+            matched_patterns.append((canon, match.span()))
+    for canon, match_span in matched_patterns:
+        if canon != "desarrollo":
+            hits += [_hit("area", a, "pattern", match_span) for a in AREA_PATTERN_AREAS[canon]]
+            break
+        # Para desarrollo, áreas de la BD que lo contengan, sin "datos" si las hay
+        dev_areas = _dev_areas(ctx)
+        solo_desarrollo = [a for a in dev_areas if 'datos' not in _norm(a)]
+        if solo_desarrollo:
+            hits += [_hit("area", a, "pattern", match_span) for a in solo_desarrollo]
+            break
+        if dev_areas:
+            # Solo hay "Desarrollo / datos": se usa si el usuario mencionó "datos"
+            if raw_has_datos:
+                hits += [_hit("area", a, "pattern", match_span) for a in dev_areas]
+            break
+        # Sin áreas de desarrollo en la BD: probar el siguiente patrón
+
+    pattern_canons = [canon for canon, _ in matched_patterns]
+    for syn in ctx.synonym_hits:
+        if "area" not in syn.slots:
+            continue
+        if syn.canon == "desarrollo" and "desarrollo" not in pattern_canons:
+            dev_areas = _dev_areas(ctx)
+            if dev_areas and not raw_has_datos:
+                # Si el usuario no mencionó "datos", solo áreas sin "datos"
+                dev_areas = [a for a in dev_areas if 'datos' not in _norm(a)]
+                if not dev_areas:
+                    print(f"   ⏭️  Saltando sinónimo 'desarrollo'→'Desarrollo / datos' porque el usuario no mencionó 'datos' y no hay otras opciones")
+                    continue
+            hits += [_hit("area", a, "synonym", syn.span) for a in dev_areas]
         else:
-            filtered_matches = exact_area_matches
-        
-        print(f"✅ Área (coincidencia exacta filtrada): {filtered_matches}")
-        include.setdefault("area", []).extend(filtered_matches)
-    elif area_matches:
-        # Filtrar matches para evitar "Desarrollo / datos" cuando el usuario dice solo "desarrollo"
-        for match in area_matches:
-            match_lower = _norm(match).lower()
-            match_has_datos = 'datos' in match_lower or 'data' in match_lower
-            
-            # Si el usuario NO mencionó "datos" pero el match lo contiene, NO incluirlo
-            if not raw_has_datos and match_has_datos:
-                # NO incluir áreas con "datos" si el usuario no lo mencionó
-                print(f"   ⏭️  Saltando '{match}' porque contiene 'datos' pero el usuario no lo mencionó")
-                continue
-            
-            # Si el usuario mencionó "datos", incluir matches que lo contengan
-            if raw_has_datos and match_has_datos:
-                partial_area_matches.append(match)
-            # Si el match no contiene "datos", incluirlo
-            elif not match_has_datos:
-                partial_area_matches.append(match)
-        
-        if partial_area_matches:
-            print(f"✅ Área funcional (fuzzy filtrado): {partial_area_matches}")
-            include.setdefault("area", []).extend(partial_area_matches)
-        elif area_matches:
-            # Si todos fueron filtrados, usar los matches pero advertir
-            print(f"⚠️  Área funcional (todos los matches filtrados, usando todos): {area_matches}")
-            include.setdefault("area", []).extend(area_matches)
-    
-    # Detectar patrones específicos de área: "área X", "trabajo en X", "funcional X"
-    area_patterns = [
-        (r"área\s+(funcional\s+)?(datos|data|anal[ií]tica)", "datos", True),  # Solo datos, no desarrollo
-        (r"área\s+(funcional\s+)?desarrollo", "desarrollo", False),  # Solo desarrollo
-        (r"trabajo\s+en\s+(datos|data|anal[ií]tica)", "datos", True),
-        (r"trabajo\s+en\s+desarrollo", "desarrollo", False),
-        (r"área\s+(funcional\s+)?(dise[ñn]o|ux|ui)", "diseño", False),
-        (r"trabajo\s+en\s+(dise[ñn]o|ux|ui)", "diseño", False),
-        (r"área\s+(funcional\s+)?(calidad|qa|testing|pruebas)", "calidad", False),
-        (r"área\s+(funcional\s+)?(finanzas|financiero|contabilidad)", "finanzas", False),
-        (r"área\s+(funcional\s+)?(recursos\s+humanos|rrhh|hr)", "rrhh", False),
-    ]
-    
-    # Mapeo mejorado: separar desarrollo de datos
-    area_mapping_exact = {
-        "datos": ["Desarrollo / datos"],  # Solo si dice específicamente "datos"
-        "desarrollo": [],  # Para desarrollo, buscar en BD primero
-        "diseño": ["Diseño"],
-        "calidad": ["Servicios Generales"],
-        "finanzas": ["Finanzas"],
-        "rrhh": ["Recursos Humanos"],
-    }
-    
-    for pattern, canon, is_data_specific in area_patterns:
-        if re.search(pattern, raw):
-            if canon == "desarrollo":
-                # Para desarrollo, buscar áreas que contengan "desarrollo" pero no necesariamente "datos"
-                dev_areas = [a for a in current_areas if 'desarrollo' in _norm(a).lower()]
-                solo_desarrollo = [a for a in dev_areas if 'datos' not in _norm(a).lower()]
-                
-                if solo_desarrollo:
-                    # Si hay un área que es solo "desarrollo" (sin "datos"), usar esa
-                    for area in solo_desarrollo:
-                        if area not in include.get("area", []):
-                            print(f"✅ Área (patrón desarrollo→'{area}')")
-                            include.setdefault("area", []).append(area)
-                    break
-                elif dev_areas and not raw_has_datos:
-                    # Si solo hay áreas con "datos" pero el usuario no mencionó "datos", 
-                    # priorizar áreas que contengan "desarrollo" pero no "datos"
-                    # Si no hay ninguna, NO agregar nada aquí (se maneja arriba con fuzzy matching)
-                    solo_dev = [a for a in dev_areas if 'datos' not in _norm(a).lower()]
-                    if solo_dev:
-                        for area in solo_dev:
-                            if area not in include.get("area", []):
-                                print(f"✅ Área funcional (patrón desarrollo→'{area}')")
-                                include.setdefault("area", []).append(area)
-                    # Si no hay áreas sin "datos", no agregar nada (dejar que fuzzy matching lo maneje)
-                    break
-                elif dev_areas:
-                    # Si el usuario mencionó "datos" o no hay otra opción, usar "Desarrollo / datos"
-                    for area in dev_areas:
-                        if area not in include.get("area", []):
-                            print(f"✅ Área (patrón desarrollo→'{area}')")
-                            include.setdefault("area", []).append(area)
-                    break
-            elif canon in area_mapping_exact:
-                areas_to_add = area_mapping_exact[canon]
-                for area_canon in areas_to_add:
-                    if area_canon not in include.get("area", []):
-                        print(f"✅ Área (patrón '{pattern}'→'{area_canon}')")
-                        include.setdefault("area", []).append(area_canon)
-                break
-    
-    # Mapping de sinónimos canónicos a nombres reales de áreas en la BD
-    # IMPORTANTE: Separar desarrollo de datos
-    area_mapping = {
-        "datos": ["Desarrollo / datos"],  # Solo si dice específicamente "datos"
-        "desarrollo": [],  # Se maneja arriba buscando en BD
-        "infraestructura": ["Tecnología"],
-        "calidad": ["Servicios Generales"],
-        "soporte": ["Servicios Generales"],
-        "diseño": ["Diseño"],
-        "gastronomía": ["Gastronomía"],
-        "cultura": ["Cultura"],
-        "salud": ["Salud"],
-        "construcción": ["Construcción"],
-        "transporte": ["Transporte"],
-        "turismo": ["Turismo"],
-        "finanzas": ["Finanzas"],
-        "rrhh": ["Recursos Humanos"],
-        "tecnología": ["Tecnología"],
-    }
-    
-    for syn, canon in current_inv_synonyms.items():
-        if _is_whole_word(raw, syn) and canon in area_mapping:
-            # Para desarrollo, buscar en BD (subáreas/áreas funcionales) en lugar de usar mapeo estático
-            if canon == "desarrollo" and canon not in [p[1] for p in area_patterns if re.search(p[0], raw)]:
-                # Buscar en subáreas (áreas funcionales) que contengan "desarrollo"
-                dev_areas = [a for a in current_areas if 'desarrollo' in _norm(a).lower()]
-                if dev_areas:
-                    # Si el usuario no mencionó "datos", priorizar áreas sin "datos"
-                    if not raw_has_datos:
-                        solo_desarrollo = [a for a in dev_areas if 'datos' not in _norm(a).lower()]
-                        if solo_desarrollo:
-                            dev_areas = solo_desarrollo
-                        else:
-                            # Si no hay áreas sin "datos", NO agregar nada
-                            print(f"   ⏭️  Saltando sinónimo 'desarrollo'→'Desarrollo / datos' porque el usuario no mencionó 'datos' y no hay otras opciones")
-                            continue
-                    
-                    for area in dev_areas:
-                        if area not in include.get("area", []):
-                            print(f"✅ Área funcional (sinónimo desarrollo→'{area}')")
-                            include.setdefault("area", []).append(area)
-            elif area_mapping[canon]:
-                for area_canon in area_mapping[canon]:
-                    if area_canon not in include.get("area", []):
-                        print(f"✅ Área (sinónimo '{syn}'→'{canon}'→'{area_canon}')")
-                        include.setdefault("area", []).append(area_canon)
-
-    # Role (con sinónimos + fuzzy matching)
-    role_hits = []
-    
-    # Fuzzy matching con roles de la BD
-    if roles_from_db:
-        role_matches = _fuzzy_match(raw, roles_from_db, threshold=0.5)
-        if role_matches:
-            print(f"✅ Role (fuzzy): {role_matches[:3]}...")  # Mostrar solo primeros 3
-        role_hits.extend(role_matches)
-    
-    # Búsqueda exacta como fallback
-    for r in roles_from_db:
-        if _norm(r) in raw:
-            role_hits.append(r)
-    
-    # Sinónimos de roles
-    for syn, canon in current_inv_synonyms.items():
-        if _is_whole_word(raw, syn) and canon in ["data analyst","data engineer","backend developer","full stack dev","qa analyst","devops engineer","ux/ui designer"]:
-            mapping = {
-                "data analyst":"Data Analyst", "data engineer":"Data Engineer",
-                "backend developer":"Backend Developer", "full stack dev":"Full Stack Dev",
-                "qa analyst":"QA Analyst", "devops engineer":"DevOps Engineer", "ux/ui designer":"UX/UI Designer"
-            }
-            role_mapped = mapping[canon]
-            print(f"✅ Role (sinónimo '{syn}'→'{canon}'→'{role_mapped}')")
-            role_hits.append(role_mapped)
-    
-    if role_hits:
-        # Eliminar duplicados
-        unique_role_hits = list(dict.fromkeys(role_hits))
-        print(f"✅ Roles detectados: {unique_role_hits[:3]}...")  # Mostrar solo primeros 3
-        include.setdefault("role", []).extend(unique_role_hits)
-
-    # Ubicación - usando fuzzy matching con datos de BD
-    location_matches = _fuzzy_match(raw, current_locations, threshold=0.6)
-    if location_matches:
-        print(f"✅ Ubicación (fuzzy): {location_matches}")
-        include.setdefault("location", []).extend(location_matches)
-
-    # Exclusiones por negación
-    for term in _negations(raw):
-        # role
-        for r in roles_from_db:
-            if _norm(r) in term:
-                exclude.setdefault("role", []).append(r)
-        for syn, canon in current_inv_synonyms.items():
-            if syn in term and canon in ["full stack dev","backend developer","data analyst","qa analyst","devops engineer","ux/ui designer"]:
-                mapping = {
-                    "data analyst":"Data Analyst", "data engineer":"Data Engineer",
-                    "backend developer":"Backend Developer", "full stack dev":"Full Stack Dev",
-                    "qa analyst":"QA Analyst", "devops engineer":"DevOps Engineer", "ux/ui designer":"UX/UI Designer"
-                }
-                exclude.setdefault("role", []).append(mapping.get(canon, canon))
-        # área
-        for syn, canon in current_inv_synonyms.items():
-            if syn in term and canon in ["datos","desarrollo","infraestructura","calidad","soporte","diseño","docencia"]:
-                exclude.setdefault("area", []).append(canon.capitalize())
-        # modalidad / seniority
-        for syn, canon in current_inv_synonyms.items():
-            if syn in term and canon in ["remoto","híbrido","presencial"]:
-                exclude.setdefault("modality", []).append({"remoto":"Remoto","híbrido":"Híbrido","presencial":"Presencial"}[canon])
-            if syn in term and canon in ["junior","semi","senior"]:
-                exclude.setdefault("seniority", []).append(canon.capitalize())
-        # industria
-        for ind in current_industries:
+            hits += [_hit("area", a, "synonym", syn.span) for a in AREA_CANONS[syn.canon]]
+    return hits
+
+def _role_hits(ctx: ParseContext) -> List[ParseHit]:
+    index = ctx.role_index
+    hits = [_hit("role", r, "fuzzy") for r in _fuzzy_match(ctx.raw, index, threshold=0.5)] if len(index) else []
+    # Búsqueda exacta como fallback (roles cuyo título normalizado está en el prompt)
+    hits += [_hit("role", index.options[i], "exact") for i in sorted(index.contained_in(ctx.raw))]
+    for syn in ctx.synonym_hits:
+        if "role" in syn.slots:
+            hits.append(_hit("role", ROLE_CANONS[syn.canon], "synonym", syn.span))
+    return hits
+
+def _location_hits(ctx: ParseContext) -> List[ParseHit]:
+    return [_hit("location", loc, "fuzzy") for loc in _fuzzy_match(ctx.raw, ctx.location_index, threshold=0.6)]
+
+def _accessibility_hits(ctx: ParseContext) -> List[ParseHit]:
+    hits = []
+    if any(keyword in ctx.raw for keyword in ACCESSIBILITY_KEYWORDS):
+        hits.append(_hit("accessibility", True, "keyword"))
+    if any(keyword in ctx.raw for keyword in TRANSPORT_KEYWORDS):
+        hits.append(_hit("transport", True, "keyword"))
+    return hits
+
+# Orden de los slots en include (el orden de relajación depende de él)
+CANDIDATE_EXTRACTORS = [
+    _modality_hits,
+    _seniority_hits,
+    _industry_hits,
+    _area_hits,
+    _role_hits,
+    _location_hits,
+    _accessibility_hits,
+]
+
+def _negation_hits(ctx: ParseContext) -> List[ParseHit]:
+    hits = []
+    for term in _negations(ctx.raw):
+        # Sinónimos contenidos en el término negado (sin exigir palabra completa)
+        term_hits = ctx.matcher.substring_hits(term)
+        index = ctx.role_index
+        hits += [_hit("role", index.options[i], "exact", exclude=True) for i in sorted(index.contained_in(term))]
+        for syn in term_hits:
+            if syn.canon in NEGATED_ROLE_CANONS:
+                hits.append(_hit("role", ROLE_CANONS[syn.canon], "synonym", exclude=True))
+        for syn in term_hits:
+            if syn.canon in NEGATED_AREA_CANONS:
+                hits.append(_hit("area", syn.canon.capitalize(), "synonym", exclude=True))
+        for syn in term_hits:
+            if "modality" in syn.slots:
+                hits.append(_hit("modality", MODALITY_CANONS[syn.canon], "synonym", exclude=True))
+            if "seniority" in syn.slots:
+                hits.append(_hit("seniority", SENIORITY_CANONS[syn.canon], "synonym", exclude=True))
+        for ind in ctx.industries:
             if ind.lower() in term:
-                exclude.setdefault("industry", []).append(ind)
+                hits.append(_hit("industry", ind, "exact", exclude=True))
+    return hits
 
-    # Detectar accesibilidad y transporte
-    accessibility_keywords = ["accesibilidad", "silla de ruedas", "discapacidad", "incluyente", "inclusivo", "rampa", "ascensor", "baño accesible", "transport accesible"]
-    transport_keywords = ["transporte", "bus", "metro", "movi", "terminal", "transantiago", "red"]
-    
-    if any(keyword in raw for keyword in accessibility_keywords):
-        include.setdefault("accessibility", []).append(True)
-        print(f"✅ Accesibilidad detectada")
-    
-    if any(keyword in raw for keyword in transport_keywords):
-        include.setdefault("transport", []).append(True)
-        print(f"✅ Transporte detectado")
+def _resolve_area(ctx: ParseContext, hits: List[ParseHit]) -> List[ParseHit]:
+    """
+    Coincidencias de área con la BD: las exactas ganan sobre las fuzzy. De las fuzzy se
+    descartan las de "datos" si el usuario no lo mencionó (salvo que no quede ninguna),
+    para no devolver "Desarrollo / datos" cuando dijo solo "desarrollo".
+    """
+    db = [h for h in hits if h.slot == "area" and not h.exclude and h.source in ("exact", "fuzzy")]
+    exact = [h for h in db if h.source == "exact"]
+    if exact:
+        keep = exact
+        if not ctx.raw_has_datos:
+            keep = [h for h in exact if 'datos' not in _norm(h.value)] or exact
+    else:
+        keep = [h for h in db if ctx.raw_has_datos or not _has_datos(h.value)] or db
+        for h in db:
+            if h not in keep:
+                print(f"   ⏭️  Saltando '{h.value}' porque contiene 'datos' pero el usuario no lo mencionó")
+    dropped = {id(h) for h in db} - {id(h) for h in keep}
+    return [h for h in hits if id(h) not in dropped]
 
-    # dedup
-    for d in (include, exclude):
-        for k in list(d.keys()):
-            d[k] = list(dict.fromkeys(d[k]))
+def _resolve(ctx: ParseContext, hits: List[ParseHit]) -> Tuple[dict, dict]:
+    """include / exclude a partir de los aciertos, sin duplicados y en el orden en que se emitieron."""
+    include, exclude = {}, {}
+    for hit in _resolve_area(ctx, hits):
+        values = (exclude if hit.exclude else include).setdefault(hit.slot, [])
+        if hit.value not in values:
+            values.append(hit.value)
+    return include, exclude
+
+@traced_span("nlp.parse_prompt")
+def parse_prompt(prompt: str, roles_from_db: List[str] = None) -> Tuple[dict, dict, int|None, str]:
+    """
+    Extrae include / exclude, salario mínimo y moneda de un prompt libre, en etapas
+    (contexto → candidatos → negaciones → resolución, ver arriba).
+    """
+    print("\n" + "="*80)
+    print("🔤 PARSE_PROMPT - Analizando prompt")
+    print("="*80)
+    print(f"📥 Prompt: '{prompt}'")
+
+    timings = {}
+    with _stage(timings, "context"):
+        ctx = ParseContext(prompt, roles_from_db)
+        salary_min, currency = _salary(ctx.raw)
+
+    print(f"📝 Normalizado: '{ctx.raw}'")
+    print(f"📊 Datos disponibles en BD:")
+    print(f"   - Industrias: {len(ctx.industries)}")
+    print(f"   - Modalidades: {len(ctx.modalities)}")
+    print(f"   - Seniorities: {len(ctx.seniorities)}")
+    print(f"   - Áreas: {len(ctx.areas)}")
+    print(f"   - Ubicaciones: {len(ctx.location_index)}")
+    print(f"   - Sinónimos: {len(ctx.inv_synonyms)}")
+    print(f"   - Roles disponibles: {len(ctx.role_index)}")
+    print(f"💰 Salario detectado: min={salary_min}, currency={currency}")
+
+    with _stage(timings, "candidates"):
+        hits = [hit for extract in CANDIDATE_EXTRACTORS for hit in extract(ctx)]
+    with _stage(timings, "negations"):
+        hits += _negation_hits(ctx)
+    with _stage(timings, "resolve"):
+        include, exclude = _resolve(ctx, hits)
+
+    by_source = {}
+    for hit in hits:
+        by_source[hit.source] = by_source.get(hit.source, 0) + 1
+    print(f"🎯 Aciertos candidatos: {len(hits)} {by_source}")
 
     print(f"\n✅ Resultado final de parse_prompt:")
     print(f"   - include: {include}")
     print(f"   - exclude: {exclude}")
     print(f"   - salary_min: {salary_min}")
     print(f"   - currency: {currency or 'USD'}")
+    print(f"⏱️  Etapas (ms): {timings}")
     print("="*80)
     return include, exclude, salary_min, (currency or "USD")
 
@@ -1240,6 +1289,7 @@ def parse_more_jobs_intent(text: str) -> dict:
     
     return result
 
+@traced_span("nlp.parse_simple_response")
 def parse_simple_response(text: str, context: str = None) -> dict:
     """
     Función simplificada para parsear respuestas directas del chat.
@@ -1248,9 +1298,6 @@ def parse_simple_response(text: str, context: str = None) -> dict:
     raw = _norm(text)
     result = {}
     
-    # Obtener sinónimos actuales para búsqueda
-    current_inv_synonyms = get_current_inv_synonyms()
-    
     # Si el contexto es industria
     if context == "industry":
         # Detectar patrones como "industria X", "sector X", "trabajo de la industria X"
@@ -1294,16 +1341,10 @@ def parse_simple_response(text: str, context: str = None) -> dict:
                 raw = text_to_match
         
         # Primero intentar con sinónimos
-        for syn, canon in current_inv_synonyms.items():
-            if _is_whole_word(raw, syn) and canon in ["tecnología", "educación", "salud", "finanzas", "retail", "manufactura", "servicios"]:
-                industry_mapping = {
-                    "tecnología": "Tecnología", "educación": "Educación", 
-                    "salud": "Salud", "finanzas": "Finanzas",
-                    "retail": "Retail", "manufactura": "Manufactura", "servicios": "Servicios"
-                }
-                if canon in industry_mapping:
-                    result["industry"] = industry_mapping[canon]
-                    break
+        for hit in get_synonym_matcher().hits(raw):
+            if "industry" in hit.slots:
+                result["industry"] = INDUSTRY_CANONS[hit.canon]
+                break
         
         # Si no se encontró con sinónimos, intentar fuzzy matching
         if not result.get("industry"):
@@ -1314,10 +1355,9 @@ def parse_simple_response(text: str, context: str = None) -> dict:
     # Si el contexto es modalidad
     elif context == "modality":
         # Primero intentar con sinónimos
-        for syn, canon in current_inv_synonyms.items():
-            if _is_whole_word(raw, syn) and canon in ["remoto","híbrido","presencial"]:
-                modality_canon = {"remoto":"Remoto","híbrido":"Híbrido","presencial":"Presencial"}[canon]
-                result["modality"] = modality_canon
+        for hit in get_synonym_matcher().hits(raw):
+            if "modality" in hit.slots:
+                result["modality"] = MODALITY_CANONS[hit.canon]
                 break
         
         # Si no se encontró con sinónimos, intentar fuzzy matching
@@ -1329,9 +1369,9 @@ def parse_simple_response(text: str, context: str = None) -> dict:
     # Si el contexto es seniority
     elif context == "seniority":
         # Primero intentar con sinónimos
-        for syn, canon in current_inv_synonyms.items():
-            if _is_whole_word(raw, syn) and canon in ["junior","semi","senior"]:
-                result["seniority"] = canon.capitalize()
+        for hit in get_synonym_matcher().hits(raw):
+            if "seniority" in hit.slots:
+                result["seniority"] = SENIORITY_CANONS[hit.canon]
                 break
         
         # Si no se encontró con sinónimos, intentar fuzzy matching
@@ -1408,9 +1448,9 @@ def parse_simple_response(text: str, context: str = None) -> dict:
                 "tecnología": "Tecnología",
             }
             
-            for syn, canon in current_inv_synonyms.items():
-                if _is_whole_word(raw_clean, syn) and canon in area_mapping:
-                    mapped_area = area_mapping[canon]
+            for hit in get_synonym_matcher().hits(raw_clean):
+                if "area" in hit.slots:
+                    mapped_area = area_mapping[hit.canon]
                     if mapped_area:
                         result["area"] = mapped_area
                         break
@@ -1432,7 +1472,7 @@ def parse_simple_response(text: str, context: str = None) -> dict:
     
     # Si el contexto es ubicación
     elif context == "location":
-        location_matches = _fuzzy_match(raw, get_current_locations(), threshold=0.4)
+        location_matches = _fuzzy_match(raw, get_location_index(), threshold=0.4)
         if location_matches:
             result["location"] = location_matches[0]
     
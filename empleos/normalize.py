@@ -0,0 +1,312 @@
+"""
+Campos derivados de JobPosting / Location que se calculan al escribir (import / API / save).
+
+El texto de los portales viene en formatos libres ("1 años", "3", "Sin experiencia",
+"Las Condes, RM", "Necesitamos tu autorización...", ...). Para poder filtrar con
+predicados indexables, se interpreta una sola vez al guardar y se guarda en columnas
+estructuradas. `refresh_derived_fields` de cada modelo aplica estas funciones; el
+comando `backfill_job_fields` las aplica a filas existentes.
+"""
+import re
+import unicodedata
+
+# Rango de años de experiencia (mínimo, máximo inclusive; None = sin tope) por seniority
+SENIORITY_YEARS = {
+    "junior": (0, 2),
+    "semi": (2, 5),
+    "senior": (5, None),
+}
+
+# Alias con que llega el seniority desde el chat / nlp
+SENIORITY_ALIASES = {
+    "junior": "junior",
+    "jr": "junior",
+    "semi": "semi",
+    "ssr": "semi",
+    "semi-senior": "semi",
+    "semisenior": "semi",
+    "senior": "senior",
+    "sr": "senior",
+}
+
+# Textos sin número que significan "sin experiencia previa"
+_NO_EXPERIENCE_WORDS = ("sin experiencia", "junior", "jr", "entry", "trainee", "principiante", "práctica", "practica")
+
+_NUMBER_RE = re.compile(r"\d+")
+
+
+def parse_experience_years(text) -> int | None:
+    """
+    Años mínimos de experiencia a partir del texto del portal.
+
+    >>> parse_experience_years("2 años"), parse_experience_years("3"), parse_experience_years("6 meses")
+    (2, 3, 0)
+    """
+    if text is None:
+        return None
+    text = str(text).strip().lower()
+    if not text:
+        return None
+    match = _NUMBER_RE.search(text)
+    if match:
+        value = int(match.group())
+        if "mes" in text and "año" not in text:
+            return value // 12
+        return value
+    if any(word in text for word in _NO_EXPERIENCE_WORDS):
+        return 0
+    return None
+
+
+def seniority_for_years(years: int | None) -> str | None:
+    """Nivel (junior/semi/senior) que corresponde a un mínimo de años de experiencia."""
+    if years is None:
+        return None
+    if years < 2:
+        return "junior"
+    if years < 5:
+        return "semi"
+    return "senior"
+
+
+def seniority_years_range(seniority: str):
+    """(mínimo, máximo) de años para un seniority del chat, o None si no se reconoce."""
+    key = SENIORITY_ALIASES.get(str(seniority).lower().strip())
+    return SENIORITY_YEARS.get(key) if key else None
+
+
+# ---------- ubicación ----------
+
+# Textos que los portales dejan en el campo de ubicación cuando no la pudieron leer
+JUNK_LOCATION_MARKERS = ("necesitamos tu autorizacion", "autorizacion", "configuracion", "privacidad", "navegador")
+
+# Palabras que no aportan al comparar ubicaciones
+_LOCATION_STOPWORDS = {"de", "la", "el", "y", "region", "comuna", "provincia", "del", "las", "los"}
+
+# Regiones de Chile (plegadas) y cómo aparecen abreviadas en los avisos
+REGIONS = {
+    "arica y parinacota": ("arica y parinacota", "xv"),
+    "tarapaca": ("tarapaca", "i"),
+    "antofagasta": ("antofagasta", "ii"),
+    "atacama": ("atacama", "iii"),
+    "coquimbo": ("coquimbo", "iv"),
+    "valparaiso": ("valparaiso", "v"),
+    "metropolitana": ("metropolitana", "region metropolitana", "metropolitana de santiago", "rm", "r m", "xiii"),
+    "ohiggins": ("ohiggins", "o higgins", "libertador general bernardo ohiggins", "libertador bernardo ohiggins", "vi"),
+    "maule": ("maule", "vii"),
+    "nuble": ("nuble", "xvi"),
+    "biobio": ("biobio", "bio bio", "viii"),
+    "araucania": ("araucania", "la araucania", "ix"),
+    "los rios": ("los rios", "xiv"),
+    "los lagos": ("los lagos", "x"),
+    "aysen": ("aysen", "xi"),
+    "magallanes": ("magallanes", "magallanes y la antartica chilena", "xii"),
+}
+_REGION_BY_ALIAS = {alias: region for region, aliases in REGIONS.items() for alias in aliases}
+
+# Comunas frecuentes en los avisos → región (para ubicaciones que no traen la región)
+COMUNA_REGION = {
+    "santiago": "metropolitana", "santiago centro": "metropolitana", "providencia": "metropolitana",
+    "las condes": "metropolitana", "nunoa": "metropolitana", "vitacura": "metropolitana",
+    "lo barnechea": "metropolitana", "la florida": "metropolitana", "maipu": "metropolitana",
+    "puente alto": "metropolitana", "san bernardo": "metropolitana", "quilicura": "metropolitana",
+    "pudahuel": "metropolitana", "estacion central": "metropolitana", "huechuraba": "metropolitana",
+    "penalolen": "metropolitana", "la reina": "metropolitana", "macul": "metropolitana",
+    "san miguel": "metropolitana", "independencia": "metropolitana", "recoleta": "metropolitana",
+    "cerrillos": "metropolitana", "renca": "metropolitana", "colina": "metropolitana",
+    "arica": "arica y parinacota", "iquique": "tarapaca", "alto hospicio": "tarapaca",
+    "antofagasta": "antofagasta", "calama": "antofagasta", "copiapo": "atacama",
+    "la serena": "coquimbo", "coquimbo": "coquimbo", "ovalle": "coquimbo",
+    "valparaiso": "valparaiso", "vina del mar": "valparaiso", "quilpue": "valparaiso",
+    "villa alemana": "valparaiso", "san antonio": "valparaiso", "los andes": "valparaiso",
+    "rancagua": "ohiggins", "talca": "maule", "curico": "maule", "linares": "maule",
+    "chillan": "nuble", "concepcion": "biobio", "talcahuano": "biobio", "los angeles": "biobio",
+    "temuco": "araucania", "valdivia": "los rios", "puerto montt": "los lagos",
+    "osorno": "los lagos", "coyhaique": "aysen", "punta arenas": "magallanes",
+}
+
+_LOCATION_SPLIT_RE = re.compile(r"[,\-\.;:/()]")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def strip_accents(text: str) -> str:
+    """Quita tildes y diéresis (ñ → n), como `unaccent` de Postgres."""
+    text = unicodedata.normalize("NFKD", text)
+    return "".join(ch for ch in text if not unicodedata.combining(ch))
+
+
+_NORM_DROP_RE = re.compile(r"[^a-z0-9\s\/\-\+\$\.]")
+_SPACES_RE = re.compile(r"\s+")
+
+
+def norm_text(text):
+    """
+    Forma con que se comparan las facetas (area_norm, subarea_norm, modality_norm,
+    Location.raw_text_norm): las reglas de nlp._norm (minúsculas, sin tildes,
+    ñ → n, otros símbolos → espacio y espacios colapsados). None queda None.
+    """
+    if text is None:
+        return None
+    text = str(text).lower()
+    text = text.replace("á", "a").replace("é", "e").replace("í", "i").replace("ó", "o").replace("ú", "u")
+    text = text.replace("ü", "u").replace("ñ", "n")
+    text = _NORM_DROP_RE.sub(" ", text)
+    return _SPACES_RE.sub(" ", text).strip()
+
+
+def fold_text(text) -> str:
+    """Minúsculas, sin tildes (ñ → n) y con espacios colapsados."""
+    if text is None:
+        return ""
+    text = strip_accents(str(text).lower())
+    return " ".join(text.replace("'", "").split())
+
+
+def is_junk_location(text) -> bool:
+    """True si el texto es un mensaje del portal y no una ubicación real."""
+    folded = fold_text(text)
+    return any(marker in folded for marker in JUNK_LOCATION_MARKERS)
+
+
+def location_tokens(text) -> list:
+    """
+    Palabras significativas de una ubicación (plegadas, sin números ni palabras comunes).
+    Son las mismas reglas para lo que guarda Location y para lo que pide el usuario.
+
+    >>> location_tokens("Santiago, Región Metropolitana 45")
+    ['santiago', 'metropolitana']
+    """
+    cleaned = _DIGITS_RE.sub(" ", _LOCATION_SPLIT_RE.sub(" ", fold_text(text)))
+    tokens = []
+    for word in cleaned.split():
+        if len(word) > 2 and word not in _LOCATION_STOPWORDS and word not in tokens:
+            tokens.append(word)
+    return tokens
+
+
+def region_for(text) -> str | None:
+    """Región (plegada) que nombra el texto por sí solo, p.ej. "RM" o "Región del Biobío"."""
+    words = [w for w in fold_text(_DIGITS_RE.sub(" ", str(text or ""))).replace(".", " ").split()
+             if w not in ("region", "de", "del")]
+    return _REGION_BY_ALIAS.get(" ".join(words))
+
+
+def parse_location(text) -> dict:
+    """
+    Separa "Comuna, Región" en campos normalizados.
+
+    >>> parse_location("Las Condes, RM")["region"]
+    'metropolitana'
+    """
+    if is_junk_location(text):
+        return {"comuna": None, "region": None, "tokens": [], "is_junk": True}
+    parts = [fold_text(_DIGITS_RE.sub(" ", p)) for p in str(text or "").split(",")]
+    parts = [p for p in parts if p]
+    comuna, region = None, None
+    for part in parts:
+        part_region = region_for(part)
+        if part_region and region is None and (part != parts[0] or part not in COMUNA_REGION):
+            region = part_region
+        elif comuna is None:
+            comuna = part
+    if region is None and comuna:
+        region = COMUNA_REGION.get(comuna)
+    return {"comuna": comuna, "region": region, "tokens": location_tokens(text), "is_junk": False}
+
+
+# ---------- salario ----------
+
+# Los montos se guardan en CLP mensuales equivalentes; `salary_period` conserva el período original
+SALARY_PERIODS = {
+    "hour": 180,        # ~45 horas semanales
+    "day": 22,          # días hábiles
+    "week": 4.33,
+    "month": 1,
+    "year": 1 / 12,
+}
+PERIOD_PATTERNS = (
+    ("hour", re.compile(r"\b(?:por hora|la hora|/ ?h(?:ora)?|hora)\b")),
+    ("day", re.compile(r"\b(?:por dia|diario|diaria|al dia|/ ?dia)\b")),
+    ("week", re.compile(r"\b(?:semanal|por semana|a la semana)\b")),
+    ("year", re.compile(r"\b(?:anual|al ano|por ano)\b")),
+)
+
+# Tipo de cambio para avisos (o búsquedas) en dólares; se puede ajustar en settings.SALARY_USD_TO_CLP
+DEFAULT_USD_TO_CLP = 950
+
+# Rango plausible de un sueldo mensual en CLP (fuera de esto se descarta, p.ej. "2 años")
+MIN_MONTHLY_CLP = 10_000
+MAX_MONTHLY_CLP = 50_000_000
+
+# Número chileno: "1.210.001", "500000", "1,5" + "mil"/"millones" opcional
+AMOUNT_RE = re.compile(r"(\d{1,3}(?:\.\d{3})+|\d+(?:,\d+)?)\s*(mil(?:lon(?:es)?)?\b|mm\b|k\b)?")
+
+
+def usd_to_clp() -> float:
+    from django.conf import settings
+    return getattr(settings, "SALARY_USD_TO_CLP", DEFAULT_USD_TO_CLP)
+
+
+def _amount(number: str, multiplier: str | None) -> float:
+    value = float(number.replace(".", "").replace(",", "."))
+    if multiplier in ("mil", "k"):
+        value *= 1_000
+    elif multiplier and (multiplier.startswith("millon") or multiplier == "mm"):
+        value *= 1_000_000
+    return value
+
+
+def salary_period(folded: str) -> str:
+    for period, pattern in PERIOD_PATTERNS:
+        if pattern.search(folded):
+            return period
+    return "month"
+
+
+def to_monthly_clp(amount, period: str = "month", currency: str = "CLP") -> int | None:
+    """Monto mensual equivalente en CLP, o None si no es un sueldo plausible."""
+    if amount is None:
+        return None
+    value = amount * SALARY_PERIODS.get(period, 1)
+    if currency == "USD":
+        value *= usd_to_clp()
+    value = int(round(value))
+    if not MIN_MONTHLY_CLP <= value <= MAX_MONTHLY_CLP:
+        return None
+    return value
+
+
+def parse_salary(text) -> tuple:
+    """
+    (mínimo, máximo, período) de un texto de sueldo. Montos en CLP mensuales.
+
+    >>> parse_salary("500.000 - 610.000 CLP"), parse_salary("$700.000 bruto"), parse_salary("Sueldo a convenir")
+    ((500000, 610000, 'month'), (700000, 700000, 'month'), (None, None, None))
+    """
+    folded = fold_text(text)
+    if not folded:
+        return None, None, None
+    currency = "USD" if re.search(r"\b(usd|us\$|dolares?)\b", folded) else "CLP"
+    period = salary_period(folded)
+    amounts = [_amount(n, m) for n, m in AMOUNT_RE.findall(folded)]
+    amounts = [a for a in (to_monthly_clp(a, period, currency) for a in amounts) if a is not None]
+    if not amounts:
+        return None, None, None
+    if folded.startswith("desde"):
+        return amounts[0], None, period
+    if folded.startswith("hasta"):
+        return None, amounts[0], period
+    return min(amounts[:2]), max(amounts[:2]), period
+
+
+def salary_floor_clp(amount, currency) -> int | None:
+    """
+    Sueldo mínimo pedido en el chat (parse_prompt) en CLP mensuales, o None si el
+    número no parece un sueldo. parse_prompt marca "$" como USD, pero en Chile "$"
+    es pesos: montos grandes en "USD" se toman como CLP.
+    """
+    if not amount:
+        return None
+    if currency == "USD" and amount >= 20_000:
+        currency = "CLP"
+    return to_monthly_clp(amount, "month", currency)
@@ -0,0 +1,92 @@
+"""
+Caché de resultados de búsqueda (por proceso).
+
+Muchos usuarios responden lo mismo (p.ej. Tecnología / Desarrollo / Remoto /
+Junior / Santiago) y cada uno volvía a correr todo `_apply` + relajación. Aquí
+se guarda, por firma canónica de los filtros, lo necesario para rearmar la
+respuesta: IDs de la página, steps y metadata.
+
+    - tamaño acotado con desalojo LRU (settings.SEARCH_CACHE_SIZE, 0 = desactivada)
+    - se vacía completa cuando cambia la versión del catálogo
+      (ver `catalog.bump_data_version`)
+"""
+import copy
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+
+from .catalog import current_data_version
+
+
+def _canonical_filters(filters: dict) -> tuple:
+    """
+    Firma de un include/exclude. Se conserva el orden de las claves (define el
+    orden de relajación entre filtros de igual prioridad) y de los valores.
+    """
+    items = []
+    for attr, values in (filters or {}).items():
+        if isinstance(values, (list, tuple, set)):
+            values = tuple(v.strip() if isinstance(v, str) else v for v in values)
+        items.append((attr, values))
+    return tuple(items)
+
+
+def search_signature(include: dict, exclude: dict, salary_min, currency) -> tuple:
+    return (_canonical_filters(include), _canonical_filters(exclude), salary_min, currency)
+
+
+def freeze(value):
+    """Convierte dicts/listas (p.ej. un cursor) a tuplas para usarlos en una clave."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class ResultCache:
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self.version = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _sync_version(self):
+        version = current_data_version()
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+    def get(self, key):
+        """Devuelve una copia del valor guardado, o None si no está."""
+        if self.max_size <= 0:
+            return None
+        with self._lock:
+            self._sync_version()
+            value = self._entries.get(key)
+            if value is None:
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(value)
+
+    def set(self, key, value):
+        if self.max_size <= 0:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._sync_version()
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+results_cache = ResultCache(getattr(settings, "SEARCH_CACHE_SIZE", 512))
@@ -0,0 +1,183 @@
+"""
+Ranking por puntaje (alternativa a "estricto → relajación" de `engine.decide_jobs`).
+
+En vez de exigir todos los filtros y, si no hay resultados, ir quitando filtros en
+un orden fijo, cada empleo recibe un puntaje:
+
+    puntaje = Σ peso(slot) por cada filtro de include que cumple
+            + SEARCH_FRESHNESS_WEIGHT * 0.5 ** (días desde published_date / vida media)
+
+Los exclude siguen siendo obligatorios. Si se pidió industria o área funcional
+(filtros críticos), el empleo tiene que cumplir al menos uno de ellos; si no,
+al menos un filtro cualquiera (sin include, todos los no excluidos). Se devuelven los top-k por (puntaje desc, id):
+
+    - índice en memoria: puntaje por fila con los bitmaps y `heapq.nlargest` (heap de k)
+    - SQL: una sola consulta anotada con el puntaje; ORDER BY ... LIMIT k lo resuelve
+      Postgres con "top-N heapsort"
+
+El puntaje depende de la fecha de referencia (`as_of`), que viaja en el cursor para
+que todas las páginas de una conversación usen la misma.
+"""
+import heapq
+from datetime import date
+
+from django.conf import settings
+from django.db.models import Case, Count, DurationField, ExpressionWrapper, F, FloatField, Q, Value, When, Window
+from django.db.models.functions import Cast, Coalesce, ExtractDay, Power
+
+from .search_view import adapt_q
+
+# Peso de cada slot de include (los críticos pesan más)
+SCORE_WEIGHTS = {
+    "industry": 6.0,
+    "area": 5.0,
+    "role": 4.0,
+    "modality": 3.0,
+    "seniority": 2.0,
+    "location": 2.0,
+    "salary": 2.0,
+    "accessibility": 1.0,
+    "transport": 1.0,
+}
+DEFAULT_WEIGHT = 1.0
+
+CRITICAL_FILTERS = ("industry", "area")
+
+
+def freshness_weight() -> float:
+    return getattr(settings, "SEARCH_FRESHNESS_WEIGHT", 1.0)
+
+
+def freshness_half_life() -> float:
+    return getattr(settings, "SEARCH_FRESHNESS_HALF_LIFE_DAYS", 30.0)
+
+
+def freshness(published, as_of: date) -> float:
+    """Entre 0 y 1: 1 si se publicó en `as_of`, la mitad cada `vida media` días, 0 sin fecha."""
+    if published is None:
+        return 0.0
+    age = max(0, (as_of - published).days)
+    return 0.5 ** (age / freshness_half_life())
+
+
+class ScorePlan:
+    """
+    Condiciones de `engine._build_conditions` separadas en facetas con peso
+    (include) y condiciones obligatorias (exclude).
+    """
+
+    def __init__(self, conditions):
+        self.facets = []   # (attr, peso, Q)
+        self.hard = []     # ("exclude", Q)
+        for kind, attr, q in conditions:
+            if not q:
+                continue
+            if kind == "exclude":
+                self.hard.append((kind, q))
+            else:
+                self.facets.append((attr, SCORE_WEIGHTS.get(attr, DEFAULT_WEIGHT), q))
+        required = [i for i, (attr, _, _) in enumerate(self.facets) if attr in CRITICAL_FILTERS]
+        self.required = required or list(range(len(self.facets)))
+
+    @property
+    def weights(self) -> dict:
+        return {attr: weight for attr, weight, _ in self.facets}
+
+    # ---------- índice en memoria ----------
+
+    def top_k_index(self, index, as_of: date, k: int, offset: int = 0, after=None):
+        """
+        Returns:
+            (total de candidatos, [(id, puntaje, [slots cumplidos]), ...]) de la página
+        """
+        facet_bits = [index.evaluate(q) for _, _, q in self.facets]
+        # Sin facetas (solo exclude, o nada) todos son candidatos, como el filter(Q()) de SQL
+        candidates = 0 if self.required else index.all_bits
+        for i in self.required:
+            candidates |= facet_bits[i]
+        candidates &= index.filter_bits(self.hard)
+        total = candidates.bit_count()
+
+        published = index.row_values("published_date")
+        fw = freshness_weight()
+
+        def scored():
+            bits = candidates
+            while bits:
+                low = bits & -bits
+                pos = low.bit_length() - 1
+                bits ^= low
+                matched = [i for i, fb in enumerate(facet_bits) if (fb >> pos) & 1]
+                score = sum(self.facets[i][1] for i in matched) + fw * freshness(published[pos], as_of)
+                job_id = index.ids[pos]
+                if after is not None and not _is_after(score, job_id, after):
+                    continue
+                yield score, -job_id, matched
+
+        top = heapq.nlargest(offset + k, scored(), key=lambda item: (item[0], item[1]))[offset:]
+        return total, [(-neg_id, score, [self.facets[i][0] for i in matched]) for score, neg_id, matched in top]
+
+    # ---------- SQL ----------
+
+    def queryset(self, queryset, as_of: date):
+        """
+        `queryset` filtrado a los candidatos y anotado con `score` y `match_<i>` por faceta,
+        ordenado por (score desc, id).
+        """
+        annotations = {}
+        score = Value(0.0)
+        facets = [(attr, weight, adapt_q(q, queryset)) for attr, weight, q in self.facets]
+        for i, (_, weight, q) in enumerate(facets):
+            annotations[f"match_{i}"] = Case(When(q, then=Value(True)), default=Value(False))
+            score = score + Case(When(q, then=Value(weight)), default=Value(0.0))
+        age = ExtractDay(ExpressionWrapper(Value(as_of) - F("published_date"), output_field=DurationField()))
+        # Fechas futuras cuentan como hoy; sin fecha la edad queda NULL (GREATEST ignoraría el NULL)
+        age = Case(When(published_date__gt=as_of, then=Value(0)), default=age)
+        fresh = Power(Value(0.5), Cast(age, FloatField()) / Value(freshness_half_life()))
+        score = score + Value(freshness_weight()) * Coalesce(fresh, Value(0.0))
+        # double precision: el puntaje leído en Python sirve para comparar por igualdad en el cursor
+        annotations["score"] = Cast(score, FloatField())
+
+        required = Q()
+        for i in self.required:
+            required |= facets[i][2]
+        qs = queryset.filter(required)
+        for _, q in self.hard:
+            qs = qs.exclude(adapt_q(q, queryset))
+        return qs.annotate(**annotations).order_by("-score", "id")
+
+    def page_sql(self, queryset, as_of: date, columns, k: int, offset: int = 0, after=None):
+        """
+        Returns:
+            (total de candidatos, [(fila de `columns`, puntaje, [slots cumplidos]), ...]) de la página
+
+        Sin `after` el total sale de la misma consulta (COUNT(*) OVER ()); con cursor
+        la ventana solo vería las filas siguientes y se cuenta aparte.
+        """
+        qs = self.queryset(queryset, as_of)
+        page = qs
+        if after is not None:
+            score, job_id = after
+            page = page.filter(Q(score__lt=score) | Q(score=score, id__gt=job_id))
+            offset = 0
+        match_names = [f"match_{i}" for i in range(len(self.facets))]
+        rows = list(
+            page.annotate(total_rows=Window(Count("id")))
+            .values_list(*columns, "score", *match_names, "total_rows")[offset:offset + k]
+        )
+        n = len(columns)
+        out = []
+        for row in rows:
+            matched = [self.facets[i][0] for i, hit in enumerate(row[n + 1:-1]) if hit]
+            out.append((row[:n], row[n], matched))
+        if rows and after is None:
+            total = rows[0][-1]
+        else:
+            total = qs.count() if (after is not None or offset) else 0
+        return total, out
+
+
+def _is_after(score: float, job_id: int, after) -> bool:
+    """True si (score, id) va después del cursor en el orden (score desc, id asc)."""
+    after_score, after_id = after
+    return score < after_score or (score == after_score and job_id > after_id)
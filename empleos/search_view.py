@@ -0,0 +1,80 @@
+"""
+Vista materializada de búsqueda (`empleos_jobsearch`, migración 0012, modelo JobSearch).
+
+Una fila angosta por empleo con las columnas que filtran y muestran las búsquedas:
+JobPosting + empresa / ubicación / fuente ya unidas (sin `select_related`) y las
+facetas de texto en minúsculas y sin tildes (`area_norm`, `subarea_norm`,
+`modality_norm`, `title_norm`, `location_norm`), con índices propios.
+
+Las facetas normalizadas salen de las columnas `*_norm` de JobPosting / Location
+(reglas de nlp._norm, migración 0013); `title_norm` se calcula al refrescar.
+
+El engine sigue armando sus condiciones como `Q` sobre JobPosting (las mismas que
+evalúa el índice en memoria); `adapt_q` las traduce al modelo del queryset:
+
+    area_norm__in=[...]                     →  area_norm__in=[...]
+    location__raw_text_norm__in=[...]       →  location_norm__in=[...]
+    location__tokens__contains=[...]        →  location_tokens__contains=[...]
+    company__name="ACME"                    →  company_name="ACME"
+
+La vista se refresca (CONCURRENTLY, sin bloquear lecturas) cuando cambia el
+catálogo: `catalog.bump_data_version()` llama a `refresh_search_view()`.
+Con settings.SEARCH_VIEW_ENABLED = False el engine vuelve a leer JobPosting.
+"""
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+
+from .models import JobSearch
+
+VIEW_NAME = JobSearch._meta.db_table
+
+# Campos de JobPosting con otro nombre en la vista
+RENAMED = {
+    "location__raw_text_norm": "location_norm",
+}
+
+# Relaciones que en la vista son columnas planas (location__tokens → location_tokens)
+FLATTENED = ("location__", "company__", "source__")
+
+
+def search_view_enabled() -> bool:
+    return getattr(settings, "SEARCH_VIEW_ENABLED", True)
+
+
+def view_field(path: str) -> str:
+    """Nombre en la vista de un campo / lookup de JobPosting (`location__raw_text` → `location_raw_text`)."""
+    for name, renamed in RENAMED.items():
+        if path == name or path.startswith(name + "__"):
+            return renamed + path[len(name):]
+    for prefix in FLATTENED:
+        if path.startswith(prefix):
+            return prefix[:-2] + "_" + path[len(prefix):]
+    return path
+
+
+def _adapt_leaf(lookup: str, value):
+    return view_field(lookup), value
+
+
+def to_search_view(q: Q) -> Q:
+    """Traduce un `Q` sobre JobPosting a las columnas de JobSearch."""
+    children = [to_search_view(child) if isinstance(child, Q) else _adapt_leaf(*child) for child in q.children]
+    return Q(*children, _connector=q.connector, _negated=q.negated)
+
+
+def adapt_q(q: Q, queryset) -> Q:
+    """`q` (sobre JobPosting) listo para filtrar `queryset`, sea de JobPosting o de la vista."""
+    if queryset.model is JobSearch:
+        return to_search_view(q)
+    return q
+
+
+def refresh_search_view(concurrently: bool = True):
+    """REFRESH MATERIALIZED VIEW; CONCURRENTLY deja seguir leyendo la versión anterior mientras tanto."""
+    started = time.perf_counter()
+    with connection.cursor() as cursor:
+        cursor.execute(f"REFRESH MATERIALIZED VIEW {'CONCURRENTLY ' if concurrently else ''}{VIEW_NAME}")
+    print(f"🔄 Vista de búsqueda {VIEW_NAME} refrescada en {time.perf_counter() - started:.2f}s")
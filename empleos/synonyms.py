@@ -0,0 +1,119 @@
+"""
+Búsqueda de sinónimos en un texto con un autómata Aho-Corasick.
+
+`parse_prompt` recorría el diccionario inverso de sinónimos (sinónimo → canónico,
+cientos de entradas con los dinámicos) una vez por slot, y por cada sinónimo
+normalizaba ambos textos y compilaba un regex `\\bsinónimo\\b`. `SynonymMatcher`
+compila todos los sinónimos en un solo autómata (una vez por versión de la
+taxonomía, ver nlp.get_synonym_matcher) y una pasada por el texto devuelve todos
+los aciertos, etiquetados con su canónico y los slots a los que pertenece:
+
+    matcher.hits("busco trabajo remoto junior")
+    → [SynonymHit("remoto", "remoto", ("modality",), (13, 19)), SynonymHit("junior", "junior", ("seniority",), (20, 26))]
+
+    - `hits(text)`: palabra completa sobre el texto normalizado (misma semántica que
+      `nlp._is_whole_word(text, sinónimo)`)
+    - `substring_hits(text)`: `sinónimo in text` tal cual (las negaciones de parse_prompt)
+
+Los aciertos salen en el orden del diccionario de sinónimos (el mismo en que los
+recorrían los loops), cada sinónimo una sola vez; `span` es su primera aparición en
+el texto normalizado.
+"""
+from typing import Callable, Dict, List, NamedTuple, Tuple
+
+from .normalize import norm_text
+
+
+class SynonymHit(NamedTuple):
+    synonym: str
+    canon: str
+    slots: Tuple[str, ...]
+    span: Tuple[int, int] | None = None
+
+
+class _Automaton:
+    """Trie de patrones con enlaces de falla (Aho-Corasick)."""
+
+    def __init__(self, patterns: Dict[str, List[int]]):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]      # por estado: (largo del patrón, ids)
+        for pattern, ids in patterns.items():
+            state = 0
+            for ch in pattern:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((len(pattern), ids))
+
+        # BFS: la falla de cada estado es el sufijo propio más largo que también está en el trie
+        # (los de profundidad 1 fallan a la raíz)
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def find(self, text: str):
+        """(inicio, fin, ids) de cada aparición de cada patrón en `text`."""
+        state = 0
+        for end, ch in enumerate(text, 1):
+            while state and ch not in self.goto[state]:
+                state = self.fail[state]
+            state = self.goto[state].get(ch, 0)
+            for length, ids in self.out[state]:
+                yield end - length, end, ids
+
+
+def _is_word_char(ch: str) -> bool:
+    # Lo mismo que \w en un regex de str
+    return ch.isalnum() or ch == "_"
+
+
+def _at_boundary(text: str, pos: int) -> bool:
+    """Equivalente a `\\b` en la posición `pos` de `text`."""
+    before = pos > 0 and _is_word_char(text[pos - 1])
+    after = pos < len(text) and _is_word_char(text[pos])
+    return before != after
+
+
+class SynonymMatcher:
+    def __init__(self, inv_synonyms: Dict[str, str], slots_of: Callable[[str], Tuple[str, ...]]):
+        self.entries = [
+            SynonymHit(synonym, canon, slots_of(canon)) for synonym, canon in inv_synonyms.items()
+        ]
+        words, raw = {}, {}
+        for i, entry in enumerate(self.entries):
+            pattern = norm_text(entry.synonym)
+            if pattern:
+                words.setdefault(pattern, []).append(i)
+            if entry.synonym:
+                raw.setdefault(entry.synonym, []).append(i)
+        self._words = _Automaton(words)
+        self._raw = _Automaton(raw)
+
+    def hits(self, text: str) -> List[SynonymHit]:
+        """Sinónimos que aparecen como palabra completa en `text` (se normaliza con norm_text)."""
+        text = norm_text(text) or ""
+        found = {}
+        for start, end, ids in self._words.find(text):
+            if _at_boundary(text, start) and _at_boundary(text, end):
+                for i in ids:
+                    found.setdefault(i, (start, end))
+        return [self.entries[i]._replace(span=found[i]) for i in sorted(found)]
+
+    def substring_hits(self, text: str) -> List[SynonymHit]:
+        """Sinónimos contenidos en `text` tal cual, sin normalizar ni exigir palabra completa."""
+        found = set()
+        for _, _, ids in self._raw.find(text or ""):
+            found.update(ids)
+        return [self.entries[i] for i in sorted(found)]
@@ -0,0 +1,56 @@
+"""
+Snapshot de la taxonomía del catálogo (por proceso).
+
+`parse_prompt`, `parse_simple_response` y `_merge_state_with_prompt` piden una y
+otra vez las mismas listas (industrias, modalidades, áreas, ubicaciones, roles,
+sinónimos); cada una era un `SELECT DISTINCT` sobre JobPosting, 15-25 consultas
+iguales por mensaje del chat. Aquí se guardan una vez por versión del catálogo:
+
+    - cada lista se calcula la primera vez que se pide (`value(nombre, loader)`)
+      y queda en el snapshot hasta que cambie la versión
+    - cuando los importadores o `JobPostingListCreateAPI.post` llaman a
+      `catalog.bump_data_version()`, el siguiente `get_taxonomy()` de cada
+      proceso arma un snapshot nuevo (vacío) y las listas se recalculan
+    - la versión se lee una vez por request (catalog.current_data_version)
+
+Los valores se comparten entre llamadas: no modificarlos (ver nlp.get_current_*).
+"""
+import threading
+
+from .catalog import current_data_version
+
+
+class TaxonomySnapshot:
+    def __init__(self, version: int):
+        self.version = version
+        self._values = {}
+        # Reentrante: los sinónimos se arman a partir de las otras listas del snapshot
+        self._lock = threading.RLock()
+
+    def value(self, name: str, loader):
+        """Valor `name` del snapshot; se calcula con `loader()` la primera vez."""
+        try:
+            return self._values[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = loader()
+            return self._values[name]
+
+
+_SNAPSHOT = None
+_SNAPSHOT_LOCK = threading.Lock()
+
+
+def get_taxonomy() -> TaxonomySnapshot:
+    """Devuelve el snapshot del proceso, uno nuevo si cambió la versión del catálogo."""
+    global _SNAPSHOT
+    version = current_data_version()
+    snapshot = _SNAPSHOT
+    if snapshot is None or snapshot.version != version:
+        with _SNAPSHOT_LOCK:
+            if _SNAPSHOT is None or _SNAPSHOT.version != version:
+                _SNAPSHOT = TaxonomySnapshot(version)
+            snapshot = _SNAPSHOT
+    return snapshot
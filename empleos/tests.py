@@ -1,3 +1,439 @@
-from django.test import TestCase
+from datetime import date
+from unittest import mock
 
-# Create your tests here.
+import pandas as pd
+from django.contrib.auth.models import AnonymousUser, User
+from django.db import connection, transaction
+from django.db.models import Q
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from .catalog import request_data_version, touch_data_version
+from .engine import FACET_SLOTS, _build_conditions, decide_jobs, facet_counts, variety_cursor
+from .index import INDEXED_FIELDS, JobIndex
+from .management.commands.backfill_salaries import FIELDS as SALARY_FIELDS, parse_salaries
+from .models import Company, JobPosting, Location, Source
+from .normalize import norm_text, parse_experience_years, parse_location, parse_salary, seniority_years_range
+from .result_cache import results_cache
+from .scoring import ScorePlan
+from .taxonomy import get_taxonomy
+from .tracing import trace_requested
+
+
+@override_settings(JOB_INDEX_ENABLED=False)
+class SearchIndexTests(TestCase):
+    """Las condiciones de `engine._build_conditions` las sirven los índices de sus columnas."""
+
+    @classmethod
+    def setUpTestData(cls):
+        source = Source.objects.create(name="test")
+        company = Company.objects.create(name="ACME")
+        location = Location.objects.create(raw_text="Santiago, Región Metropolitana")
+        JobPosting.objects.create(
+            source=source, company=company, location=location, url="https://example.com/1",
+            title="Desarrollador backend", area="Tecnología", subarea="Desarrollo de Software",
+            work_modality="Remoto", min_experience="1 año", salary_text="$1.000.000 líquidos",
+        )
+
+    def setUp(self):
+        # Los valores de las facetas se cachean por versión del catálogo
+        results_cache.clear()
+
+    def explain(self, queryset) -> str:
+        # Con tablas de prueba chicas el planner prefiere el seq scan: se desactiva
+        # solo dentro de la transacción del test para ver si el índice SIRVE la consulta
+        with connection.cursor() as cursor:
+            cursor.execute("SET LOCAL enable_seqscan = off")
+        return queryset.explain()
+
+    def assertUsesIndex(self, include, index_prefix):
+        [(_, _, q)] = _build_conditions(include, {})
+        plan = self.explain(JobPosting.objects.filter(q))
+        self.assertIn(index_prefix, plan, plan)
+
+    def test_industry(self):
+        self.assertUsesIndex({"industry": ["Tecnologia"]}, "empleos_jobposting_area_norm")
+
+    def test_area(self):
+        self.assertUsesIndex({"area": ["Desarrollo"]}, "empleos_jobposting_subarea_norm")
+
+    def test_modality(self):
+        self.assertUsesIndex({"modality": ["REMOTO"]}, "empleos_jobposting_modality_norm")
+
+    def test_seniority(self):
+        self.assertUsesIndex({"seniority": ["Junior"]}, "empleos_jobposting_min_experience_years")
+
+    def test_location(self):
+        self.assertUsesIndex({"location": ["Santiago"]}, "empleos_loc_tokens")
+
+    def test_role(self):
+        self.assertUsesIndex({"role": ["desarrollador"]}, "empleos_job_search_")
+
+    def test_salary(self):
+        self.assertUsesIndex({"salary": [800000]}, "empleos_jobposting_salary_max_clp")
+
+    def test_seniority_text_fallback(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT count(*) FROM pg_extension WHERE extname = 'pg_trgm'")
+            if not cursor.fetchone()[0]:
+                self.skipTest("pg_trgm no disponible (migración 0015)")
+        self.assertUsesIndex({"seniority": ["experto"]}, "empleos_job_min_experience_trgm")
+
+    def test_salary_exclude_ignored(self):
+        conditions = list(_build_conditions({}, {"salary": [800000], "modality": ["Remoto"]}))
+        self.assertEqual([attr for _, attr, _ in conditions], ["modality"])
+
+    def test_facets_match_without_accents_or_case(self):
+        for include in ({"industry": ["TECNOLOGÍA"]}, {"area": ["desarrollo de software"]}, {"modality": ["remoto"]}):
+            [(_, _, q)] = _build_conditions(include, {})
+            self.assertEqual(JobPosting.objects.filter(q).count(), 1, include)
+
+    def test_facets_match_with_enie(self):
+        JobPosting.objects.create(
+            source=Source.objects.get(), company=Company.objects.get(), url="https://example.com/2",
+            title="Diseñador", area="Diseño", subarea="Diseño Gráfico",
+        )
+        for include in ({"industry": ["diseño"]}, {"area": ["DISENO GRAFICO"]}):
+            [(_, _, q)] = _build_conditions(include, {})
+            self.assertEqual(list(JobPosting.objects.filter(q).values_list("url", flat=True)),
+                             ["https://example.com/2"], include)
+
+    def test_empty_needle_matches_nothing(self):
+        # Un valor que normalizado queda vacío no debe volverse "contiene ''" (todas las filas)
+        [(_, _, q)] = _build_conditions({"area": ["¿?"]}, {})
+        self.assertEqual(JobPosting.objects.filter(q).count(), 0)
+        [(_, _, q)] = _build_conditions({}, {"area": ["¿?"]})
+        self.assertEqual(JobPosting.objects.exclude(q).count(), 1)
+
+
+class ScorePlanPathsTests(TestCase):
+    """El modo por puntaje devuelve lo mismo con el índice en memoria y con SQL."""
+
+    AS_OF = date(2025, 11, 1)
+
+    @classmethod
+    def setUpTestData(cls):
+        source = Source.objects.create(name="test")
+        company = Company.objects.create(name="ACME")
+        for i, (modality, published) in enumerate([
+            ("Remoto", date(2025, 10, 30)),
+            ("Presencial", date(2025, 10, 1)),
+            ("Híbrido", None),
+            ("Presencial", date(2025, 9, 1)),
+        ]):
+            JobPosting.objects.create(
+                source=source, company=company, url=f"https://example.com/{i}", title=f"Empleo {i}",
+                work_modality=modality, published_date=published,
+            )
+
+    def both_paths(self, include, exclude):
+        plan = ScorePlan(_build_conditions(include, exclude))
+        index_total, ranked = plan.top_k_index(JobIndex.build(0), self.AS_OF, k=10)
+        sql_total, rows = plan.page_sql(JobPosting.objects.all(), self.AS_OF, ["id"], k=10)
+        index_page = [(job_id, round(score, 6)) for job_id, score, _ in ranked]
+        sql_page = [(row[0], round(score, 6)) for row, score, _ in rows]
+        self.assertEqual(index_total, sql_total)
+        self.assertEqual(index_page, sql_page)
+        return index_total, index_page
+
+    def test_empty_filters(self):
+        total, page = self.both_paths({}, {})
+        self.assertEqual(total, 4)
+        self.assertEqual(len(page), 4)
+
+    def test_exclude_only(self):
+        total, page = self.both_paths({}, {"modality": ["Presencial"]})
+        self.assertEqual(total, 2)
+        presencial = set(JobPosting.objects.filter(work_modality="Presencial").values_list("id", flat=True))
+        self.assertFalse(presencial & {job_id for job_id, _ in page})
+
+    def test_include_and_exclude(self):
+        total, _ = self.both_paths({"modality": ["Remoto", "Presencial"]}, {"modality": ["Presencial"]})
+        self.assertEqual(total, 1)
+
+
+@override_settings(SEARCH_VIEW_ENABLED=False, SEARCH_RANKING="relax")
+class DeletedCursorRowTests(TestCase):
+    """La página siguiente sale bien aunque se haya borrado la fila del cursor."""
+
+    @classmethod
+    def setUpTestData(cls):
+        source = Source.objects.create(name="test")
+        company = Company.objects.create(name="ACME")
+        for i in range(9):
+            # Repetir el cargo cambia el ts_rank: hay empates y rangos distintos
+            JobPosting.objects.create(
+                source=source, company=company, url=f"https://example.com/{i}",
+                title=" ".join(["Vendedor"] * (i % 3 + 1)) + f" tienda {i}",
+            )
+
+    def page(self, include, variety, cursor, offset=0):
+        results, _, metadata = decide_jobs(include, {}, None, None, topn=3, offset=offset, variety=variety, cursor=cursor)
+        return [r["id"] for r in results], metadata["next_cursor"]
+
+    def assertNextPageSkipsDeleted(self, include, variety):
+        start = variety_cursor(12345) if variety else None
+        for index_enabled in (False, True):
+            with self.subTest(index=index_enabled), override_settings(JOB_INDEX_ENABLED=index_enabled), transaction.atomic():
+                results_cache.clear()
+                order, cursor = [], start
+                for offset in range(0, 9, 3):
+                    ids, cursor = self.page(include, variety, cursor, offset)
+                    order += ids
+                self.assertEqual(sorted(order), sorted(JobPosting.objects.values_list("id", flat=True)))
+
+                results_cache.clear()
+                first, cursor = self.page(include, variety, start)
+                JobPosting.objects.filter(id=first[-1]).delete()
+                touch_data_version()
+                results_cache.clear()
+                self.assertEqual(self.page(include, variety, cursor, offset=3)[0], order[3:6])
+                transaction.set_rollback(True)
+
+    def test_shuffled(self):
+        self.assertNextPageSkipsDeleted({}, variety=True)
+
+    def test_ranked(self):
+        self.assertNextPageSkipsDeleted({"role": ["Vendedor"]}, variety=False)
+
+    def test_cursor_without_key_uses_offset(self):
+        results_cache.clear()
+        order = self.page({"role": ["Vendedor"]}, False, None)[0] + self.page({"role": ["Vendedor"]}, False, None, offset=3)[0]
+        old_cursor = {"order": "rank", "id": order[2]}
+        self.assertEqual(self.page({"role": ["Vendedor"]}, False, old_cursor, offset=3)[0], order[3:6])
+
+
+class TraceRequestedTests(SimpleTestCase):
+    """`?trace=1` solo se acepta con DEBUG o para staff (la traza expone SQL)."""
+
+    def request(self, user):
+        request = Request(APIRequestFactory().get("/api/search/", {"trace": "1"}))
+        request.user = user
+        return request
+
+    @override_settings(DEBUG=False)
+    def test_anonymous_flag_ignored(self):
+        self.assertIsNone(trace_requested(self.request(AnonymousUser())))
+
+    @override_settings(DEBUG=False)
+    def test_staff_flag_honored(self):
+        self.assertTrue(trace_requested(self.request(User(username="ops", is_staff=True))))
+
+    @override_settings(DEBUG=True)
+    def test_debug_flag_honored(self):
+        self.assertTrue(trace_requested(self.request(AnonymousUser())))
+
+
+class RequestDataVersionTests(TestCase):
+    """Dentro de un request la versión del catálogo se lee una sola vez."""
+
+    def test_one_query_per_request(self):
+        with request_data_version():
+            with self.assertNumQueries(1):
+                for _ in range(3):
+                    get_taxonomy()
+                    results_cache.get(("missing",))
+
+    def test_touch_updates_request_version(self):
+        with request_data_version():
+            before = get_taxonomy().version
+            touch_data_version()
+            self.assertEqual(get_taxonomy().version, before + 1)
+
+
+class ParseSalariesTests(SimpleTestCase):
+    """backfill_salaries.parse_salaries (pandas) da lo mismo que normalize.parse_salary fila a fila."""
+
+    TEXTS = [
+        "500.000 - 610.000 CLP", "$700.000 bruto", "Sueldo a convenir", "", None, "2 años",
+        "desde 800 mil", "hasta 1,5 millones", "USD 2.000 mensual", "$5.000 por hora",
+        "12 millones anual", "15.000 diario", "500k semanal", "Entre $900.000 y $1.200.000 líquidos",
+    ]
+
+    def test_matches_parse_salary(self):
+        parsed = parse_salaries(pd.Series(self.TEXTS))
+        for i, text in enumerate(self.TEXTS):
+            with self.subTest(text=text):
+                self.assertEqual(tuple(parsed.loc[i, SALARY_FIELDS]), parse_salary(text))
+
+
+def fake_index(*jobs):
+    """JobIndex en memoria (sin BD) a partir de dicts {id, columna: valor}; lo que falta queda en None."""
+    rows = [(job["id"], job["id"], *[job.get(field) for field in INDEXED_FIELDS]) for job in jobs]
+    return JobIndex.from_rows(0, rows)
+
+
+FAKE_JOBS = [
+    {"id": 1, "area_norm": "tecnologia", "modality_norm": "remoto", "min_experience_years": 0,
+     "location__region": "metropolitana", "location__raw_text_norm": "santiago", "accessibility_mentioned": True,
+     "published_date": date(2025, 11, 1)},
+    {"id": 2, "area_norm": "tecnologia", "modality_norm": "presencial", "min_experience_years": 3,
+     "location__region": "valparaiso", "published_date": date(2025, 10, 1)},
+    {"id": 3, "area_norm": "ventas", "modality_norm": "remoto", "min_experience_years": 1,
+     "location__region": "metropolitana", "location__raw_text_norm": "santiago", "published_date": date(2025, 11, 1)},
+    {"id": 4, "area_norm": "ventas", "modality_norm": "hibrido", "min_experience_years": None,
+     "location__region": None, "published_date": None},
+    {"id": 5, "area_norm": "tecnologia", "modality_norm": "hibrido", "min_experience_years": 6,
+     "location__region": "metropolitana", "published_date": date(2025, 10, 2)},
+]
+
+
+class JobIndexUnitTests(SimpleTestCase):
+    """Evaluación de condiciones sobre un índice chico armado sin BD."""
+
+    def setUp(self):
+        self.index = fake_index(*FAKE_JOBS)
+
+    def ids(self, bits):
+        return self.index.select_ids(bits)
+
+    def test_include_and_exclude(self):
+        bits = self.index.filter_bits([
+            ("include", Q(area_norm="tecnologia")),
+            ("exclude", Q(modality_norm="presencial")),
+        ])
+        self.assertEqual(self.ids(bits), [1, 5])
+
+    def test_empty_q_is_ignored(self):
+        self.assertEqual(self.ids(self.index.filter_bits([("include", Q()), ("exclude", Q())])), [1, 2, 3, 4, 5])
+
+    def test_or_negation_and_lookups(self):
+        q = Q(modality_norm="remoto") | Q(min_experience_years__gte=5)
+        self.assertEqual(self.ids(self.index.evaluate(q)), [1, 3, 5])
+        self.assertEqual(self.ids(self.index.evaluate(~Q(location__region="metropolitana"))), [2, 4])
+        self.assertEqual(self.ids(self.index.evaluate(Q(modality_norm__in=["hibrido", "presencial"]))), [2, 4, 5])
+        self.assertEqual(self.ids(self.index.evaluate(Q(min_experience_years__isnull=True))), [4])
+
+    def test_salary_floor(self):
+        index = fake_index(
+            {"id": 1},                                                      # a convenir
+            {"id": 2, "salary_min_clp": 400_000},                           # "desde $400.000"
+            {"id": 3, "salary_min_clp": 900_000},                           # "desde $900.000"
+            {"id": 4, "salary_max_clp": 1_000_000},                         # "hasta $1.000.000"
+            {"id": 5, "salary_min_clp": 500_000, "salary_max_clp": 600_000},
+        )
+        [(_, _, q)] = _build_conditions({"salary": [800_000]}, {})
+        self.assertEqual(index.select_ids(index.evaluate(q)), [1, 3, 4])
+
+    def test_pages_and_facets(self):
+        bits = self.index.all_bits
+        self.assertEqual(self.index.select_ids(bits, offset=1, limit=2), [2, 3])
+        self.assertEqual(self.index.select_ids(bits, limit=2, after_id=3), [4, 5])
+        self.assertEqual(self.index.facet("area_norm", bits), {"tecnologia": 3, "ventas": 2})
+        self.assertEqual(self.index.row_values("modality_norm"), ["remoto", "presencial", "remoto", "hibrido", "hibrido"])
+
+
+@override_settings(JOB_INDEX_ENABLED=True, SEARCH_VIEW_ENABLED=True)
+class FacetCountsIndexTests(SimpleTestCase):
+    """facet_counts con índice y vista activos lee las columnas del índice (nombres de JobPosting)."""
+
+    def test_every_facet_slot(self):
+        index = fake_index(*FAKE_JOBS)
+        with mock.patch("empleos.engine.get_job_index", return_value=index):
+            counts = {slot: facet_counts({}, {}, slot) for slot in FACET_SLOTS}
+        self.assertEqual(counts["location"], {"santiago": 2, None: 3})
+        self.assertEqual(counts["modality"], {"remoto": 2, "presencial": 1, "hibrido": 2})
+        self.assertEqual(counts["accessibility"], {True: 1, None: 4})
+        for slot in FACET_SLOTS:
+            self.assertEqual(sum(counts[slot].values()), len(FAKE_JOBS), slot)
+
+
+@override_settings(SEARCH_FRESHNESS_WEIGHT=1.0, SEARCH_FRESHNESS_HALF_LIFE_DAYS=30.0)
+class ScorePlanUnitTests(SimpleTestCase):
+    """ScorePlan sobre el índice de JobIndexUnitTests (sin BD)."""
+
+    AS_OF = date(2025, 11, 1)
+
+    def setUp(self):
+        self.index = fake_index(*FAKE_JOBS)
+
+    def top(self, include, exclude=(), **kwargs):
+        conditions = [("include", attr, q) for attr, q in include] + [("exclude", attr, q) for attr, q in exclude]
+        total, ranked = ScorePlan(conditions).top_k_index(self.index, self.AS_OF, kwargs.pop("k", 10), **kwargs)
+        return total, [(job_id, round(score, 6), slots) for job_id, score, slots in ranked]
+
+    def test_facets_and_hard_conditions(self):
+        plan = ScorePlan([
+            ("include", "modality", Q(modality_norm="remoto")),
+            ("include", "location", Q()),
+            ("include", "area", Q(area_norm="tecnologia")),
+            ("exclude", "modality", Q(modality_norm="presencial")),
+        ])
+        self.assertEqual(plan.weights, {"modality": 3.0, "area": 5.0})
+        self.assertEqual(len(plan.hard), 1)
+        # Con un filtro crítico (área) solo ese es obligatorio
+        self.assertEqual(plan.required, [1])
+
+    def test_critical_filter_required(self):
+        total, ranked = self.top(
+            [("area", Q(area_norm="tecnologia")), ("modality", Q(modality_norm="remoto"))],
+            [("modality", Q(modality_norm="presencial"))],
+        )
+        self.assertEqual(total, 2)
+        self.assertEqual(ranked, [(1, 9.0, ["area", "modality"]), (5, 5.5, ["area"])])
+
+    def test_any_filter_without_critical(self):
+        total, ranked = self.top([("modality", Q(modality_norm="remoto"))])
+        self.assertEqual(total, 2)
+        # Empate de puntaje: desempata el id
+        self.assertEqual(ranked, [(1, 4.0, ["modality"]), (3, 4.0, ["modality"])])
+
+    def test_exclude_only_and_empty(self):
+        total, ranked = self.top([], [("modality", Q(modality_norm="presencial"))])
+        self.assertEqual(total, 4)
+        self.assertEqual([job_id for job_id, _, _ in ranked], [1, 3, 5, 4])
+        self.assertEqual(self.top([])[0], 5)
+
+    def test_offset_and_cursor(self):
+        exclude = [("modality", Q(modality_norm="presencial"))]
+        self.assertEqual([r[0] for r in self.top([], exclude, k=2, offset=1)[1]], [3, 5])
+        self.assertEqual([r[0] for r in self.top([], exclude, k=2, after=(1.0, 1))[1]], [3, 5])
+
+
+class NormalizeParsersTests(SimpleTestCase):
+    """Parsers puros de normalize.py."""
+
+    def test_parse_experience_years(self):
+        for text, years in [("2 años", 2), ("3", 3), ("6 meses", 0), ("18 meses", 1), ("1 año y 6 meses", 1),
+                            ("Sin experiencia", 0), ("Junior", 0), ("Indiferente", None), ("", None), (None, None)]:
+            with self.subTest(text=text):
+                self.assertEqual(parse_experience_years(text), years)
+
+    def test_seniority_years_range(self):
+        for seniority, years in [("junior", (0, 2)), ("Jr", (0, 2)), (" ssr ", (2, 5)), ("SENIOR", (5, None)), ("experto", None)]:
+            with self.subTest(seniority=seniority):
+                self.assertEqual(seniority_years_range(seniority), years)
+
+    def test_norm_text(self):
+        for text, norm in [("Diseño Gráfico", "diseno grafico"), ("Bilingüe", "bilingue"), ("ÑUÑOA", "nunoa"),
+                           ("Ventas / Retail", "ventas / retail"), ("¿?", ""), (None, None)]:
+            with self.subTest(text=text):
+                self.assertEqual(norm_text(text), norm)
+
+    def test_parse_location(self):
+        self.assertEqual(parse_location("Las Condes, RM"),
+                         {"comuna": "las condes", "region": "metropolitana", "tokens": ["condes"], "is_junk": False})
+        self.assertEqual(parse_location("Viña del Mar, Valparaíso")["comuna"], "vina del mar")
+        self.assertEqual(parse_location("Santiago")["region"], "metropolitana")
+        self.assertEqual(parse_location("Región Metropolitana")["comuna"], None)
+        self.assertEqual(parse_location("Providencia 1234, Región Metropolitana de Santiago")["comuna"], "providencia")
+        self.assertTrue(parse_location("Necesitamos tu autorización")["is_junk"])
+
+    def test_parse_salary(self):
+        for text, parsed in [
+            ("500.000 - 610.000 CLP", (500000, 610000, "month")),
+            ("$700.000 bruto", (700000, 700000, "month")),
+            ("Sueldo a convenir", (None, None, None)),
+            ("desde 800 mil", (800000, None, "month")),
+            ("hasta 1,5 millones", (None, 1500000, "month")),
+            ("$5.000 por hora", (900000, 900000, "hour")),
+            ("12 millones anual", (1000000, 1000000, "year")),
+            ("2 años", (None, None, None)),
+        ]:
+            with self.subTest(text=text):
+                self.assertEqual(parse_salary(text), parsed)
+
+    @override_settings(SALARY_USD_TO_CLP=1000)
+    def test_parse_salary_usd(self):
+        self.assertEqual(parse_salary("USD 2.000 mensual"), (2000000, 2000000, "month"))
@@ -0,0 +1,147 @@
+"""
+Trazas de búsqueda opcionales (engine + nlp).
+
+Por defecto no se traza nada y el costo es solo leer un ContextVar: no se hacen
+`count()` extra, no se arma SQL ni se toman tiempos. La traza se activa:
+
+    - por request: `?trace=1` o `"trace": true` en el body (ver `traced`), solo
+      con settings.DEBUG o si el usuario es staff; si no, el flag se ignora
+    - por muestreo: settings.SEARCH_TRACE_SAMPLE_RATE (0.0 - 1.0)
+    - explícitamente: `decide_jobs(..., trace=True)`
+
+Una traza pedida (request o explícita) se devuelve: `decide_jobs` agrega al final
+de `steps` una entrada ("trace", {...}) con cardinalidades por filtro, SQL y
+tiempos. Una traza por muestreo no sale en la respuesta: se imprime al log al
+cerrar el contexto.
+"""
+import json
+import random
+import time
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+
+# None = sin contexto de traza; False = contexto con la traza desactivada
+_current = ContextVar("search_trace", default=None)
+
+_NO_SPAN = nullcontext()
+
+
+class SearchTrace:
+    __slots__ = ("events", "started", "public")
+
+    def __init__(self, public: bool = False):
+        self.events = []
+        self.started = time.perf_counter()
+        # True si la traza se pidió y va en la respuesta; False si es por muestreo (solo log)
+        self.public = public
+
+    def record(self, kind: str, **data):
+        self.events.append({"kind": kind, **data})
+
+    def count(self, label: str, queryset) -> int:
+        """Cuenta un queryset y lo registra junto con su SQL."""
+        started = time.perf_counter()
+        total = queryset.count()
+        self.record(
+            "count",
+            label=label,
+            results=total,
+            sql=str(queryset.query),
+            ms=round((time.perf_counter() - started) * 1000, 2),
+        )
+        return total
+
+    @contextmanager
+    def span(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self.record("timing", name=name, ms=round((time.perf_counter() - started) * 1000, 2))
+
+    def as_dict(self) -> dict:
+        return {
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 2),
+            "events": list(self.events),
+        }
+
+
+def should_trace(flag=None) -> bool:
+    """Flag explícito si viene; si no, muestreo según SEARCH_TRACE_SAMPLE_RATE."""
+    if flag is not None:
+        return bool(flag)
+    rate = getattr(settings, "SEARCH_TRACE_SAMPLE_RATE", 0.0)
+    return rate > 0 and random.random() < rate
+
+
+@contextmanager
+def tracing(flag=None):
+    """
+    Abre un contexto de traza (o reutiliza el que ya esté abierto).
+    Entrega la SearchTrace activa, o None si la traza está desactivada.
+    """
+    existing = _current.get()
+    if existing is not None:
+        yield existing or None
+        return
+    trace = SearchTrace(public=bool(flag)) if should_trace(flag) else False
+    token = _current.set(trace)
+    try:
+        yield trace or None
+    finally:
+        _current.reset(token)
+        if trace and not trace.public:
+            print(f"🔬 TRACE (muestreo) - {json.dumps(trace.as_dict(), default=str)}")
+
+
+def current_trace():
+    """SearchTrace activa, o None si no se está trazando."""
+    return _current.get() or None
+
+
+def span(name: str):
+    """Mide un bloque si hay traza activa; si no, es un contexto vacío."""
+    trace = _current.get()
+    return trace.span(name) if trace else _NO_SPAN
+
+
+def traced_span(name: str):
+    """Decorador: mide la función con `span(name)` cuando hay traza activa."""
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            trace = _current.get()
+            if not trace:
+                return func(*args, **kwargs)
+            with trace.span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_requested(request):
+    """
+    Lee el flag de traza del request (`?trace=1` o `"trace": true`); None si no viene.
+    La traza expone SQL y agrega un count() por paso: solo se acepta con DEBUG o staff.
+    """
+    user = getattr(request, "user", None)
+    if not (settings.DEBUG or getattr(user, "is_staff", False)):
+        return None
+    value = request.query_params.get("trace")
+    if value is None and hasattr(request.data, "get"):
+        value = request.data.get("trace")
+    if value is None:
+        return None
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def traced(method):
+    """Decorador para métodos de APIView: abre el contexto de traza del request."""
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        with tracing(trace_requested(request)):
+            return method(self, request, *args, **kwargs)
+    return wrapper
@@ -2,19 +2,23 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from .nlp import parse_prompt, parse_simple_response, parse_complex_intent, parse_job_selection, parse_more_jobs_intent, parse_change_slot_intent, parse_show_jobs_intent, get_industries_from_db, get_modalities_from_db, get_areas_from_db, get_seniorities_from_db, get_locations_from_db, get_roles_from_db
-from .engine import decide_jobs, get_job_pagination_info
+from .engine import EXCLUDE_UNSUPPORTED, decide_jobs, page_info, search_facets, variety_cursor
+from .cards import fetch_cards
+from .export import EXPORT_FORMATS, export_lines, export_queryset, iter_rows
+from .catalog import schedule_catalog_refresh
+from .tracing import traced
 from .models import JobPosting, Conversation
-from django.db import ProgrammingError, OperationalError
 from .serializers import ConversationSerializer
 from .flow import next_missing_slot, question_for, get_encouraging_response
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from django.forms.models import model_to_dict
-from django.http import JsonResponse, HttpResponseBadRequest
+from django.http import JsonResponse, HttpResponseBadRequest, StreamingHttpResponse
 from django.db import transaction
 from .models import JobPosting, Source, Company, Location, Benefit
 
 class JobSearchView(APIView):
+    @traced
     def post(self, request):
         prompt = request.data.get("prompt", "")
         topn = int(request.data.get("topn", 3))
@@ -36,12 +40,6 @@ class JobSearchView(APIView):
         }, status=status.HTTP_200_OK)
 
 
-def _roles():
-    try:
-        return list(JobPosting.objects.values_list("title", flat=True).distinct())
-    except (ProgrammingError, OperationalError):
-        return []
-
 def _merge_state_with_prompt(state: dict, prompt: str):
     """Intenta parsear el texto y completar slots automáticamente."""
     print("\n" + "="*80)
@@ -213,7 +211,7 @@ def _merge_state_with_prompt(state: dict, prompt: str):
     
     # Si no hay contexto o el parsing contextual falló, usar parsing completo
     print(f"🔄 Intentando parsing completo del prompt...")
-    include, exclude, salary_min, currency = parse_prompt(prompt, _roles())
+    include, exclude, salary_min, currency = parse_prompt(prompt)
     print(f"📊 Resultado parsing:")
     print(f"   - include: {include}")
     print(f"   - exclude: {exclude}")
@@ -411,6 +409,7 @@ class ChatMessage(APIView):
     - la siguiente pregunta (si faltan slots), o
     - una recomendación (top 3) si ya hay suficiente info o si el usuario pide 'recomienda'/'listo'.
     """
+    @traced
     def post(self, request, conversation_id:int):
         print("\n" + "="*80)
         print("🚀 CHAT_MESSAGE - Nueva solicitud recibida")
@@ -712,18 +711,21 @@ class ChatMessage(APIView):
                     "seniority": "nivel de experiencia",
                     "location": "ubicación",
                     "transport": "transporte",
-                    "accessibility": "accesibilidad"
+                    "accessibility": "accesibilidad",
+                    "salary": "sueldo"
                 }
                 relaxed_display = [relaxed_names.get(f, f) for f in relaxed_filters]
                 if relaxed_display:
                     print(f"   ⚠️  Se relajaron algunos filtros: {relaxed_display}")
             
-            # Obtener información de paginación
-            pagination_info = get_job_pagination_info(include, exclude, sal_min, currency)
+            # Información de paginación (el total viene con la página)
+            pagination_info = page_info(metadata["total_count"])
             
             # Guardar resultados en el estado para selección posterior
             conv.state["last_results"] = _serialize_job_results(results)
             conv.state["current_offset"] = 3  # Preparar para la próxima búsqueda
+            conv.state["page_cursor"] = metadata.get("next_cursor")
+            conv.state.pop("variety_cursor", None)
             conv.save()
             
             # Mensaje con información de paginación
@@ -739,7 +741,8 @@ class ChatMessage(APIView):
                     "seniority": "nivel de experiencia",
                     "location": "ubicación",
                     "transport": "transporte",
-                    "accessibility": "accesibilidad"
+                    "accessibility": "accesibilidad",
+                    "salary": "sueldo"
                 }
                 relaxed_display = [relaxed_names.get(f, f) for f in relaxed_filters]
                 if relaxed_display:
@@ -766,29 +769,40 @@ class ChatMessage(APIView):
 
         # Si el usuario está pidiendo más empleos
         if action_intent and action_intent.get("action") == "more_jobs":
-            # Obtener información de paginación
             include, exclude, sal_min, currency = _build_filters_from_state(conv.state)
-            pagination_info = get_job_pagination_info(include, exclude, sal_min, currency)
             
             # Obtener el offset actual (si existe, usar el siguiente, si no, empezar desde 0)
             # Si no hay last_results, significa que es la primera búsqueda, empezar desde 0
             # Si hay last_results, significa que ya se mostraron resultados, usar el offset guardado
+            # El offset se mantiene para contar los empleos restantes; la página se
+            # pide con el cursor keyset (último id mostrado) cuando existe
+            variety = action_intent.get("variety", False)
             if "last_results" not in conv.state or not conv.state.get("last_results"):
                 # Primera búsqueda, empezar desde 0
                 current_offset = 0
+                page_cursor = None
             else:
-                # Ya hay resultados previos, usar el offset guardado
+                # Ya hay resultados previos, usar el offset/cursor guardado
                 current_offset = conv.state.get("current_offset", 3)
+                page_cursor = conv.state.get("page_cursor")
             
-            variety = action_intent.get("variety", False)
+            if variety:
+                # Variedad: orden barajado con una semilla fija por conversación,
+                # que se sigue paginando con su propio cursor
+                if "variety_seed" not in conv.state:
+                    conv.state["variety_seed"] = variety_cursor()["seed"]
+                page_cursor = conv.state.get("variety_cursor") or variety_cursor(conv.state["variety_seed"])
             
             print(f"🔍 Búsqueda de más empleos:")
             print(f"   - Offset actual: {current_offset}")
+            print(f"   - Cursor: {page_cursor}")
             print(f"   - Variety: {variety}")
             print(f"   - Filtros: {include}")
             
             # Buscar más empleos con paginación
-            results, steps, metadata = decide_jobs(include, exclude, sal_min, currency, topn=3, offset=current_offset, variety=variety)
+            results, steps, metadata = decide_jobs(include, exclude, sal_min, currency, topn=3, offset=current_offset, variety=variety, cursor=page_cursor)
+            # Información de paginación (el total viene con la página)
+            pagination_info = page_info(metadata["total_count"])
             
             # Si no hay más resultados relevantes, informar al usuario
             if not results or not metadata.get("has_relevant_results", True):
@@ -807,6 +821,10 @@ class ChatMessage(APIView):
             if results:
                 # Actualizar offset para la próxima búsqueda (incrementar por el número de resultados mostrados)
                 conv.state["current_offset"] = current_offset + len(results)
+                if variety:
+                    conv.state["variety_cursor"] = metadata.get("next_cursor")
+                else:
+                    conv.state["page_cursor"] = metadata.get("next_cursor")
                 conv.state["last_results"] = _serialize_job_results(results)
                 conv.save()
                 
@@ -1076,18 +1094,21 @@ class ChatMessage(APIView):
                 "seniority": "nivel de experiencia",
                 "location": "ubicación",
                 "transport": "transporte",
-                "accessibility": "accesibilidad"
+                "accessibility": "accesibilidad",
+                "salary": "sueldo"
             }
             relaxed_display = [relaxed_names.get(f, f) for f in relaxed_filters]
             if relaxed_display:
                 print(f"   ⚠️  Se relajaron algunos filtros: {relaxed_display}")
         
-        # Obtener información de paginación
-        pagination_info = get_job_pagination_info(include, exclude, sal_min, currency)
+        # Información de paginación (el total viene con la página)
+        pagination_info = page_info(metadata["total_count"])
         
         # Guardar resultados en el estado para selección posterior
         conv.state["last_results"] = _serialize_job_results(results)
         conv.state["current_offset"] = len(results)  # Preparar para la próxima búsqueda (usar el número de resultados mostrados)
+        conv.state["page_cursor"] = metadata.get("next_cursor")
+        conv.state.pop("variety_cursor", None)
         conv.save()
         
         # Mensaje final empático
@@ -1103,7 +1124,8 @@ class ChatMessage(APIView):
                 "seniority": "nivel de experiencia",
                 "location": "ubicación",
                 "transport": "transporte",
-                "accessibility": "accesibilidad"
+                "accessibility": "accesibilidad",
+                "salary": "sueldo"
             }
             relaxed_display = [relaxed_names.get(f, f) for f in relaxed_filters]
             if relaxed_display:
@@ -1150,6 +1172,71 @@ class TaxonomyView(APIView):
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+class FacetsView(APIView):
+    """
+    Conteo de empleos por opción de cada faceta (industria, área, modalidad, experiencia,
+    ubicación, accesibilidad, transporte) con los demás filtros activos.
+    Recibe la misma estructura que decide_jobs: {"include": {...}, "exclude": {...},
+    "salary_min": ..., "currency": ...}
+    """
+    @traced
+    def post(self, request):
+        try:
+            include, exclude, salary_min, currency = _search_filters(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            facets = search_facets(include, exclude, salary_min, currency)
+            return Response(facets, status=status.HTTP_200_OK)
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+class JobExportView(APIView):
+    """
+    Exporta todos los empleos que cumplen los filtros, en streaming (NDJSON o CSV).
+    Recibe la misma estructura que decide_jobs más el formato:
+    {"include": {...}, "exclude": {...}, "salary_min": ..., "currency": ..., "format": "ndjson" | "csv"}
+    """
+    def post(self, request):
+        try:
+            include, exclude, salary_min, currency = _search_filters(request.data)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        fmt = request.data.get("format") or "ndjson"
+        if fmt not in EXPORT_FORMATS:
+            return Response({"error": f"format debe ser uno de {', '.join(EXPORT_FORMATS)}"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows = iter_rows(export_queryset(include, exclude, salary_min, currency))
+        except Exception as e:
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        response = StreamingHttpResponse(export_lines(fmt, rows), content_type=EXPORT_FORMATS[fmt])
+        response["Content-Disposition"] = f'attachment; filename="empleos.{fmt}"'
+        return response
+
+
+def _search_filters(data):
+    """
+    (include, exclude, salary_min, currency) de un body con la estructura de decide_jobs;
+    los valores sueltos se pasan a lista. ValueError si el body no tiene esa forma.
+    """
+    include = data.get("include") or {}
+    exclude = data.get("exclude") or {}
+    if not isinstance(include, dict) or not isinstance(exclude, dict):
+        raise ValueError("include y exclude deben ser objetos {slot: [valores]}")
+    include = {k: v if isinstance(v, list) else [v] for k, v in include.items()}
+    exclude = {k: v if isinstance(v, list) else [v] for k, v in exclude.items()}
+    unsupported = [k for k in exclude if k in EXCLUDE_UNSUPPORTED]
+    if unsupported:
+        raise ValueError(f"No se puede excluir por {', '.join(unsupported)} (usar salary_min)")
+    salary_min = data.get("salary_min")
+    try:
+        salary_min = int(salary_min) if salary_min else None
+    except (TypeError, ValueError):
+        raise ValueError("salary_min debe ser un número")
+    return include, exclude, salary_min, data.get("currency")
+
+
 class JobDetailsView(APIView):
     """
     Endpoint para obtener detalles completos de un empleo específico
@@ -1241,17 +1328,8 @@ class JobPostingChoicesAPI(APIView):
 
 class JobPostingListCreateAPI(APIView):
     def get(self, request):
-        qs = JobPosting.objects.all().order_by("-id")[:200]
-        data = []
-        for j in qs:
-            data.append({
-                "id": j.id,
-                "title": getattr(j, "title", ""),
-                "company": getattr(j.company, "name", None) if getattr(j, "company", None) else None,
-                "source": getattr(j.source, "name", None) if getattr(j, "source", None) else None,
-                "location": getattr(j.location, "raw_text", None) if getattr(j, "location", None) else None,
-                "url": getattr(j, "url", None),
-            })
+        cards = fetch_cards(JobPosting.objects.order_by("-id")[:200])
+        data = [card.as_list_item() for card in cards]
         return Response({"results": data}, status=status.HTTP_200_OK)
 
     @transaction.atomic
@@ -1313,9 +1391,14 @@ class JobPostingListCreateAPI(APIView):
         # ---- Campos propios de JobPosting
         allowed = _field_names(JobPosting)
         job_data = {k: v for k, v in payload.items() if k in allowed}
+        # salary_min / salary_max del payload son montos mensuales en CLP
+        # (si viene salary_text, JobPosting.save() los recalcula desde el texto)
+        for k in ("salary_min", "salary_max"):
+            if k in payload and f"{k}_clp" in allowed:
+                job_data.setdefault(f"{k}_clp", payload[k])
 
         # Casteos útiles
-        for k in ("salary_min", "salary_max"):
+        for k in ("salary_min_clp", "salary_max_clp"):
             if k in job_data and job_data[k] in ("", None):
                 job_data.pop(k)
             elif k in job_data:
@@ -1338,6 +1421,9 @@ class JobPostingListCreateAPI(APIView):
         except Exception as e:
             return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
+        # Vista, sinónimos y versión después del commit (el índice y la vista se actualizan juntos)
+        schedule_catalog_refresh()
+
         # ---- Beneficios (M2M directa o tabla intermedia)
         if benefits_in:
             if isinstance(benefits_in, str):
@@ -44,6 +44,7 @@ MIDDLEWARE = [
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
+    'empleos.middleware.CatalogVersionMiddleware',
 ]
 
 CORS_ALLOW_ALL_ORIGINS = True  # (o lista blanca por dominios)
@@ -131,3 +132,31 @@ MEDIA_ROOT = BASE_DIR / 'media'
 # https://docs.djangoproject.com/en/5.0/ref/settings/#default-auto-field
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# Búsqueda de empleos: índice en memoria (bitmaps) en vez de la cadena de filtros SQL
+JOB_INDEX_ENABLED = os.environ.get("JOB_INDEX_ENABLED", "1") in ("1", "true", "True")
+
+# Fracción de búsquedas que se trazan (cardinalidades, SQL y tiempos al log, no a la respuesta); 0 = ninguna
+SEARCH_TRACE_SAMPLE_RATE = float(os.environ.get("SEARCH_TRACE_SAMPLE_RATE", "0"))
+
+# Entradas de la caché LRU de resultados de búsqueda (por proceso); 0 = desactivada
+SEARCH_CACHE_SIZE = int(os.environ.get("SEARCH_CACHE_SIZE", "512"))
+
+# Búsquedas SQL sobre la vista materializada empleos_jobsearch (migración 0012, ver empleos/search_view.py)
+SEARCH_VIEW_ENABLED = os.environ.get("SEARCH_VIEW_ENABLED", "1") in ("1", "true", "True")
+
+# Orden de decide_jobs: "relax" (estricto → relajación) o "score" (puntaje por filtros + frescura)
+SEARCH_RANKING = os.environ.get("SEARCH_RANKING", "relax")
+# Peso y vida media (días) de la frescura de published_date en el modo "score"
+SEARCH_FRESHNESS_WEIGHT = float(os.environ.get("SEARCH_FRESHNESS_WEIGHT", "1.0"))
+SEARCH_FRESHNESS_HALF_LIFE_DAYS = float(os.environ.get("SEARCH_FRESHNESS_HALF_LIFE_DAYS", "30"))
+
+# Tipo de cambio con que se pasan a CLP los sueldos publicados en dólares (normalize.parse_salary)
+SALARY_USD_TO_CLP = int(os.environ.get("SALARY_USD_TO_CLP", "950"))
+
+# Segundos que espera el refresco del catálogo (vista + sinónimos) después de un alta
+# por la API; las altas de ese intervalo se refrescan juntas (ver empleos/catalog.py)
+CATALOG_REFRESH_DELAY = float(os.environ.get("CATALOG_REFRESH_DELAY", "5"))
+
+# Filas por FETCH del cursor del servidor en las exportaciones (/api/export, export_jobs)
+EXPORT_CHUNK_SIZE = int(os.environ.get("EXPORT_CHUNK_SIZE", "2000"))
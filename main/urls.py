@@ -1,6 +1,6 @@
 from django.contrib import admin
 from django.urls import path
-from empleos.views import JobSearchView, ChatStart, ChatMessage, ChatState, TaxonomyView, JobDetailsView, JobPostingListCreateAPI, JobPostingChoicesAPI
+from empleos.views import JobSearchView, ChatStart, ChatMessage, ChatState, TaxonomyView, FacetsView, JobExportView, JobDetailsView, JobPostingListCreateAPI, JobPostingChoicesAPI
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -9,6 +9,8 @@ urlpatterns = [
     path("api/chat/<int:conversation_id>/message", ChatMessage.as_view()),
     path("api/chat/<int:conversation_id>/state", ChatState.as_view(), name="chat-state"),
     path("api/taxonomy", TaxonomyView.as_view(), name="taxonomy"),
+    path("api/facets", FacetsView.as_view(), name="facets"),
+    path("api/export", JobExportView.as_view(), name="job-export"),
     path("api/job/<int:job_id>", JobDetailsView.as_view(), name="job-details"),
     path("api/jobpostings/", JobPostingListCreateAPI.as_view(), name="jobposting-list-create"),
     path("api/jobpostings/choices", JobPostingChoicesAPI.as_view(), name="jobposting-choices"),